@@ -0,0 +1,82 @@
+import csv
+import os
+import sqlite3
+import threading
+
+FIRST_ACCOUNT_NO = 1000001  # account numbers of account.csv start here
+
+
+class AccountStore:
+    """
+    User accounts in an SQLite database, replacing the scans of account.csv.
+
+    Usernames are a unique, indexed column, so a login or a duplicate check is
+    a single lookup, and a signup is one INSERT that SQLite serialises with its
+    file lock, so signups from several threads or processes cannot take the
+    same username or account number. The first time the database is opened the
+    accounts of the legacy CSV (AccountNo, Username, Password) are copied in.
+    """
+
+    def __init__(self, path='account.db', legacy_csv='account.csv'):
+        self.path = path
+        self.lock = threading.Lock()  # one connection shared by the threads of this process
+        self.connection = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        with self.lock:
+            self.connection.execute('PRAGMA journal_mode=WAL')  # Readers do not wait for a signup being written
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS accounts ('
+                'account_no INTEGER PRIMARY KEY, username TEXT NOT NULL UNIQUE, password TEXT NOT NULL)')
+        if legacy_csv and os.path.exists(legacy_csv):
+            self.migrate(legacy_csv)
+
+    # Function to copy the accounts of a CSV in, once: nothing happens when the database already has accounts
+    def migrate(self, legacy_csv):
+        with open(legacy_csv, 'r', newline='', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            next(reader, None)  # Skip the header row
+            rows = [(int(row[0]), row[1], row[2]) for row in reader if len(row) >= 3]
+        with self.lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                if self.connection.execute('SELECT 1 FROM accounts LIMIT 1').fetchone() is None:
+                    self.connection.executemany('INSERT OR IGNORE INTO accounts VALUES (?, ?, ?)', rows)
+                self.connection.execute('COMMIT')
+            except BaseException:
+                self.connection.execute('ROLLBACK')
+                raise
+        return len(rows)
+
+    # Function to get the password of a username, None if there is no such account
+    def password(self, username):
+        with self.lock:
+            row = self.connection.execute('SELECT password FROM accounts WHERE username = ?', (username,)).fetchone()
+        return row[0] if row else None
+
+    def __contains__(self, username):
+        return self.password(username) is not None
+
+    # Function to create an account with the next account number, None if the username is already used
+    def create(self, username, password):
+        with self.lock:
+            try:
+                cursor = self.connection.execute(
+                    'INSERT INTO accounts (account_no, username, password) '
+                    'SELECT COALESCE(MAX(account_no) + 1, ?), ?, ? FROM accounts', (FIRST_ACCOUNT_NO, username, password))
+            except sqlite3.IntegrityError:
+                return None
+        return cursor.lastrowid
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+_stores = {}
+
+
+# Function to get the shared account store of a database file
+def get_account_store(path='account.db', legacy_csv='account.csv'):
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = AccountStore(path, legacy_csv)
+    return store
@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from routestore import get_route_store
+
+
+class AllPairsMatrix:
+    """
+    Dense all-pairs matrices for one metric of the route graph.
+
+    distances[i, j] is the lowest total weight from airport i to airport j
+    (inf when unreachable) and next_hops[i, j] is the airport to fly to first
+    on that route (-1 when unreachable), so a path is rebuilt in O(path length).
+    Both are .npy files that are opened memory-mapped, not read into RAM.
+    """
+
+    def __init__(self, codes, distances, next_hops, metric=24, fingerprint=None):
+        self.codes = codes
+        self.fingerprint = fingerprint  # dataset version the matrices were computed from
+        self.index = {code: node for node, code in enumerate(codes)}
+        self.distances = distances
+        self.next_hops = next_hops
+        self.metric = metric
+
+    # Function to compute the matrices with a row-blocked Floyd-Warshall over a CSRView
+    @classmethod
+    def build(cls, graph, directory=None, fingerprint=None, block_rows=512):
+        n = len(graph)
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            distances = np.lib.format.open_memmap(cls.file(directory, 'distances', graph.column), 'w+', np.float64, (n, n))
+            next_hops = np.lib.format.open_memmap(cls.file(directory, 'next_hops', graph.column), 'w+', np.int32, (n, n))
+        else:
+            distances = np.empty((n, n), np.float64)
+            next_hops = np.empty((n, n), np.int32)
+
+        distances[:] = np.inf
+        next_hops[:] = -1
+        offsets = np.asarray(graph.offsets, dtype=np.int64)
+        sources = np.repeat(np.arange(n), np.diff(offsets))
+        targets = np.asarray(graph.targets, dtype=np.int64)
+        distances[sources, targets] = np.asarray(graph.weights, dtype=np.float64)
+        next_hops[sources, targets] = targets
+        diagonal = np.arange(n)
+        distances[diagonal, diagonal] = 0.0
+        next_hops[diagonal, diagonal] = diagonal
+
+        for k in range(n):
+            through_k = np.array(distances[k])  # Row k does not change while k is the pivot
+            for start in range(0, n, block_rows):
+                block = distances[start:start + block_rows]
+                via = block[:, k:k + 1] + through_k
+                better = via < block
+                if better.any():
+                    block[better] = via[better]
+                    hops = next_hops[start:start + block_rows]
+                    hops[better] = np.broadcast_to(hops[:, k:k + 1], hops.shape)[better]
+
+        if directory is not None:
+            distances.flush()
+            next_hops.flush()
+            with open(cls.file(directory, 'codes', graph.column, '.json'), 'w', encoding='utf-8') as file:
+                json.dump({'codes': graph.codes, 'fingerprint': fingerprint}, file)
+        return cls(list(graph.codes), distances, next_hops, graph.column, fingerprint)
+
+    # Function to open previously built matrices read-only and memory-mapped
+    @classmethod
+    def load(cls, directory, metric=24):
+        with open(cls.file(directory, 'codes', metric, '.json'), 'r', encoding='utf-8') as file:
+            header = json.load(file)
+        distances = np.load(cls.file(directory, 'distances', metric), mmap_mode='r')
+        next_hops = np.load(cls.file(directory, 'next_hops', metric), mmap_mode='r')
+        return cls(header['codes'], distances, next_hops, metric, header['fingerprint'])
+
+    @staticmethod
+    def file(directory, name, metric, extension='.npy'):
+        return os.path.join(directory, f'{name}_{metric}{extension}')
+
+    def cost(self, source, destination):
+        if source not in self.index or destination not in self.index:
+            return float('inf')
+        return float(self.distances[self.index[source], self.index[destination]])
+
+    # Function to rebuild the path by following next hops, returns (path, total) like Astar.run_a_star
+    def path(self, source, destination):
+        if source not in self.index or destination not in self.index:
+            return None, float('inf')
+        node, target = self.index[source], self.index[destination]
+        if self.next_hops[node, target] < 0:
+            return None, float('inf')
+        path = [node]
+        while node != target:
+            node = int(self.next_hops[node, target])
+            path.append(node)
+        return [self.codes[node] for node in path], float(self.distances[path[0], target])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute all-pairs cheapest cost and shortest distance matrices.")
+    parser.add_argument('--dataset', default='dataset.csv')
+    parser.add_argument('--out', default='allpairs', help="directory for the .npy matrices")
+    parser.add_argument('--metric', type=int, nargs='+', default=[24, 20], help="dataset columns to build, 24 = cost, 20 = distance")
+    args = parser.parse_args(argv)
+
+    store = get_route_store(args.dataset)
+    graph = store.compact_graph()
+    for metric in args.metric:
+        AllPairsMatrix.build(graph.weighted(metric), args.out, store.fingerprint)
+        print(f"Column {metric}: {len(graph)} x {len(graph)} matrices written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,71 @@
 import heapq
+import math
+
+import numpy as np
+
+from csrgraph import CSRView
 
 class Astar:
+    def __init__(self):
+        self.reset_stats()
+
     #a star algorithm to find cheapest flight cost path.
-    def run_a_star(self,graph, start, goal):
+    def run_a_star(self,graph, start, goal, informed=True, bidirectional=False):
         """
         A* algorithm to find the cheapest flight cost between two airports.
         
         Args:
-        - graph: Adjacency list representation of the flight network.
-        - start: Starting airport code.
-        - goal: Destination airport code.
+        - graph: Adjacency list representation of the flight network, or a CSRView.
+        - start: Starting airport code (or, for a CSRView, a set of codes).
+        - goal: Destination airport code (or, for a CSRView, a set of codes).
+        - informed: For a CSRView, guide the search with the great-circle heuristic.
+          A dict graph has no coordinates and is always searched uninformed.
+        - bidirectional: For a CSRView, search from both ends at once instead
+          (see run_bidirectional), the heuristic is then not used. On route
+          networks like benchmark.generate_dataset's this expands more nodes
+          than informed A*, so it is off by default.
         
         Returns:
         - path: Cheapest flight path from start to goal as a list of airport codes.
         - cost: Total cost of the cheapest flight path.
         """
+        if isinstance(graph, CSRView):
+            if bidirectional:
+                return self.run_bidirectional(graph, start, goal)
+            return self.run_a_star_csr(graph, start, goal, informed)
+
+        self.reset_stats()
         # Initialize open set, closed set, and costs dictionary
         open_set = [(0, start)]
         closed_set = set()
         costs = {start: (0, None)}  # Cost is tuple (total cost so far, parent node)
+        expanded = pushes = stale = 0
+        max_open = 1
         
         while open_set:
             #create a priority queue
             # Pop node with the lowest total cost
             current_cost, current_node = heapq.heappop(open_set)
+
+            # Lazy deletion: a node pushed again at a lower cost leaves its older entries in the heap
+            if current_node in closed_set:
+                stale += 1
+                continue
             
             # Check if goal reached
             if current_node == goal:
-                # Reconstruct path
+                self.record_stats(expanded, pushes, max_open, stale)
+                # Reconstruct path, from the goal back to start and then reversed
                 path = []
-                while current_node in costs:
-                    path.insert(0, current_node)
+                while current_node is not None:
+                    path.append(current_node)
                     current_node = costs[current_node][1]
+                path.reverse()
                 return path, current_cost
             
             # Mark current node as visited
             closed_set.add(current_node)
+            expanded += 1
             
             # Explore neighbors
             for neighbor, cost in graph[current_node].items():
@@ -50,6 +80,279 @@ class Astar:
                     costs[neighbor] = (tentative_cost, current_node)
                     f_value = tentative_cost  # For cheapest cost, heuristic is not needed
                     heapq.heappush(open_set, (f_value, neighbor))
+                    pushes += 1
+            if len(open_set) > max_open:
+                max_open = len(open_set)
         
         # No path found
+        self.record_stats(expanded, pushes, max_open, stale)
+        return None, float('inf')
+
+    #A* on the integer ids of a CSRView, the heuristic is the calibrated great-circle distance to the goal
+    #start and goal may also be sets of airport codes, searched as if joined to a virtual source and sink
+    def run_a_star_csr(self, graph, start, goal, informed=True):
+        self.reset_stats()
+        sources = self.node_ids(graph, start)
+        goals = self.node_ids(graph, goal)
+        if not sources or not goals:
+            return None, float('inf')
+        is_goal = bytearray(len(graph))
+        for target in goals:
+            is_goal[target] = 1
+        offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+        heuristic = self.great_circle_heuristic(graph, goals) if informed else (lambda node: 0.0)
+
+        costs = [float('inf')] * len(graph)
+        parents = [-1] * len(graph)
+        open_set = []
+        for source in sources:
+            costs[source] = 0.0
+            open_set.append((heuristic(source), 0.0, source))
+        heapq.heapify(open_set)
+        expanded = pushes = stale = 0
+        max_open = len(open_set)
+
+        while open_set:
+            _, current_cost, node = heapq.heappop(open_set)
+            if current_cost > costs[node]:
+                stale += 1
+                continue  # Stale entry, a cheaper one was already pushed
+
+            if is_goal[node]:
+                self.record_stats(expanded, pushes, max_open, stale)
+                path = [node]
+                while parents[node] != -1:
+                    node = parents[node]
+                    path.append(node)
+                path.reverse()
+                return graph.to_codes(path), current_cost
+
+            expanded += 1
+            for position in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[position]
+                tentative_cost = current_cost + weights[position]
+                if tentative_cost < costs[neighbor]:
+                    costs[neighbor] = tentative_cost
+                    parents[neighbor] = node
+                    heapq.heappush(open_set, (tentative_cost + heuristic(neighbor), tentative_cost, neighbor))
+                    pushes += 1
+            if len(open_set) > max_open:
+                max_open = len(open_set)
+
+        # No path found
+        self.record_stats(expanded, pushes, max_open, stale)
         return None, float('inf')
+
+    #Bidirectional Dijkstra on a CSRView: forward from start over the flights and backward from goal over the
+    #reversed flights (CSRView.reverse), start and goal may also be sets of airport codes
+    #Every relaxed flight that links the two searches is a candidate meeting point, and the search stops once
+    #the two frontier costs together cannot beat the best meeting found
+    def run_bidirectional(self, graph, start, goal):
+        self.reset_stats()
+        ends = (self.node_ids(graph, start), self.node_ids(graph, goal))
+        if not ends[0] or not ends[1]:
+            return None, float('inf')
+        reverse = graph.reverse()
+        sides = ((graph.offsets, graph.targets, graph.weights), (reverse.offsets, reverse.targets, reverse.weights))
+        costs = ([float('inf')] * len(graph), [float('inf')] * len(graph))
+        parents = ([-1] * len(graph), [-1] * len(graph))
+        settled = (bytearray(len(graph)), bytearray(len(graph)))
+        open_sets = ([], [])
+        for side in (0, 1):
+            for node in ends[side]:
+                costs[side][node] = 0.0
+                open_sets[side].append((0.0, node))
+
+        best, meeting = float('inf'), -1
+        for node in ends[0]:
+            if costs[1][node] == 0.0:
+                best, meeting = 0.0, node
+        expanded = pushes = stale = 0
+        max_open = len(open_sets[0]) + len(open_sets[1])
+
+        while open_sets[0] and open_sets[1]:
+            if open_sets[0][0][0] + open_sets[1][0][0] >= best:
+                break
+            side = 0 if open_sets[0][0][0] <= open_sets[1][0][0] else 1
+            current_cost, node = heapq.heappop(open_sets[side])
+            if settled[side][node]:
+                stale += 1
+                continue
+            settled[side][node] = 1
+            expanded += 1
+
+            offsets, targets, weights = sides[side]
+            mine, other, parent = costs[side], costs[1 - side], parents[side]
+            for position in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[position]
+                tentative_cost = current_cost + weights[position]
+                if tentative_cost < mine[neighbor]:
+                    mine[neighbor] = tentative_cost
+                    parent[neighbor] = node
+                    heapq.heappush(open_sets[side], (tentative_cost, neighbor))
+                    pushes += 1
+                if mine[neighbor] + other[neighbor] < best:
+                    best, meeting = mine[neighbor] + other[neighbor], neighbor
+            if len(open_sets[0]) + len(open_sets[1]) > max_open:
+                max_open = len(open_sets[0]) + len(open_sets[1])
+
+        self.record_stats(expanded, pushes, max_open, stale)
+        if meeting == -1:
+            return None, float('inf')
+        path = []
+        node = meeting
+        while node != -1:
+            path.append(node)
+            node = parents[0][node]
+        path.reverse()
+        node = parents[1][meeting]
+        while node != -1:
+            path.append(node)
+            node = parents[1][node]
+        return graph.to_codes(path), best
+
+    # Dijkstra from start on a CSRView until every goal is settled, so one search answers many destinations
+    # Returns {goal: (path, cost)}, with (None, inf) for goals that cannot be reached
+    def run_single_source(self, graph, start, goals):
+        self.reset_stats()
+        results = {goal: (None, float('inf')) for goal in goals}
+        if start not in graph:
+            return results
+        pending = {graph.index[goal] for goal in goals if goal in graph}
+        offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+
+        costs = [float('inf')] * len(graph)
+        parents = [-1] * len(graph)
+        source = graph.index[start]
+        costs[source] = 0.0
+        open_set = [(0.0, source)]
+        expanded = pushes = stale = 0
+        max_open = 1
+
+        while open_set and pending:
+            current_cost, node = heapq.heappop(open_set)
+            if current_cost > costs[node]:
+                stale += 1
+                continue
+            pending.discard(node)
+            expanded += 1
+            for position in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[position]
+                tentative_cost = current_cost + weights[position]
+                if tentative_cost < costs[neighbor]:
+                    costs[neighbor] = tentative_cost
+                    parents[neighbor] = node
+                    heapq.heappush(open_set, (tentative_cost, neighbor))
+                    pushes += 1
+            if len(open_set) > max_open:
+                max_open = len(open_set)
+        self.record_stats(expanded, pushes, max_open, stale)
+
+        for goal in goals:
+            node = graph.index.get(goal)
+            if node is None or costs[node] == float('inf'):
+                continue
+            path = [node]
+            while parents[path[-1]] != -1:
+                path.append(parents[path[-1]])
+            path.reverse()
+            results[goal] = (graph.to_codes(path), costs[node])
+        return results
+
+    # Bounded Dijkstra from start on a CSRView: every airport reachable within budget and max_stops in one sweep
+    # hops=True counts flights instead of the view's weights. A label is dropped as soon as it exceeds the budget,
+    # and with a stop limit an airport is settled again only when reached with fewer flights than before
+    # Returns {airport: (path, best value)} without the start airports
+    def run_reachable(self, graph, start, budget=None, max_stops=None, hops=False):
+        self.reset_stats()
+        budget = float('inf') if budget is None else budget
+        max_legs = None if max_stops is None else max_stops + 1
+        offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+        starts = self.node_ids(graph, start)
+
+        fewest = [math.inf] * len(graph)  # fewest flights of the labels settled at each node
+        reached = {}  # node -> label of its best value, the first one settled
+        labels = [(node, -1) for node in starts]  # label -> (node, parent label)
+        best = {}  # (node, flights) -> lowest value pushed, so a label is only pushed when it improves on it
+        open_set = [(0.0, 0, label) for label in range(len(labels))]
+        expanded = pushes = stale = 0
+        max_open = len(open_set)
+
+        while open_set:
+            cost, legs, label = heapq.heappop(open_set)
+            node = labels[label][0]
+            if legs >= fewest[node]:
+                stale += 1
+                continue
+            fewest[node] = legs
+            reached.setdefault(node, (label, cost))
+            expanded += 1
+            if max_legs is not None and legs >= max_legs:
+                continue
+            next_legs = legs + 1 if max_legs is not None else 0  # Without a stop limit every node is settled once
+            for position in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[position]
+                tentative_cost = cost + (1 if hops else weights[position])
+                if tentative_cost > budget or next_legs >= fewest[neighbor] or tentative_cost >= best.get((neighbor, next_legs), math.inf):
+                    continue
+                best[(neighbor, next_legs)] = tentative_cost
+                labels.append((neighbor, label))
+                heapq.heappush(open_set, (tentative_cost, next_legs, len(labels) - 1))
+                pushes += 1
+            if len(open_set) > max_open:
+                max_open = len(open_set)
+        self.record_stats(expanded, pushes, max_open, stale)
+
+        results = {}
+        for node, (label, cost) in reached.items():
+            if labels[label][1] == -1:
+                continue  # A start airport
+            path = []
+            while label != -1:
+                path.append(labels[label][0])
+                label = labels[label][1]
+            path.reverse()
+            results[graph.codes[node]] = (graph.to_codes(path), cost)
+        return results
+
+    # Function to build h(node) = scale * great-circle km to the goal, admissible for distance and cost views
+    # The km to the goal are computed for every airport in one vectorised pass
+    # With several goals the estimate is the distance to the nearest of them
+    def great_circle_heuristic(self, graph, goals):
+        scale = graph.heuristic_scale()
+        if scale <= 0 or any(math.isnan(graph.graph.latitudes[target]) for target in goals):
+            return lambda node: 0.0
+
+        geometry = graph.graph.geometry()
+        estimates = geometry.distances_to(goals[0])
+        for target in goals[1:]:
+            np.fmin(estimates, geometry.distances_to(target), out=estimates)
+        estimates *= scale
+        estimates[np.isnan(estimates)] = 0.0  # No coordinates for this airport
+        return estimates.tolist().__getitem__
+
+    # Function to get the node ids of an airport code or a collection of codes, skipping unknown ones
+    # Works on a CSRGraph as well as a CSRView, Pareto uses it too
+    @staticmethod
+    def node_ids(graph, airports):
+        airports = [airports] if isinstance(airports, str) else airports
+        return list(dict.fromkeys(graph.index[code] for code in airports if code in graph))
+
+    # stale_pops counts heap entries skipped because their node was already settled more cheaply
+    def reset_stats(self):
+        self.stats = {'nodes_expanded': 0, 'heap_pushes': 0, 'max_heap_size': 0, 'stale_pops': 0}
+
+    def record_stats(self, expanded, pushes, max_open, stale=0):
+        self.stats = {'nodes_expanded': expanded, 'heap_pushes': pushes, 'max_heap_size': max_open, 'stale_pops': stale}
+
+    # Function to compare nodes expanded by the uninformed, informed and bidirectional searches over (start, goal) pairs
+    def expansion_report(self, graph, pairs):
+        report = []
+        for start, goal in pairs:
+            self.run_a_star_csr(graph, start, goal, informed=False)
+            uninformed = self.stats['nodes_expanded']
+            self.run_bidirectional(graph, start, goal)
+            bidirectional = self.stats['nodes_expanded']
+            _, cost = self.run_a_star_csr(graph, start, goal, informed=True)
+            report.append((start, goal, cost, uninformed, self.stats['nodes_expanded'], bidirectional))
+        return report
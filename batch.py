@@ -0,0 +1,160 @@
+import argparse
+import csv
+import json
+import sys
+from itertools import islice
+
+from astar import Astar
+from bfs import BFS
+from constraints import RouteConstraints
+from routestore import get_route_store
+
+
+class BatchPlanner:
+    """
+    Headless route planning over many origin/destination pairs.
+
+    Pairs are grouped by source so a single Dijkstra run per source and metric
+    answers the cheapest path to every destination of that source, and also
+    seeds the k-shortest search with its first (shortest) path.
+    """
+
+    def __init__(self, dataset='dataset.csv', k=3, max_stops=None, constraints=None):
+        self.dataset = dataset #20 = distance 24 = cost
+        self.k = k
+        self.max_stops = max_stops
+        self.constraints = constraints  # RouteConstraints on airlines and airports, None for every route
+        self.a_star = Astar()
+        self.bfs = BFS()
+        self.report = {}
+
+    # Function to read (source, destination) IATA pairs from a CSV or whitespace separated file
+    def read_pairs(self, path):
+        pairs = []
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                fields = [field.strip().upper() for field in line.replace(',', ' ').split()]
+                if len(fields) < 2 or fields[0] in ('SOURCE', 'SRC', 'ORIGIN'):
+                    continue  # Blank line or header row
+                pairs.append((fields[0], fields[1]))
+        return pairs
+
+    def group_by_source(self, pairs):
+        groups = {}
+        for source, destination in pairs:
+            destinations = groups.setdefault(source, [])
+            if destination not in destinations:
+                destinations.append(destination)
+        return groups
+
+    # Generator of one result dict per pair, in source-grouped order
+    def plan(self, pairs):
+        for source, destinations in self.group_by_source(pairs).items():
+            yield from self.plan_group(source, destinations)
+
+    # Cheapest cost from every airport to every other airport
+    def plan_all_pairs(self):
+        codes = get_route_store(self.dataset).compact_graph().codes
+        for code in codes:
+            yield from self.plan_group(code, [other for other in codes if other != code])
+
+    def plan_group(self, source, destinations):
+        store = get_route_store(self.dataset)
+        graph = store.constrained_graph(self.constraints) if self.constraints is not None else store.compact_graph()
+        cost_graph, flight_graph = graph.weighted(24), graph.weighted(20)
+        max_stops = self.constraints.stop_limit(self.max_stops) if self.constraints is not None else self.max_stops
+        if max_stops is None:
+            cheapest = self.a_star.run_single_source(cost_graph, source, destinations)
+        else:
+            # Like RoutePlanner.cheapest_path: the cheapest path within the stop limit is the first hop-aware path
+            cheapest = {destination: next(iter(self.bfs.iter_shortest_paths(cost_graph, source, destination, max_stops)), (None, float('inf')))
+                        for destination in destinations}
+        shortest = {}
+        if self.k > 0 and max_stops is None:
+            shortest = self.a_star.run_single_source(flight_graph, source, destinations)
+
+        results = []
+        for destination in destinations:
+            path, cost = cheapest[destination]
+            first = shortest.get(destination)
+            if first is not None and first[0] is None:
+                first = None
+            paths = islice(self.bfs.iter_shortest_paths(flight_graph, source, destination, max_stops, first), self.k) if self.k > 0 else []
+            results.append({
+                'source': source,
+                'destination': destination,
+                'cheapest_path': path,
+                'cheapest_cost': round(cost, 2) if path is not None else None,
+                'shortest_paths': [{'path': path, 'distance': round(distance, 2)} for path, distance in paths],
+            })
+        return results
+
+    # Function to stream results of every pair in the input file (every airport pair if None) to an output file
+    def run(self, input_path, output_path, output_format=None, workers=1):
+        runner = self
+        if workers > 1:
+            from parallel import ParallelPlanner
+
+            runner = ParallelPlanner(self, workers)
+        results = runner.plan(self.read_pairs(input_path)) if input_path else runner.plan_all_pairs()
+        count = self.write(results, output_path, output_format)
+        self.report = runner.report
+        return count
+
+    # Function to write results to a .csv or .jsonl file as they are produced
+    def write(self, results, output_path, output_format=None):
+        output_format = output_format or ('csv' if output_path.endswith('.csv') else 'jsonl')
+        count = 0
+        with open(output_path, 'w', newline='', encoding='utf-8') as file:
+            if output_format == 'csv':
+                csv_writer = csv.writer(file)
+                csv_writer.writerow(['source', 'destination', 'cheapest_cost', 'cheapest_path', 'shortest_distances', 'shortest_paths'])
+            for result in results:
+                if output_format == 'csv':
+                    csv_writer.writerow([
+                        result['source'],
+                        result['destination'],
+                        result['cheapest_cost'] if result['cheapest_cost'] is not None else '',
+                        '>'.join(result['cheapest_path'] or []),
+                        ';'.join(f"{item['distance']:.2f}" for item in result['shortest_paths']),
+                        ';'.join('>'.join(item['path']) for item in result['shortest_paths']),
+                    ])
+                else:
+                    file.write(json.dumps(result) + '\n')
+                count += 1
+        return count
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Plan cheapest and k shortest routes for a file of source/destination IATA pairs.")
+    parser.add_argument('pairs', nargs='?', help="file with one 'SOURCE,DESTINATION' IATA pair per line")
+    parser.add_argument('--all-pairs', action='store_true', help="plan every airport pair instead of a pairs file (use -k 0 for cheapest only)")
+    parser.add_argument('-o', '--output', default='routes.jsonl', help="output file, .csv or .jsonl")
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help="output format, defaults to the output file extension")
+    parser.add_argument('--dataset', default='dataset.csv')
+    parser.add_argument('-k', type=int, default=3, help="number of shortest paths per pair")
+    parser.add_argument('--max-stops', type=int, default=None)
+    parser.add_argument('--airline', action='append', help="only fly this airline (repeatable)")
+    parser.add_argument('--exclude-airline', action='append', help="never fly this airline (repeatable)")
+    parser.add_argument('--avoid', action='append', help="IATA code of an airport to avoid (repeatable)")
+    parser.add_argument('-j', '--workers', type=int, default=1, help="worker processes, sources are split between them")
+    args = parser.parse_args(argv)
+    if not args.pairs and not args.all_pairs:
+        parser.error("a pairs file or --all-pairs is required")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    constraints = None
+    if args.airline or args.exclude_airline or args.avoid:
+        constraints = RouteConstraints(airlines=args.airline, excluded_airlines=args.exclude_airline, excluded_airports=args.avoid)
+    planner = BatchPlanner(args.dataset, args.k, args.max_stops, constraints)
+    count = planner.run(None if args.all_pairs else args.pairs, args.output, args.format, args.workers)
+    print(f"{count} routes written to {args.output}", file=sys.stderr)
+    if planner.report:
+        print(json.dumps(planner.report), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
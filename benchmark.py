@@ -0,0 +1,237 @@
+import argparse
+import csv
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import string
+import subprocess
+import time
+
+import numpy as np
+
+from astar import Astar
+from bfs import BFS
+from geodesy import haversine_array
+from graph import Graph
+from routestore import RouteStore, get_route_store
+
+# Same column layout as dataset.csv: 0-6 source airport, 10 airline, 11-17 destination airport,
+# 20 distance in km and 24 cost; the other columns are not used by the app and are left empty
+HEADER = ['source_iata', 'source_id', 'source_airport', 'source_city', 'source_country', 'source_latitude', 'source_longitude',
+          'column_7', 'column_8', 'column_9', 'airline', 'destination_iata', 'destination_id', 'destination_airport',
+          'destination_city', 'destination_country', 'destination_latitude', 'destination_longitude', 'column_18',
+          'column_19', 'distance', 'column_21', 'column_22', 'column_23', 'cost']
+AIRLINES = ['SQ', 'MH', 'TR', 'QF', 'BA', 'CX', 'NH', 'JL', 'KE', 'TG', 'GA', 'PR', 'VN', 'AK', 'EK', 'QR', 'LH', 'AF', 'UA', 'DL']
+
+
+# Function to get the i-th synthetic IATA code: AAA..ZZZ, then four letters once those run out
+def iata_code(i):
+    letters = 3 if i < 26 ** 3 else 4
+    if letters == 4:
+        i -= 26 ** 3
+    code = []
+    for _ in range(letters):
+        i, letter = divmod(i, 26)
+        code.append(string.ascii_uppercase[letter])
+    return ''.join(reversed(code))
+
+
+# Function to write a synthetic hub-and-spoke route table with the dataset.csv column layout
+# One airport in hub_every is a hub flying to other hubs; every other airport flies both ways to its nearest
+# hubs plus one random airport, so the network looks like a real one rather than a random graph
+def generate_dataset(path, airports, seed=0, hub_every=20, hubs_per_airport=2, countries=150):
+    rng = np.random.default_rng(seed)
+    latitudes = np.degrees(np.arcsin(rng.uniform(-0.85, 0.95, airports)))  # Uniform over the sphere, fewer near the poles
+    longitudes = rng.uniform(-180, 180, airports)
+    codes = [iata_code(i) for i in range(airports)]
+    hubs = np.arange(0, airports, hub_every)
+
+    routes = set()
+    # Nearest hubs by great-circle distance, in chunks so the distance matrix stays small
+    for start in range(0, airports, 2048):
+        chunk = np.arange(start, min(start + 2048, airports))
+        km = haversine_array(latitudes[chunk, None], longitudes[chunk, None], latitudes[hubs], longitudes[hubs])
+        km[chunk[:, None] == hubs] = np.inf  # A hub is not its own nearest hub
+        count = min(hubs_per_airport, len(hubs))
+        nearest = np.argpartition(km, count - 1, axis=1)[:, :count]
+        for airport, nearby in zip(chunk.tolist(), hubs[nearest].tolist()):
+            for hub in nearby:
+                if hub != airport:
+                    routes.add((airport, hub))
+                    routes.add((hub, airport))
+    for airport in range(airports):
+        routes.add((airport, int(rng.integers(airports))))
+    for hub in hubs.tolist():
+        for other in rng.choice(hubs, min(8, len(hubs)), replace=False).tolist():
+            routes.add((hub, other))
+    routes = sorted((source, destination) for source, destination in routes if source != destination)
+
+    sources = np.array([source for source, _ in routes])
+    destinations = np.array([destination for _, destination in routes])
+    km = haversine_array(latitudes[sources], longitudes[sources], latitudes[destinations], longitudes[destinations])
+    km *= rng.uniform(1.0, 1.05, len(routes))  # Flights are a little longer than the great circle
+
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(HEADER)
+        for source, destination, distance in zip(sources.tolist(), destinations.tolist(), km.tolist()):
+            for airline in rng.choice(AIRLINES, int(rng.integers(1, 3)), replace=False).tolist():
+                row = [''] * len(HEADER)
+                for offset, airport in ((0, source), (11, destination)):
+                    row[offset] = codes[airport]
+                    row[offset + 1] = airport
+                    row[offset + 2] = f"{codes[airport]} International Airport"
+                    row[offset + 3] = f"City {airport // 3}"
+                    row[offset + 4] = f"Country {airport // 3 % countries}"
+                    row[offset + 5] = round(float(latitudes[airport]), 4)
+                    row[offset + 6] = round(float(longitudes[airport]), 4)
+                row[10] = airline
+                row[20] = round(distance, 2)
+                row[24] = round(distance * float(rng.uniform(0.08, 0.2)) + 40, 2)
+                writer.writerow(row)
+    return len(routes)
+
+
+class Benchmark:
+    """
+    Times the loading, search and lookup paths of the app on a dataset.
+
+    Every stage is run several times and summarised as mean, median and 95th
+    percentile milliseconds, so runs on different commits can be compared
+    from the JSONL history file.
+    """
+
+    def __init__(self, dataset, queries=50, bfs_queries=10, seed=0):
+        self.dataset = dataset
+        self.queries = queries
+        self.bfs_queries = bfs_queries
+        self.seed = seed
+        self.timings = {}
+
+    # Function to time func over each of the argument tuples, keeping the per-call milliseconds under name
+    def measure(self, name, func, calls):
+        samples = []
+        for arguments in calls:
+            started = time.perf_counter()
+            func(*arguments)
+            samples.append(1000 * (time.perf_counter() - started))
+        self.timings[name] = {
+            'runs': len(samples),
+            'mean_ms': round(statistics.fmean(samples), 3),
+            'median_ms': round(statistics.median(samples), 3),
+            'p95_ms': round(sorted(samples)[math.ceil(0.95 * (len(samples) - 1))], 3),
+        }
+
+    def run(self):
+        self.measure('load_csv', RouteStore, [(self.dataset,)] * 3)
+        store = get_route_store(self.dataset)
+        graph = Graph()
+        graph.dataset = self.dataset
+
+        # Build stages start from an empty cache on every run
+        def construct_adjacency(column):
+            graph._adjacency = {}
+            graph.construct_adjacency(0, 11, column)
+
+        def compact_graph():
+            store._compact = None
+            store.compact_graph()
+
+        self.measure('construct_adjacency', construct_adjacency, [(24,), (20,)])
+        self.measure('compact_graph', compact_graph, [()] * 3)
+
+        compact = store.compact_graph()
+        generator = random.Random(self.seed)
+        pairs = [tuple(generator.sample(compact.codes, 2)) for _ in range(self.queries)]
+        cost_adjacency = graph.construct_adjacency(0, 11, 24)
+        a_star = Astar()
+        self.measure('run_a_star_dict', a_star.run_a_star, [(cost_adjacency, source, destination) for source, destination in pairs])
+        self.measure('run_a_star', a_star.run_a_star, [(compact.weighted(24), source, destination) for source, destination in pairs])
+        self.measure('run_a_star_bidirectional', lambda *arguments: a_star.run_a_star(*arguments, bidirectional=True),
+                     [(compact.weighted(24), source, destination) for source, destination in pairs])
+        self.measure('run_bfs', BFS().run_bfs, [(compact.weighted(20), source, destination, 3) for source, destination in pairs[:self.bfs_queries]])
+
+        names = [store.airport_name(code) for code in compact.codes[:1000]]
+        self.measure('airport_name', lambda codes: [store.airport_name(code) for code in codes], [(compact.codes[:1000],)] * 5)
+        self.measure('iata_code', lambda names: [store.iata_code(name) for name in names], [(names,)] * 5)
+        self.measure('get_airlines', lambda pairs: [store.get_airlines(source, destination) for source, destination in pairs], [(pairs,)] * 5)
+
+        return {
+            'airports': len(compact),
+            'routes': compact.edge_count,
+            'rows': len(store.rows),
+            'timings': self.timings,
+        }
+
+
+# Function to get the short hash of the checked out commit, None outside a git repository
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Function to get the last recorded result with the same airports, seed and queries, None if there is none
+def previous_result(history, airports, seed, queries):
+    if not os.path.exists(history):
+        return None
+    previous = None
+    with open(history, 'r', encoding='utf-8') as file:
+        for line in file:
+            result = json.loads(line)
+            if (result['size'], result['seed'], result['queries']) == (airports, seed, queries):
+                previous = result
+    return previous
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark loading and route searches on synthetic route networks.")
+    parser.add_argument('--airports', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--queries', type=int, default=50, help="random airport pairs per search benchmark")
+    parser.add_argument('--bfs-queries', type=int, default=10, help="pairs for the k shortest paths benchmark")
+    parser.add_argument('--workdir', default='benchmarks', help="directory for the generated datasets")
+    parser.add_argument('--history', default='benchmarks/history.jsonl', help="JSONL file results are appended to")
+    parser.add_argument('--threshold', type=float, default=1.2, help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    for airports in args.airports:
+        dataset = os.path.join(args.workdir, f'synthetic_{airports}_{args.seed}.csv')
+        if not os.path.exists(dataset):
+            started = time.perf_counter()
+            routes = generate_dataset(dataset, airports, args.seed)
+            print(f"Generated {dataset}: {routes} routes in {time.perf_counter() - started:.1f}s")
+
+        result = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'size': airports,
+            'seed': args.seed,
+            'queries': args.queries,
+        }
+        result.update(Benchmark(dataset, args.queries, args.bfs_queries, args.seed).run())
+        previous = previous_result(args.history, airports, args.seed, args.queries)
+        os.makedirs(os.path.dirname(args.history) or '.', exist_ok=True)
+        with open(args.history, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(result) + '\n')
+
+        print(f"{airports} airports, {result['routes']} routes ({result['rows']} rows)")
+        for stage, timing in result['timings'].items():
+            line = f"  {stage:<26} {timing['median_ms']:>10.3f} ms median  {timing['p95_ms']:>10.3f} ms p95"
+            before = previous['timings'].get(stage) if previous else None
+            if before and before['median_ms'] > 0:
+                ratio = timing['median_ms'] / before['median_ms']
+                line += f"  {ratio:.2f}x vs {previous['commit'] or previous['timestamp']}"
+                if ratio > args.threshold:
+                    line += "  REGRESSION"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,171 @@
-from collections import deque
+import heapq
+from itertools import count, islice
+
+from csrgraph import CSRView
+
+VIRTUAL_SOURCE = ('virtual source',)  # endpoints of the virtual flights used by set searches on dict graphs
+VIRTUAL_SINK = ('virtual sink',)
 
 class BFS:
-    def run_bfs(self,graph, source, destination, num_paths):
-        shortest_paths = []  # List to store the shortest paths
-        visited = set()  # Set to track visited nodes
-        
+    def run_bfs(self,graph, source, destination, num_paths, max_stops=None):
+        """
+        Find the k shortest loopless paths between two airports (Yen's algorithm).
+
+        Args:
+        - graph: Weighted adjacency list of the flight network, or a CSRView.
+        - source: Starting airport code, or a set of codes.
+        - destination: Destination airport code, or a set of codes.
+        - num_paths: Number of paths to return.
+        - max_stops: Optional limit on intermediate airports per path.
+
+        Returns:
+        - List of paths (lists of airport codes) in ascending order of total weight.
+        """
+        return [path for path, _ in islice(self.iter_shortest_paths(graph, source, destination, max_stops), num_paths)]
+
+    # Generator of (path, weight) from the shortest path upwards, so callers can stop at any k
+    # first is an already known (shortest path, weight), e.g. from a shared single-source search
+    def iter_shortest_paths(self, graph, source, destination, max_stops=None, first=None):
+        if not isinstance(source, str) or not isinstance(destination, str):
+            yield from self.iter_paths_between_sets(graph, source, destination, max_stops)
+            return
         if source not in graph or destination not in graph:
-            return shortest_paths
-        
-        queue = deque([(source, [source])])  # (node, path)
-        
-        while queue and len(shortest_paths) < num_paths:
-            current_node, current_path = queue.popleft()  # Dequeue the node and its path
-            
-            if current_node == destination:
-                shortest_paths.append(current_path)
+            return
+
+        # A CSRView is searched on integer ids and the paths are converted back to codes
+        if isinstance(graph, CSRView):
+            if first is not None:
+                first = (graph.to_ids(first[0]), first[1])
+            for path, weight in self.yen(graph.edges, graph.index[source], graph.index[destination], max_stops, first):
+                yield graph.to_codes(path), weight
+            return
+
+        yield from self.yen(lambda node: graph.get(node, {}).items(), source, destination, max_stops, first)
+
+    # Same as iter_shortest_paths for sets of airports, joined to a virtual source and a virtual sink
+    # so a single k-shortest search covers every source/destination pair
+    def iter_paths_between_sets(self, graph, sources, destinations, max_stops=None):
+        sources = [sources] if isinstance(sources, str) else sources
+        destinations = [destinations] if isinstance(destinations, str) else destinations
+        if isinstance(graph, CSRView):
+            neighbours = graph.edges
+            sources = {graph.index[code] for code in sources if code in graph}
+            destinations = {graph.index[code] for code in destinations if code in graph}
+            convert = graph.to_codes
+            start, sink = -1, -2
+        else:
+            neighbours = lambda node: graph.get(node, {}).items()
+            sources = {code for code in sources if code in graph}
+            destinations = set(destinations)
+            convert = list
+            start, sink = VIRTUAL_SOURCE, VIRTUAL_SINK
+        if not sources or not destinations:
+            return
+
+        def edges(node):
+            if node == start:
+                return [(source, 0.0) for source in sources]
+            if node in destinations:
+                return [(sink, 0.0)]  # A path ends at the first destination airport it reaches
+            return [(neighbor, weight) for neighbor, weight in neighbours(node) if neighbor not in sources]
+
+        # The two virtual flights do not count as stops
+        for path, weight in self.yen(edges, start, sink, None if max_stops is None else max_stops + 2):
+            yield convert(path[1:-1]), weight
+
+    def yen(self, edges, source, destination, max_stops=None, first=None):
+        max_edges = None if max_stops is None else max_stops + 1
+        if first is not None:
+            path, weight = tuple(first[0]), first[1]
+        else:
+            path, weight = self.shortest_path(edges, source, destination, set(), set(), max_edges)
+        if path is None:
+            return
+
+        accepted = []  # (path, prefix weights) of every path returned so far
+        candidates = []  # heap of (weight, tie breaker, path)
+        seen = {path}
+        tie = count()
+        while True:
+            prefix = [0.0]
+            for i in range(len(path) - 1):
+                prefix.append(prefix[-1] + self.edge_weight(edges, path[i], path[i + 1]))
+            accepted.append((path, prefix))
+            yield list(path), weight
+
+            # Every node of the last path except the destination is a spur node
+            for i in range(len(path) - 1):
+                root = path[:i + 1]
+                removed = set()
+                for other, _ in accepted:
+                    if len(other) > i + 1 and other[:i + 1] == root:
+                        removed.add((other[i], other[i + 1]))
+                spur_limit = None if max_edges is None else max_edges - i
+                spur, spur_weight = self.shortest_path(edges, path[i], destination, set(root[:-1]), removed, spur_limit)
+                if spur is None:
+                    continue
+                candidate = root[:-1] + spur
+                if candidate not in seen:
+                    seen.add(candidate)
+                    heapq.heappush(candidates, (prefix[i] + spur_weight, next(tie), candidate))
+
+            if not candidates:
+                return
+            weight, _, path = heapq.heappop(candidates)
+
+    # Dijkstra from source avoiding some nodes and edges, optionally limited to max_edges flights
+    def shortest_path(self, edges, source, destination, blocked_nodes, blocked_edges, max_edges=None):
+        costs = {(source, 0): 0.0}
+        parents = {}  # (node, hops) -> (parent node, parent hops), shared by every path through it
+        settled_hops = {}  # node -> fewest hops it was settled with; later, costlier labels are dominated
+        open_set = [(0.0, 0, 0, source)]
+        tie = count(1)
+
+        while open_set:
+            current_cost, hops, _, node = heapq.heappop(open_set)
+            if current_cost > costs[(node, hops)]:
+                continue
+            if node in settled_hops and settled_hops[node] <= hops:
                 continue
-            
-            visited.add(current_node)  # Mark the current node as visited
-            
-            for neighbor in graph[current_node]:
-                if neighbor not in visited:  # Avoid revisiting visited nodes
-                    queue.append((neighbor, current_path + [neighbor]))
-        
-        return shortest_paths
+            settled_hops[node] = hops
+
+            if node == destination:
+                path = [node]
+                state = (node, hops)
+                while state in parents:
+                    state = parents[state]
+                    path.append(state[0])
+                path.reverse()
+                return tuple(path), current_cost
+
+            if max_edges is not None and hops >= max_edges:
+                continue
+            next_hops = hops + 1 if max_edges is not None else 0
+            for neighbor, weight in edges(node):
+                if neighbor in blocked_nodes or (node, neighbor) in blocked_edges:
+                    continue
+                if neighbor in settled_hops and settled_hops[neighbor] <= next_hops:
+                    continue
+                tentative_cost = current_cost + weight
+                state = (neighbor, next_hops)
+                if tentative_cost < costs.get(state, float('inf')):
+                    costs[state] = tentative_cost
+                    parents[state] = (node, hops)
+                    heapq.heappush(open_set, (tentative_cost, next_hops, next(tie), neighbor))
+
+        return None, float('inf')
+
+    def edge_weight(self, edges, source, destination):
+        for neighbor, weight in edges(source):
+            if neighbor == destination:
+                return weight
+        return float('inf')
     
     #Function to calculate the distance of the path for BFS
     def calculate_path_distance(self,graph,path):
+        if isinstance(graph, CSRView):
+            return sum(graph.weight(path[i], path[i + 1]) for i in range(len(path) - 1))
+
         total_distance = 0
         for i in range(len(path) - 1):
             source = path[i]
@@ -0,0 +1,73 @@
+import numpy as np
+
+
+class RouteConstraints:
+    """
+    Filters a route search must respect: a limit on stops, airlines to use
+    (column 10) or to avoid, and airports to avoid.
+
+    The airline and airport filters become one bool per edge of the compact
+    graph, built from the precomputed edge ids of each airline, so the search
+    itself runs unchanged on the filtered graph instead of post-filtering paths.
+    A route flown by several airlines stays usable while any allowed one flies it,
+    weighted by the lowest fare and distance among the allowed ones.
+    """
+
+    def __init__(self, max_stops=None, airlines=None, excluded_airlines=None, excluded_airports=None):
+        self.max_stops = max_stops
+        self.airlines = frozenset(airlines) if airlines else None  # None allows every airline
+        self.excluded_airlines = frozenset(excluded_airlines or ())
+        self.excluded_airports = frozenset(excluded_airports or ())
+
+    # Hashable form used in query cache keys
+    def key(self):
+        airlines = tuple(sorted(self.airlines)) if self.airlines is not None else None
+        return (self.max_stops, airlines, tuple(sorted(self.excluded_airlines)), tuple(sorted(self.excluded_airports)))
+
+    # True when the constraints remove edges from the graph, max_stops is handled by the search
+    def filters_edges(self):
+        return self.airlines is not None or bool(self.excluded_airlines) or bool(self.excluded_airports)
+
+    # True when only some airlines may be flown, the edge weights then depend on which
+    def filters_airlines(self):
+        return self.airlines is not None or bool(self.excluded_airlines)
+
+    # Function to get the weights of every edge of a CSRGraph using only the allowed airlines, {column: array}
+    # Each edge takes the lowest weight of an allowed airline flying it, inf where none does
+    def edge_weights(self, graph, airline_edges, airline_weights):
+        allowed = set(airline_edges) if self.airlines is None else set(self.airlines)
+        weights = {column: np.full(graph.edge_count, np.inf) for column in graph.weights}
+        for airline in allowed - self.excluded_airlines:
+            if airline not in airline_edges:
+                continue
+            ids = airline_edges[airline]
+            for column, values in weights.items():
+                values[ids] = np.minimum(values[ids], airline_weights[airline][column])
+        return weights
+
+    # Function to get the bool mask of the edges of a CSRGraph that may be used
+    # airline_edges maps airline -> edge ids it flies, served counts the airlines flying each edge
+    def edge_mask(self, graph, airline_edges, served):
+        if self.airlines is not None:
+            mask = np.zeros(graph.edge_count, dtype=bool)
+            for airline in self.airlines - self.excluded_airlines:
+                if airline in airline_edges:
+                    mask[airline_edges[airline]] = True
+        else:
+            remaining = served.copy()
+            for airline in self.excluded_airlines:
+                if airline in airline_edges:
+                    remaining[airline_edges[airline]] -= 1
+            mask = remaining > 0
+
+        if self.excluded_airports:
+            avoided = np.zeros(len(graph), dtype=bool)
+            avoided[[graph.index[code] for code in self.excluded_airports if code in graph.index]] = True
+            mask &= ~avoided[graph.geometry().sources]
+            mask &= ~avoided[np.asarray(graph.targets, dtype=np.int64)]
+        return mask
+
+    # The tighter of this stop limit and another one, None meaning no limit
+    def stop_limit(self, max_stops=None):
+        limits = [limit for limit in (self.max_stops, max_stops) if limit is not None]
+        return min(limits) if limits else None
@@ -0,0 +1,219 @@
+import math
+from array import array
+
+import numpy as np
+
+from geodesy import AirportGeometry
+
+
+class CSRGraph:
+    """
+    Compact flight network with airport codes interned to integer ids.
+
+    Edges are stored in compressed sparse row form: the edges leaving node u are
+    targets[offsets[u]:offsets[u + 1]], and every weight column has a parallel
+    float array (e.g. weights[20] = distance, weights[24] = cost). Node
+    coordinates are kept in latitudes/longitudes, NaN when unknown.
+    """
+
+    def __init__(self, codes, offsets, targets, weights, latitudes=None, longitudes=None):
+        self.codes = codes  # node id -> IATA code
+        self.index = {code: node for node, code in enumerate(codes)}  # IATA code -> node id
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.latitudes = latitudes if latitudes is not None else array('d', [math.nan]) * len(codes)
+        self.longitudes = longitudes if longitudes is not None else array('d', [math.nan]) * len(codes)
+        self._views = {}
+        self._geometry = None
+        self._reverse = None
+
+    #build the graph from dataset rows, a repeated route keeps its last value like construct_adjacency
+    @classmethod
+    def from_rows(cls, rows, column1=0, column2=11, weight_columns=(20, 24), coordinates=None):
+        index = {}
+        codes = []
+        edges = {}  # (source id, destination id) -> row
+        for row in rows:
+            ends = []
+            for code in (row[column1], row[column2]):
+                node = index.get(code)
+                if node is None:
+                    node = len(codes)
+                    index[code] = node
+                    codes.append(code)
+                ends.append(node)
+            edges[(ends[0], ends[1])] = row
+
+        # Count the out-degree of every node, then turn the counts into row offsets
+        offsets = array('i', bytes(4 * (len(codes) + 1)))
+        for source, _ in edges:
+            offsets[source + 1] += 1
+        for node in range(len(codes)):
+            offsets[node + 1] += offsets[node]
+
+        targets = array('i', bytes(4 * len(edges)))
+        weights = {column: array('d', bytes(8 * len(edges))) for column in weight_columns}
+        fill = array('i', offsets[:-1])
+        for (source, destination), row in edges.items():
+            position = fill[source]
+            fill[source] += 1
+            targets[position] = destination
+            for column, values in weights.items():
+                values[position] = float(row[column])
+
+        latitudes = array('d', [math.nan]) * len(codes)
+        longitudes = array('d', [math.nan]) * len(codes)
+        for code, (latitude, longitude) in (coordinates or {}).items():
+            node = index.get(code)
+            if node is not None:
+                latitudes[node] = latitude
+                longitudes[node] = longitude
+
+        return cls(codes, offsets, targets, weights, latitudes, longitudes)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return code in self.index
+
+    @property
+    def edge_count(self):
+        return len(self.targets)
+
+    # Function to get the vectorised coordinate helper of this graph, built on first use
+    def geometry(self):
+        if self._geometry is None:
+            self._geometry = AirportGeometry(self)
+        return self._geometry
+
+    # Function to get the graph with every flight reversed, built once and shared by the views of both
+    def reverse(self):
+        if self._reverse is None:
+            sources = self.geometry().sources
+            targets = np.asarray(self.targets, dtype=np.int64)
+            order = np.argsort(targets, kind='stable')
+            offsets = np.zeros(len(self.codes) + 1, dtype=np.int32)
+            np.cumsum(np.bincount(targets, minlength=len(self.codes)), out=offsets[1:])
+            weights = {column: array('d', np.asarray(values, dtype=np.float64)[order].tobytes()) for column, values in self.weights.items()}
+            self._reverse = CSRGraph(self.codes, array('i', offsets.tobytes()), array('i', sources[order].astype(np.int32).tobytes()),
+                                     weights, self.latitudes, self.longitudes)
+            self._reverse._reverse = self
+        return self._reverse
+
+    # Function to get a copy of the graph keeping only the edges where mask (one bool per edge, CSR order) is set
+    # Node ids, codes and coordinates are unchanged, so ids and heuristics carry over
+    # weights optionally replaces the edge weights, {column: one value per edge of this graph}
+    def subgraph(self, mask, weights=None):
+        mask = np.asarray(mask, dtype=bool)
+        sources = self.geometry().sources[mask]
+        offsets = np.zeros(len(self.codes) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(sources, minlength=len(self.codes)), out=offsets[1:])
+        targets = np.asarray(self.targets, dtype=np.int32)[mask]
+        weights = {column: array('d', np.asarray(values, dtype=np.float64)[mask].tobytes()) for column, values in (weights or self.weights).items()}
+        return CSRGraph(self.codes, array('i', offsets.tobytes()), array('i', targets.tobytes()), weights, self.latitudes, self.longitudes)
+
+    # Function to get a copy of the graph with some flights added, removed or reweighted
+    # changes maps (source code, destination code) -> {column: weight}, or None to remove the flight
+    # Only the changed flights are looked at one by one, the arrays are rebuilt with NumPy
+    def patched(self, changes, coordinates=None):
+        codes = list(self.codes)
+        index = dict(self.index)
+        for source, destination in changes:
+            for code in (source, destination):
+                if code not in index:
+                    index[code] = len(codes)
+                    codes.append(code)
+
+        keep = np.ones(self.edge_count, dtype=bool)
+        weights = {column: np.array(values, dtype=np.float64) for column, values in self.weights.items()}
+        added = []
+        for (source, destination), new in changes.items():
+            position = None
+            if source in self.index and destination in self.index:
+                node, target = self.index[source], self.index[destination]
+                for candidate in range(self.offsets[node], self.offsets[node + 1]):
+                    if self.targets[candidate] == target:
+                        position = candidate
+                        break
+            if position is None:
+                if new is not None:
+                    added.append((index[source], index[destination], new))
+            elif new is None:
+                keep[position] = False
+            else:
+                for column, values in weights.items():
+                    values[position] = new[column]
+
+        sources = np.concatenate([self.geometry().sources[keep], np.array([edge[0] for edge in added], dtype=np.int64)])
+        targets = np.concatenate([np.asarray(self.targets, dtype=np.int64)[keep], np.array([edge[1] for edge in added], dtype=np.int64)])
+        order = np.argsort(sources, kind='stable')
+        offsets = np.zeros(len(codes) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(sources, minlength=len(codes)), out=offsets[1:])
+        weights = {column: array('d', np.concatenate([values[keep], np.array([edge[2][column] for edge in added], dtype=np.float64)])[order].tobytes())
+                   for column, values in weights.items()}
+
+        latitudes = array('d', self.latitudes) + array('d', [math.nan]) * (len(codes) - len(self.codes))
+        longitudes = array('d', self.longitudes) + array('d', [math.nan]) * (len(codes) - len(self.codes))
+        for node in range(len(self.codes), len(codes)):
+            if codes[node] in (coordinates or {}):
+                latitudes[node], longitudes[node] = coordinates[codes[node]]
+        return CSRGraph(codes, array('i', offsets.tobytes()), array('i', targets[order].astype(np.int32).tobytes()), weights, latitudes, longitudes)
+
+    # Function to get a view of the graph weighted by one dataset column
+    def weighted(self, column):
+        view = self._views.get(column)
+        if view is None:
+            view = CSRView(self, column)
+            self._views[column] = view
+        return view
+
+
+class CSRView:
+    #the graph seen through a single weight column, this is what the search algorithms run on
+    def __init__(self, graph, column):
+        self.graph = graph
+        self.column = column
+        self.codes = graph.codes
+        self.index = graph.index
+        self.offsets = graph.offsets
+        self.targets = graph.targets
+        self.weights = graph.weights[column]
+        self._scale = None
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return code in self.index
+
+    # Function to get (neighbour id, weight) pairs of a node id
+    def edges(self, node):
+        start, end = self.offsets[node], self.offsets[node + 1]
+        return zip(self.targets[start:end], self.weights[start:end])
+
+    # Function to get the weight of the edge between two airport codes, None if there is no such flight
+    def weight(self, source, destination):
+        node = self.index[source]
+        target = self.index[destination]
+        for position in range(self.offsets[node], self.offsets[node + 1]):
+            if self.targets[position] == target:
+                return self.weights[position]
+        return None
+
+    # Function to get the same view of the graph with every flight reversed
+    def reverse(self):
+        return self.graph.reverse().weighted(self.column)
+
+    def to_ids(self, path):
+        return [self.index[code] for code in path]
+
+    def to_codes(self, path):
+        return [self.codes[node] for node in path]
+
+    # Largest k with weight >= k * great-circle km on every edge, so k * km to goal never overestimates
+    def heuristic_scale(self):
+        if self._scale is None:
+            self._scale = self.graph.geometry().weight_per_km(self.column)
+        return self._scale
@@ -0,0 +1,115 @@
+import heapq
+
+from geodesy import haversine
+
+
+class DeltaCheck:
+    """
+    Decides which cached route results a delta (RouteStore.apply_delta) may have changed.
+
+    A result is stale when one of its paths uses a changed flight. A flight that
+    was added or got cheaper can only matter if a path through it could beat the
+    result: weight to its source + its new weight + weight from its destination.
+    That lower bound is first taken from great-circle distances, and only when
+    that is not enough from exact distances on the updated graph, found with one
+    resumable search per changed airport that stops at the totals it is asked about.
+    Results searched with an airline filter are weighted by the allowed airlines' own
+    rows, which the compact graph weights do not describe, so any change drops them.
+    """
+
+    def __init__(self, graph, changes, coordinates):
+        self.graph = graph
+        self.changes = changes
+        self.coordinates = coordinates
+        self.moved = {edge for edge, (old, new) in changes.items() if new != old}  # compact graph weights changed
+        self.scales = {column: graph.weighted(column).heuristic_scale() for column in graph.weights}
+        self.improved = {edge: new for edge, (old, new) in changes.items()
+                         if new is not None and (old is None or any(new[column] < old[column] for column in new))}
+        self._searches = {}  # (airport, forward, metric) -> (view, settled, tentative weights, open set)
+
+    # Function to check whether a cached result of RoutePlanner may have changed
+    def affects(self, key, value):
+        kind, source, destination, metric = key[:4]
+        constraints = key[-1]  # RoutePlanner.constraint_key: a stop limit alone, or a tuple with the filters
+        if self.changes and isinstance(constraints, tuple) and (constraints[1] is not None or constraints[2]):
+            return True
+        sources = {source} if isinstance(source, str) else source
+        destinations = {destination} if isinstance(destination, str) else destination
+        if kind == 'pareto':
+            routes = [(path, {24: cost, 20: distance}, legs) for path, cost, distance, legs in value]
+            metrics, wanted = (24, 20), None  # Pareto frontier, compared by dominance
+        elif kind == 'cheapest':
+            routes = [(value[0], {metric: value[1]}, None)] if value[0] is not None else []
+            metrics, wanted = (metric,), 1
+        else:
+            routes = [(path, {metric: total}, None) for path, total in value]
+            metrics, wanted = (metric,), key[4]
+
+        used = {(path[i], path[i + 1]) for path, _, _ in routes for i in range(len(path) - 1)}
+        if any(edge in used for edge in self.moved):
+            return True
+
+        for (start, end), new in self.improved.items():
+            if wanted is None:
+                legs = (start not in sources) + 1 + (end not in destinations)
+                if not any(self.beaten(routes[index][1], sources, start, end, destinations, new, metrics)
+                           and routes[index][2] <= legs for index in range(len(routes))):
+                    return True
+            elif len(routes) < wanted:
+                return True
+            elif not self.beaten(routes[-1][1], sources, start, end, destinations, new, metrics):
+                return True
+        return False
+
+    # True when totals are no worse on every metric than any path through the flight start -> end can be
+    def beaten(self, totals, sources, start, end, destinations, new, metrics):
+        for exact in (False, True):
+            if all(totals[column] <= self.bound(sources, start, column, exact, limit=totals[column])
+                   + new[column] + self.bound({end}, destinations, column, exact, True, totals[column]) for column in metrics):
+                return True
+        return False
+
+    # Lower bound on the weight from any of the airports to target, or from target to any of them when forward
+    # The exact bound only searches as far as limit, the total the bound is compared against
+    def bound(self, airports, target, column, exact=False, forward=False, limit=0.0):
+        if isinstance(target, str):
+            target = {target}
+        if not exact:
+            best = float('inf')
+            for airport in airports:
+                for other in target:
+                    if airport == other or airport not in self.coordinates or other not in self.coordinates:
+                        return 0.0
+                    best = min(best, self.scales[column] * haversine(*self.coordinates[airport], *self.coordinates[other]))
+            return best if best != float('inf') else 0.0
+
+        # Exact distances from the changed airport, searched once and shared by every cached result
+        (changed,) = target if not forward else airports
+        others = airports if not forward else target
+        return min((self.distance(changed, other, column, forward, limit) for other in others), default=0.0)
+
+    # Function to get the weight between the changed airport and another one on the updated graph,
+    # forward from it or backward to it. The search is resumed across calls and only runs until limit:
+    # past that the smallest open weight is returned, which is still a lower bound
+    def distance(self, changed, other, column, forward, limit):
+        key = (changed, forward, column)
+        if key not in self._searches:
+            view = self.graph.weighted(column) if forward else self.graph.reverse().weighted(column)
+            start = view.index.get(changed)
+            self._searches[key] = (view, {}, {start: 0.0}, [(0.0, start)] if start is not None else [])
+        view, settled, costs, open_set = self._searches[key]
+        node = view.index.get(other)
+        if node is None:
+            return float('inf')
+        while node not in settled and open_set and open_set[0][0] <= limit:
+            cost, current = heapq.heappop(open_set)
+            if current in settled:
+                continue
+            settled[current] = cost
+            for neighbor, weight in view.edges(current):
+                if neighbor not in settled and cost + weight < costs.get(neighbor, float('inf')):
+                    costs[neighbor] = cost + weight
+                    heapq.heappush(open_set, (cost + weight, neighbor))
+        if node in settled:
+            return settled[node]
+        return open_set[0][0] if open_set else float('inf')
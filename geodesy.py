@@ -0,0 +1,81 @@
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+# Function to get the great-circle distance in km between two points given in degrees
+def haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+# Same as haversine for NumPy arrays (or scalars broadcast against arrays), NaN where a coordinate is NaN
+def haversine_array(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(value, dtype=np.float64)) for value in (lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+
+class AirportGeometry:
+    """
+    Vectorised coordinate maths over every airport of a CSRGraph.
+
+    Latitudes and longitudes are loaded into NumPy arrays once; distances for all
+    routes, distances to one airport and nearest-airport lookups are then single
+    array expressions instead of per-row Python loops.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.codes = graph.codes
+        self.latitudes = np.asarray(graph.latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(graph.longitudes, dtype=np.float64)
+        offsets = np.asarray(graph.offsets, dtype=np.int64)
+        self.sources = np.repeat(np.arange(len(graph.codes)), np.diff(offsets))  # source id of every edge
+        self.targets = np.asarray(graph.targets, dtype=np.int64)
+        self._route_distances = None
+
+    # Function to get the great-circle km of every edge, in CSR order
+    def route_distances(self):
+        if self._route_distances is None:
+            self._route_distances = haversine_array(
+                self.latitudes[self.sources], self.longitudes[self.sources],
+                self.latitudes[self.targets], self.longitudes[self.targets])
+        return self._route_distances
+
+    # Function to get the km from every airport to one airport id
+    def distances_to(self, node):
+        return haversine_array(self.latitudes, self.longitudes, self.latitudes[node], self.longitudes[node])
+
+    # Largest k with weight >= k * great-circle km on every edge of a weight column
+    def weight_per_km(self, column):
+        km = self.route_distances()
+        weights = np.asarray(self.graph.weights[column], dtype=np.float64)
+        usable = km > 1e-6  # NaN compares False, so edges without coordinates are skipped too
+        if not usable.any():
+            return 0.0
+        return max(float(np.min(weights[usable] / km[usable])), 0.0)
+
+    # Function to flag routes whose recorded distance differs from the great-circle distance
+    # Returns (source, destination, recorded km, great-circle km) for each flagged route
+    def distance_mismatches(self, column=20, tolerance=0.1, minimum_km=50.0):
+        km = self.route_distances()
+        recorded = np.asarray(self.graph.weights[column], dtype=np.float64)
+        difference = np.abs(recorded - km)
+        flagged = np.flatnonzero((difference > tolerance * km) & (difference > minimum_km))
+        return [(self.codes[self.sources[edge]], self.codes[self.targets[edge]], float(recorded[edge]), float(km[edge]))
+                for edge in flagged]
+
+    # Function to get the k airports closest to a point as (IATA code, km), nearest first
+    def nearest(self, latitude, longitude, k=1):
+        km = haversine_array(self.latitudes, self.longitudes, latitude, longitude)
+        km = np.where(np.isnan(km), np.inf, km)
+        k = min(k, len(km))
+        if k <= 0:
+            return []
+        closest = np.argpartition(km, k - 1)[:k]
+        closest = closest[np.argsort(km[closest])]
+        return [(self.codes[node], float(km[node])) for node in closest if np.isfinite(km[node])]
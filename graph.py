@@ -1,51 +1,63 @@
-import csv
+from routestore import get_route_store
 
 class Graph:
     def __init__(self):
         self.dataset = 'dataset.csv'
+        self._adjacency = {}
+        self._adjacency_store = None
+
+    # Dataset rows are parsed once and shared by every Graph using the same file
+    @property
+    def store(self):
+        return get_route_store(self.dataset)
 
     #column 1 , column 2 , column 3 = -1 if there is no edge value
     def construct_adjacency(self,column1,column2,column3,directed=False):
-        graph = {}
-        with open(self.dataset, 'r', encoding='utf-8') as file:
-            csv_reader = csv.reader(file)
-            next(csv_reader)  # Skip the header row if present
-            for row in csv_reader:
-                source_airport = row[column1]  # Source airport code
-                destination_airport = row[column2]# Destination airport code
-                if column3 > -1:
-                    edge_value = float(row[column3])  # Distance
+        # Adjacencies built from an older version of the dataset (reloaded or changed by a delta) are dropped
+        version = (self.store, self.store.fingerprint)
+        if self._adjacency_store != version:
+            self._adjacency = {}
+            self._adjacency_store = version
+
+        key = (column1, column2, column3)
+        if key in self._adjacency:
+            return self._adjacency[key]
+
+        # Country -> cities and city -> airports are already indexed by the store
+        if key == (4, 3, -1):
+            return self.store.cities_by_country
+        if key == (3, 2, -1):
+            return self.store.airports_by_city
 
-                    # Add the source airport to the graph if not already present
-                    if source_airport not in graph:
-                        graph[source_airport] = {}
+        graph = {}
+        for row in self.store.rows:
+            source_airport = row[column1]  # Source airport code
+            destination_airport = row[column2]# Destination airport code
+            if column3 > -1:
+                edge_value = float(row[column3])  # Distance
 
-                    # Add the destination airport and distance to the source airport's connections
-                    graph[source_airport][destination_airport] = edge_value
+                # Add the source airport to the graph if not already present
+                if source_airport not in graph:
+                    graph[source_airport] = {}
 
-                else:
-                    # Add the source country to the graph if not already present
-                    if source_airport not in graph:
-                        graph[source_airport] = []
+                # Add the destination airport and distance to the source airport's connections
+                graph[source_airport][destination_airport] = edge_value
 
-                    # Add the destination country to the list of connections for the source country
-                    if destination_airport not in graph[source_airport]:
-                        graph[source_airport].append(destination_airport)
+            else:
+                # Add the source country to the graph if not already present
+                if source_airport not in graph:
+                    graph[source_airport] = []
 
+                # Add the destination country to the list of connections for the source country
+                if destination_airport not in graph[source_airport]:
+                    graph[source_airport].append(destination_airport)
 
+        self._adjacency[key] = graph
         return graph
-    
-    def country_dropdown_list(self,column1):
-        constructed_list = []
-        with open(self.dataset, 'r', encoding='utf-8') as file:
-            csv_reader = csv.reader(file)
-            next(csv_reader)  # Skip the header row if present
-            for row in csv_reader:
-                country = row[column1]  # Source airport code
-
-                if country not in constructed_list:
-                    constructed_list.append(country)
-        return constructed_list
 
+    def country_dropdown_list(self,column1):
+        return self.store.unique_values(column1)
 
-    
\ No newline at end of file
+    # Function to get the integer-indexed CSR graph of airport routes, weighted by distance (20) and cost (24)
+    def compact_graph(self):
+        return self.store.compact_graph()
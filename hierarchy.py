@@ -0,0 +1,323 @@
+import argparse
+import heapq
+import os
+import random
+import time
+
+import numpy as np
+
+from astar import Astar
+from routestore import get_route_store
+
+
+class ContractionHierarchy:
+    """
+    Contraction Hierarchy over one metric of the route graph.
+
+    Airports are contracted one at a time, least important first, adding a
+    shortcut u -> w through v whenever u -> v -> w is the only shortest way
+    between u and w. A query is then a bidirectional Dijkstra that only climbs:
+    forward along up edges (to more important airports) from the source and
+    backward along down edges from the destination, which settles a few hundred
+    airports instead of the whole network. Shortcuts remember the airport they
+    skip, so the full path is rebuilt exactly.
+
+    Every airport is contracted by default. A core_degree stops contraction once
+    the remaining airports average more flights than that each, leaving a core
+    that shares the top rank and keeps all the flights between them; a core of
+    a hundred hubs is searched in full by every query and makes it slower than
+    Astar. The time per query against Astar is measured when the hierarchy is
+    built, and RoutePlanner only uses a hierarchy that was faster.
+    """
+
+    def __init__(self, codes, ranks, up, down, metric=24, fingerprint=None):
+        self.codes = codes
+        self.index = {code: node for node, code in enumerate(codes)}
+        self.ranks = ranks  # contraction order of each node id, higher is more important
+        # up[0..3] = offsets, targets, weights, middles of the edges to more important nodes
+        # down[0..3] = the same for edges coming from more important nodes; middle -1 is a real flight
+        self.up = up
+        self.down = down
+        self.metric = metric
+        self.fingerprint = fingerprint  # dataset version the hierarchy was built from
+        self.timings = None  # (hierarchy ms, Astar ms) per query, measured by verify and saved with the hierarchy
+        self.stats = {}
+
+    # Function to contract the airports of a CSRView, witness searches give up after witness_limit settled airports
+    # core_degree=None contracts every airport
+    @classmethod
+    def build(cls, graph, fingerprint=None, witness_limit=50, core_degree=None):
+        n = len(graph)
+        out = [{} for _ in range(n)]  # node -> {target: (weight, middle)} among nodes not yet contracted
+        into = [{} for _ in range(n)]  # node -> {source: (weight, middle)}
+        for node in range(n):
+            for target, weight in graph.edges(node):
+                if target != node:
+                    out[node][target] = (weight, -1)
+                    into[target][node] = (weight, -1)
+        remaining_edges = sum(len(edges) for edges in out)
+
+        def witness(source, skipped, bound):
+            costs = {source: 0.0}
+            open_set = [(0.0, source)]
+            settled = 0
+            while open_set and settled < witness_limit:
+                cost, node = heapq.heappop(open_set)
+                if cost > bound:
+                    break
+                if cost > costs[node]:
+                    continue
+                settled += 1
+                for target, (weight, _) in out[node].items():
+                    if target == skipped:
+                        continue
+                    tentative_cost = cost + weight
+                    if tentative_cost < costs.get(target, float('inf')):
+                        costs[target] = tentative_cost
+                        heapq.heappush(open_set, (tentative_cost, target))
+            return costs
+
+        # Shortcuts needed to contract node, as (source, target, weight)
+        def shortcuts(node):
+            needed = []
+            for source, (weight_in, _) in into[node].items():
+                bound = max((weight_in + weight_out for target, (weight_out, _) in out[node].items() if target != source), default=None)
+                if bound is None:
+                    continue
+                costs = witness(source, node, bound)
+                for target, (weight_out, _) in out[node].items():
+                    if target != source and costs.get(target, float('inf')) > weight_in + weight_out:
+                        needed.append((source, target, weight_in + weight_out))
+            return needed
+
+        deleted = [0] * n  # contracted neighbours, spreads contraction evenly over the network
+
+        def priority(node):
+            return len(shortcuts(node)) - len(into[node]) - len(out[node]) + deleted[node]
+
+        queue = [(priority(node), node) for node in range(n)]
+        heapq.heapify(queue)
+        ranks = [0] * n
+        up_edges = [None] * n
+        down_edges = [None] * n
+        rank = 0
+        while queue and (core_degree is None or remaining_edges <= core_degree * len(queue)):
+            _, node = heapq.heappop(queue)
+            # Lazy update: the priority may have grown since it was queued
+            current = priority(node)
+            if queue and current > queue[0][0]:
+                heapq.heappush(queue, (current, node))
+                continue
+
+            for source, target, weight in shortcuts(node):
+                existing = out[source].get(target)
+                if existing is None or weight < existing[0]:
+                    remaining_edges += existing is None
+                    out[source][target] = (weight, node)
+                    into[target][source] = (weight, node)
+
+            # Every remaining neighbour ends up more important than node
+            up_edges[node] = [(target, weight, middle) for target, (weight, middle) in out[node].items()]
+            down_edges[node] = [(source, weight, middle) for source, (weight, middle) in into[node].items()]
+            for target in out[node]:
+                del into[target][node]
+                deleted[target] += 1
+            for source in into[node]:
+                del out[source][node]
+                deleted[source] += 1
+            remaining_edges -= len(out[node]) + len(into[node])
+            out[node], into[node] = {}, {}
+            ranks[node] = rank
+            rank += 1
+
+        # The core keeps its flights in both directions under one shared top rank
+        for _, node in queue:
+            up_edges[node] = [(target, weight, middle) for target, (weight, middle) in out[node].items()]
+            down_edges[node] = [(source, weight, middle) for source, (weight, middle) in into[node].items()]
+            ranks[node] = rank
+
+        return cls(list(graph.codes), ranks, cls.pack(up_edges), cls.pack(down_edges), graph.column, fingerprint)
+
+    # Function to turn per-node edge lists into CSR lists (offsets, targets, weights, middles)
+    @staticmethod
+    def pack(edges):
+        offsets, targets, weights, middles = [0], [], [], []
+        for node_edges in edges:
+            for target, weight, middle in node_edges:
+                targets.append(target)
+                weights.append(weight)
+                middles.append(middle)
+            offsets.append(len(targets))
+        return offsets, targets, weights, middles
+
+    @staticmethod
+    def file(directory, metric):
+        return os.path.join(directory, f'hierarchy_{metric}.npz')
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        arrays = {'codes': np.array(self.codes), 'ranks': np.array(self.ranks, dtype=np.int32),
+                  'fingerprint': np.array(self.fingerprint or '')}
+        if self.timings is not None:
+            arrays['timings'] = np.array(self.timings, dtype=np.float64)
+        for name, (offsets, targets, weights, middles) in (('up', self.up), ('down', self.down)):
+            arrays[f'{name}_offsets'] = np.array(offsets, dtype=np.int64)
+            arrays[f'{name}_targets'] = np.array(targets, dtype=np.int32)
+            arrays[f'{name}_weights'] = np.array(weights, dtype=np.float64)
+            arrays[f'{name}_middles'] = np.array(middles, dtype=np.int32)
+        np.savez(self.file(directory, self.metric), **arrays)
+
+    @classmethod
+    def load(cls, directory, metric=24):
+        with np.load(cls.file(directory, metric)) as arrays:
+            up, down = (tuple(arrays[f'{name}_{part}'].tolist() for part in ('offsets', 'targets', 'weights', 'middles'))
+                        for name in ('up', 'down'))
+            hierarchy = cls(arrays['codes'].tolist(), arrays['ranks'].tolist(), up, down, metric, str(arrays['fingerprint']) or None)
+            if 'timings' in arrays:
+                hierarchy.timings = tuple(arrays['timings'].tolist())
+            return hierarchy
+
+    # True when verify measured queries faster than Astar, unknown counts as not faster
+    def faster(self):
+        return self.timings is not None and self.timings[0] < self.timings[1]
+
+    # Function to find the lowest-weight path, returns (path, total) like Astar.run_a_star
+    def query(self, source, destination):
+        if source not in self.index or destination not in self.index:
+            return None, float('inf')
+        start, goal = self.index[source], self.index[destination]
+        if start == goal:
+            return [source], 0.0
+
+        # Index 0 searches forward along up edges, index 1 backward along down edges
+        edges = (self.up, self.down)
+        costs = ({start: 0.0}, {goal: 0.0})
+        parents = ({start: -1}, {goal: -1})  # node -> position of the edge it was reached by
+        previous = ({start: -1}, {goal: -1})
+        open_sets = ([(0.0, start)], [(0.0, goal)])
+        best, meeting = float('inf'), -1
+        settled = 0
+
+        while open_sets[0] or open_sets[1]:
+            # Grow the side with the smaller frontier cost; a side whose frontier reaches best is finished
+            side = 0 if open_sets[0] and (not open_sets[1] or open_sets[0][0][0] <= open_sets[1][0][0]) else 1
+            cost, node = heapq.heappop(open_sets[side])
+            if cost >= best:
+                open_sets[side].clear()
+                continue
+            if cost > costs[side][node]:
+                continue
+            settled += 1
+            other = costs[1 - side].get(node)
+            if other is not None and cost + other < best:
+                best, meeting = cost + other, node
+
+            offsets, targets, weights, _ = edges[side]
+            for position in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[position]
+                tentative_cost = cost + weights[position]
+                if tentative_cost < costs[side].get(neighbor, float('inf')):
+                    costs[side][neighbor] = tentative_cost
+                    parents[side][neighbor] = position
+                    previous[side][neighbor] = node
+                    heapq.heappush(open_sets[side], (tentative_cost, neighbor))
+
+        self.stats = {'settled': settled}
+        if meeting == -1:
+            return None, float('inf')
+
+        # Shortcut edges from start up to the meeting node, then from the meeting node down to goal
+        hops = []
+        node = meeting
+        while previous[0][node] != -1:
+            hops.append((previous[0][node], node, self.up[3][parents[0][node]]))
+            node = previous[0][node]
+        hops.reverse()
+        node = meeting
+        while previous[1][node] != -1:
+            hops.append((node, previous[1][node], self.down[3][parents[1][node]]))
+            node = previous[1][node]
+
+        path = [start]
+        for source_node, target_node, middle in hops:
+            self.unpack(source_node, target_node, middle, path)
+        return [self.codes[node] for node in path], best
+
+    # Function to append the real airports of the edge source -> target (target included) to path
+    def unpack(self, source, target, middle, path):
+        stack = [(source, target, middle)]
+        while stack:
+            source, target, middle = stack.pop()
+            if middle == -1:
+                path.append(target)
+                continue
+            # middle was contracted before both ends: source -> middle is a down edge of middle,
+            # middle -> target an up edge of middle
+            stack.append((middle, target, self.middle_of(self.up, middle, target)))
+            stack.append((source, middle, self.middle_of(self.down, middle, source)))
+
+    @staticmethod
+    def middle_of(edges, node, neighbor):
+        offsets, targets, _, middles = edges
+        for position in range(offsets[node], offsets[node + 1]):
+            if targets[position] == neighbor:
+                return middles[position]
+        raise KeyError((node, neighbor))
+
+    # Function to compare the hierarchy with Astar on random airport pairs (or the given ones)
+    # Returns a report with the number of cost mismatches and the time taken by each, also kept as timings
+    def verify(self, graph, pairs=None, samples=200, seed=0):
+        if pairs is None:
+            generator = random.Random(seed)
+            pairs = [tuple(generator.sample(self.codes, 2)) for _ in range(samples)]
+        a_star = Astar()
+        mismatches = []
+        hierarchy_seconds = a_star_seconds = 0.0
+        for source, destination in pairs:
+            started = time.perf_counter()
+            path, cost = self.query(source, destination)
+            hierarchy_seconds += time.perf_counter() - started
+            started = time.perf_counter()
+            expected_path, expected_cost = a_star.run_a_star(graph, source, destination)
+            a_star_seconds += time.perf_counter() - started
+
+            # Equal-cost paths may differ, so the costs are compared and the path re-weighed
+            valid = path is None or abs(sum(graph.weight(path[i], path[i + 1]) for i in range(len(path) - 1)) - cost) <= 1e-6 * max(1.0, cost)
+            if (path is None) != (expected_path is None) or not valid or abs(cost - expected_cost) > 1e-6 * max(1.0, expected_cost):
+                mismatches.append((source, destination, cost, expected_cost))
+        report = {
+            'pairs': len(pairs),
+            'mismatches': mismatches,
+            'hierarchy_ms': round(1000 * hierarchy_seconds / max(len(pairs), 1), 3),
+            'a_star_ms': round(1000 * a_star_seconds / max(len(pairs), 1), 3),
+        }
+        self.timings = (report['hierarchy_ms'], report['a_star_ms'])
+        return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build Contraction Hierarchies for fast cheapest and shortest route queries.")
+    parser.add_argument('--dataset', default='dataset.csv')
+    parser.add_argument('--out', default='hierarchy', help="directory for the hierarchy files")
+    parser.add_argument('--metric', type=int, nargs='+', default=[24, 20], help="dataset columns to build, 24 = cost, 20 = distance")
+    parser.add_argument('--verify', type=int, default=200, metavar='PAIRS',
+                        help="random pairs to check and time against Astar, 0 to skip; RoutePlanner only uses a hierarchy timed faster")
+    parser.add_argument('--core-degree', type=float, default=None, help="stop contracting once the rest average more flights than this")
+    args = parser.parse_args(argv)
+
+    store = get_route_store(args.dataset)
+    graph = store.compact_graph()
+    for metric in args.metric:
+        started = time.perf_counter()
+        hierarchy = ContractionHierarchy.build(graph.weighted(metric), store.fingerprint, core_degree=args.core_degree)
+        print(f"Column {metric}: {len(hierarchy.up[1]) + len(hierarchy.down[1])} edges, built in {time.perf_counter() - started:.1f}s")
+        if args.verify:
+            report = hierarchy.verify(graph.weighted(metric), samples=args.verify)
+            print(f"  {report['pairs']} pairs checked against Astar, {len(report['mismatches'])} mismatches, "
+                  f"{report['hierarchy_ms']} ms per query vs {report['a_star_ms']} ms"
+                  f"{'' if hierarchy.faster() else ', RoutePlanner will use Astar'}")
+        hierarchy.save(args.out)
+
+
+if __name__ == "__main__":
+    main()
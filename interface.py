@@ -1,28 +1,34 @@
-import csv
+import queue
+import threading
 import tkinter as tk
 import webbrowser
 from datetime import datetime
-from tkinter import messagebox, ttk
+from tkinter import messagebox, simpledialog, ttk
 from tkinter import scrolledtext  # For displaying flight information
 
-import folium
-import folium.plugins
 from PIL import ImageTk, Image
-from folium.plugins import TagFilterButton, AntPath
 
-from astar import Astar
-from bfs import BFS
+from accountstore import get_account_store
 from graph import Graph
+from maprenderer import MapRenderer
+from metrics import metrics
+from planner import RoutePlanner
+from routestore import get_route_store
 
 
 class Interface:
+    ALL_CITIES = "All cities"  # dropdown options that search every airport of the country or city at once
+    ALL_AIRPORTS = "All airports"
 
     def __init__(self):
         self.dataset = 'dataset.csv' #20 = distance 24 = cost
         #initialise classes
         self.graph = Graph()
-        self.a_star = Astar()
-        self.bfs = BFS()
+        self.planner = RoutePlanner(self.dataset)
+        self.map_renderer = MapRenderer(self.dataset)
+        self.reachable_renderer = MapRenderer(self.dataset, output='reachable_map.html')  # its own file, a flight query may be writing the other
+        self.num_paths = 3  # k shortest paths shown, one info button per path
+        self.max_stops = None  # optional limit on intermediate airports for the k shortest paths
 
         self.source_country_var = None
         self.source_city_var = None
@@ -35,14 +41,22 @@ class Interface:
         self.path2_info_button = None
         self.path3_info_button = None
 
+        # Route queries run on a worker thread and report back through this queue
+        self.query_results = queue.Queue()
+        self.query_lock = threading.Lock()  # one query uses the planner at a time, a superseded one stops at its next stage
+        self.query_id = 0
+        self.query_cancel = None
+        self.query_progress = None
+
     # Function to create a Folium map with connections between countries
-    def create_country_map(self, graph, country_coordinates, highlighted_countries):
+    # The airport layer is cached by the MapRenderer, only the paths are drawn per query
+    def create_country_map(self, graph, country_coordinates, highlighted_countries, path_info=None):
         # Check if highlighted countries are available in the graph
         if not all(country in graph for country in highlighted_countries):
             print("Error: One or more highlighted countries not found in the graph.")
             return
 
-        path_tags = {'Path 1': 'Path 1', 'Path 2': 'Path 2', 'Path 3': 'Path 3'}  # Define path tags
+        path_info = self.path_info if path_info is None else path_info
 
         # Create a Folium map centered on the first highlighted country's coordinates
         center_country = highlighted_countries[0]
@@ -50,83 +64,48 @@ class Interface:
         if center_coords is None:
             print(f"Error: Coordinates not found for country '{center_country}'.")
             return
-        my_map = folium.Map(location=center_coords, zoom_start=4)
-
-        # Extract countries from path_info
-        path_countries = set()
-        if self.path_info:
-            for path, _ in self.path_info:
-                path_countries.update(path)
-
-        # Draw nodes for each country
-        for country, coords in country_coordinates.items():
-            if country in path_countries:  # Check if the country is in any of the paths
-                marker_color = 'red'  # Set marker color to red for countries in the path
-            else:
-                marker_color = 'gray'  # Set marker color to gray for other countries
-            my_map.add_child(folium.CircleMarker(
-                location=coords,
-                radius=5,
-                color=marker_color,
-                fill=True,
-                fill_color=marker_color,
-                fill_opacity=0.7,
-                popup=folium.Popup(country, max_width=1000)  # Set maximum width for popup
-            ))
-
-        # Draw edges for each path
-        if self.path_info:
-            colors = ['blue', 'green', 'orange', 'purple', 'pink']  # Define colors for different paths
-            for i, (path, distance) in enumerate(self.path_info, start=1):
-                path_name = f"Path {i}"
-                path_tag = path_tags[path_name]
-                color = colors[i % len(colors)]  # Select color based on index
-                ant_path = AntPath(
-                    locations=[country_coordinates[country] for country in path],
-                    color=color,
-                    tooltip=f"<b>{path_name}:</b><br>The flight from {path[0]} to {path[-1]} is {distance:.2f} km",
-                    delay=1000,
-                    tags=[path_tag]  # Assign tag to the path
-                ).add_to(my_map)  # Delay between animation steps in milliseconds
-
-        # Add tag filter button
-        pathCategories = list(path_tags.values())
-        filter_button = TagFilterButton(pathCategories, position='topright')
-        my_map.add_child(filter_button)
-
-        my_map.save("country_connection_map.html")
 
-        self.path1_info_button.grid(row=0, column=0, padx=5, pady=5)
-        self.path2_info_button.grid(row=0, column=1, padx=5, pady=5)
-        self.path3_info_button.grid(row=0, column=2, padx=5, pady=5)
+        self.map_renderer.render(path_info, center_coords)
+        return True
 
     # Function to get the airport based on airport IATA code
     def get_airport_from_iata(self,iata_code, csv_file):
-        with open(csv_file, 'r', encoding='utf-8') as file:
-            csv_reader = csv.reader(file)
-            next(csv_reader)  # Skip the header row if present
-            for row in csv_reader:
-                if iata_code == row[0]:
-                    return row[2]  # airport name corresponding to the IATA code
-        return None  # Return None if IATA code is not found
+        return get_route_store(csv_file).airport_name(iata_code)  # None if IATA code is not found
+
+    # Function to get the name shown for an airport, its IATA code when the dataset has no name for it
+    def airport_label(self, iata_code):
+        name = self.get_airport_from_iata(iata_code, self.dataset)
+        return name if name is not None else iata_code
 
     # Function to get the IATA based on airport
     def get_iata_from_airport(self, airport, csv_file):
-        with open(csv_file, 'r', encoding='utf-8') as file:
-            csv_reader = csv.reader(file)
-            next(csv_reader)  # Skip the header row if present
-            for row in csv_reader:
-                if airport == row[2]:
-                    return row[0]  # airport name corresponding to the IATA code
-        return None  # Return None if IATA code is not found
+        return get_route_store(csv_file).iata_code(airport)  # None if airport is not found
+
+    # Function to get the IATA code of the selected airport, or the set of codes of the selected city or
+    # country when "All airports" is chosen; a set with a single airport is returned as its code
+    def selected_airports(self, airport_entry, is_source=True):
+        if airport_entry.get() != self.ALL_AIRPORTS:
+            return self.get_iata_from_airport(airport_entry.get(), self.dataset)
+
+        country = (self.source_country_var if is_source else self.destination_country_var).get()
+        city = (self.source_city_var if is_source else self.destination_city_var).get()
+        # airports_in only reads the store's lookup tables, the planner's search state is left to the query workers
+        if city == self.ALL_CITIES:
+            airports = self.planner.airports_in(country=country)
+        else:
+            airports = self.planner.airports_in(city=city)
+        airports = {code.upper() for code in airports if code}
+        if len(airports) == 1:
+            return airports.pop()
+        return airports or None
 
     # Function to retrieve flight information based on source and destination airport codes
+    # The searches run on a worker thread, results are shown by poll_query_results as they arrive
     def retrieve_flight_information(self, source_entry, destination_entry, flight_info_text):
-        self.path_info = []
         flight_info_text.config(state=tk.NORMAL)
         
-        source_airport_code = self.get_iata_from_airport(source_entry.get(), self.dataset)
-        destination_airport_code = self.get_iata_from_airport(destination_entry.get(), self.dataset)
+        source_airport_code = self.selected_airports(source_entry, is_source=True)
+        destination_airport_code = self.selected_airports(destination_entry, is_source=False)
 
         source_airport = None
         destination_airport = None
@@ -137,136 +116,271 @@ class Interface:
         elif source_airport_code == destination_airport_code and source_airport_code is not None and destination_airport_code is not None:
             messagebox.showerror("Error", f"Source and Destination Airport cannot be the same")
 
+        elif not isinstance(source_airport_code, str) or not isinstance(destination_airport_code, str):
+            source_codes = {source_airport_code} if isinstance(source_airport_code, str) else source_airport_code
+            destination_codes = {destination_airport_code} if isinstance(destination_airport_code, str) else destination_airport_code
+            if source_codes & destination_codes:
+                messagebox.showerror("Error", f"Source and Destination cannot share an airport")
+            else:
+                self.start_flight_query(source_airport_code, destination_airport_code, flight_info_text)
+
         else:
             source_airport = source_airport_code.upper()  # Get source airport code
             destination_airport = destination_airport_code.upper()  # Get source airport code
-            cost_graph = self.graph.construct_adjacency(0,11,24)
-            flight_graph = self.graph.construct_adjacency(0,11,20)
+            # Whether both are in the graph is checked by the worker, building the graph here would freeze the window
+            self.start_flight_query(source_airport, destination_airport, flight_info_text)
+        flight_info_text.config(state=tk.DISABLED)
 
-            if source_airport not in flight_graph:
-                messagebox.showerror("Error", f"Source airport '{source_airport}' not found in the graph.")
-                return
+    # Function to cancel the query still running and start numbering a new one, late results of the old one are ignored
+    def new_query(self):
+        if self.query_cancel is not None:
+            self.query_cancel.set()
+        self.query_id += 1
+        self.query_cancel = threading.Event()
+        return self.query_id, self.query_cancel
+
+    # Function to start the searches for a query on a worker thread, source and destination may be sets of codes
+    def start_flight_query(self, source_airport, destination_airport, flight_info_text):
+        query_id, cancel = self.new_query()
+        self.path_info = []
 
-            if destination_airport not in flight_graph:
-                messagebox.showerror("Error", f"Destination airport '{destination_airport}' not found in the graph.")
-                return
+        flight_info_text.delete(1.0, tk.END)  # Clear previous text
+        flight_info_text.insert(tk.END, "Searching for flights...\n")
+        if self.query_progress is not None:
+            self.query_progress.config(value=0, maximum=self.num_paths + 2)
 
-            # Find cheapest route using A* algo
-            path, cost = self.a_star.run_a_star(cost_graph, source_airport, destination_airport)
-            # Find the three shortest paths using BFS
-            bfs_paths = self.bfs.run_bfs(flight_graph, source_airport, destination_airport, 3)
+        worker = threading.Thread(target=self.run_flight_query, args=(query_id, cancel, source_airport, destination_airport), daemon=True)
+        worker.start()
 
+    # Runs on the worker thread: searches, converts codes to names and builds the map, never touching Tk
+    # Every stage is timed into a metrics trace, logged as one JSON record when the query ends
+    def run_flight_query(self, query_id, cancel, source_airport, destination_airport):
+        with self.query_lock:
+            if cancel.is_set():
+                return
+            with metrics.query('flight', source=self.trace_airports(source_airport), destination=self.trace_airports(destination_airport)) as trace:
+                try:
+                    self.traced_flight_query(trace, query_id, cancel, source_airport, destination_airport)
+                except Exception as error:
+                    trace.fields['error'] = str(error)
+                    self.query_results.put((query_id, 'error', str(error)))
+
+    # Sets of airports are logged as sorted lists
+    def trace_airports(self, airports):
+        return airports if isinstance(airports, str) else sorted(airports)
+
+    # Checked between stages, so a superseded query gives up the planner as soon as its current stage ends
+    def cancelled(self, trace, cancel):
+        if cancel.is_set():
+            trace.fields['cancelled'] = True
+        return cancel.is_set()
+
+    def traced_flight_query(self, trace, query_id, cancel, source_airport, destination_airport):
+        # Parsing the CSV (only when it changed on disk) and building the compact graph
+        with trace.stage('load'):
+            store = self.planner.store
+        with trace.stage('graph'):
+            flight_graph = store.compact_graph()
+        if self.cancelled(trace, cancel):
+            return
+        for role, airport in (('Source', source_airport), ('Destination', destination_airport)):
+            if isinstance(airport, str) and airport not in flight_graph:
+                trace.fields['error'] = 'unknown airport'
+                self.query_results.put((query_id, 'invalid', f"{role} airport '{airport}' not found in the graph."))
+                return
+
+        # Find cheapest route using A* algo
+        with trace.stage('cheapest_search'):
+            path, cost = self.planner.cheapest_path(source_airport, destination_airport)
+        trace.annotate('cheapest_search', **self.planner.last_query)
+        if self.cancelled(trace, cancel):
+            return
+        # Convert IATA codes to airport names
+        with trace.stage('name_conversion'):
+            formatted_path = [self.airport_label(code) for code in path] if path else None
+        self.query_results.put((query_id, 'cheapest', (formatted_path, cost)))
+
+        # Find the k shortest paths by distance, in ascending order, sending each one as it is found
+        path_info = []
+        paths = iter(self.planner.iter_shortest_paths(source_airport, destination_airport, self.num_paths, max_stops=self.max_stops))
+        while True:
+            with trace.stage('k_shortest_search'):
+                found = next(paths, None)
+            if found is None:
+                break
+            if self.cancelled(trace, cancel):
+                return
+            path, distance = found
+            with trace.stage('name_conversion'):
+                formatted_path = [self.airport_label(code) for code in path]
+            if not path_info:
+                first_path = path
+            path_info.append([formatted_path, distance])
+            self.query_results.put((query_id, 'path', (formatted_path, distance)))
+        trace.annotate('k_shortest_search', paths=len(path_info), **self.planner.last_query)
+
+        # Routes where no other is cheaper, shorter and with fewer flights all at once
+        if self.cancelled(trace, cancel):
+            return
+        with trace.stage('pareto_search'):
+            routes = self.planner.pareto_paths(source_airport, destination_airport, max_stops=self.max_stops)
+        trace.annotate('pareto_search', routes=len(routes), **self.planner.last_query)
+        if self.cancelled(trace, cancel):
+            return
+        with trace.stage('name_conversion'):
+            tradeoffs = [([self.airport_label(code) for code in path], cost, distance, legs)
+                         for path, cost, distance, legs in routes]
+        self.query_results.put((query_id, 'tradeoffs', tradeoffs))
+
+        if path_info and not self.cancelled(trace, cancel):
+            # For "All airports" queries the map is centred on the airports the first path actually uses
+            with trace.stage('map'):
+                shown = self.open_map_window_with_airports(first_path[0], first_path[-1], path_info)
+            if shown:
+                self.query_results.put((query_id, 'map', None))
+        self.query_results.put((query_id, 'done', len(path_info)))
+
+    # Function to show worker results on the Tk main thread, it reschedules itself with root.after
+    # even when showing a result fails, or no later result would ever be shown
+    def poll_query_results(self, root, flight_info_text):
+        try:
+            while True:
+                query_id, kind, payload = self.query_results.get_nowait()
+                if query_id == self.query_id:  # Results of superseded queries are dropped
+                    self.show_query_result(kind, payload, flight_info_text)
+        except queue.Empty:
+            pass
+        finally:
+            root.after(50, self.poll_query_results, root, flight_info_text)
+
+    def show_query_result(self, kind, payload, flight_info_text):
+        flight_info_text.config(state=tk.NORMAL)
+        if kind == 'cheapest':
+            formatted_path, cost = payload
             # Display flight information
             flight_info_text.delete(1.0, tk.END)  # Clear previous text
             self.path1_info_button.config(state=tk.NORMAL)
             self.path2_info_button.config(state=tk.NORMAL)
             self.path3_info_button.config(state=tk.NORMAL)
-            # Convert IATA codes to airport names
-            formatted_path = [self.get_airport_from_iata(code, self.dataset) for code in path]
-            flight_info_text.insert(tk.END, f"Cheapest path: ")
-
-            for i, airport_name in enumerate(formatted_path):
-                flight_info_text.insert(tk.END, airport_name)
-                if i < len(formatted_path) - 1:
-                    flight_info_text.insert(tk.END, ", ")
-
-            flight_info_text.insert(tk.END, f"\nCost: ${round(cost,2)}\n")
-
-            if bfs_paths:
-                # Sort the shortest paths based on their distances
-                bfs_paths.sort(key=lambda path: self.bfs.calculate_path_distance(flight_graph, path))
-
-                flight_info_text.insert(tk.END, f"\n3 shortest paths (in ascending order of distance):\n")
-                for i, path in enumerate (bfs_paths):
-                    distance = self.bfs.calculate_path_distance(flight_graph, path)
-                    # Convert IATA codes to airport names
-                    formatted_path = [self.get_airport_from_iata(code, self.dataset) for code in path]
-                    flight_info_text.insert(tk.END, f"Path {i+1}:\n")
-
-                    for i, airport_name in enumerate(formatted_path):
-                        flight_info_text.insert(tk.END, airport_name)
-                        if i < len(formatted_path) - 1:
-                            flight_info_text.insert(tk.END, " -> ")
-
-                    flight_info_text.insert(tk.END, f"\nDistance: {distance:.2f}km\n\n")
-                    if i >= 1:
-                        if (len(path) == 2):
-                            source = self.get_airport_from_iata(path[0], self.dataset)
-                            destination = self.get_airport_from_iata(path[1], self.dataset)
-                            path[0] = source
-                            path[1] = destination
-
-                        elif (len(path) == 3):
-                            source = self.get_airport_from_iata(path[0], self.dataset)
-                            middle = self.get_airport_from_iata(path[1], self.dataset)
-                            destination = self.get_airport_from_iata(path[2], self.dataset)
-                            path[0] = source
-                            path[1] = middle
-                            path[2] = destination
-
-                        elif (len(path) == 4):
-                            source = self.get_airport_from_iata(path[0], self.dataset)
-                            middle1 = self.get_airport_from_iata(path[1], self.dataset)
-                            middle2 = self.get_airport_from_iata(path[2], self.dataset)
-                            destination = self.get_airport_from_iata(path[3], self.dataset)
-                            path[0] = source
-                            path[1] = middle1
-                            path[2] = middle2
-                            path[3] = destination
-
-                        elif (len(path) == 5):
-                            source = self.get_airport_from_iata(path[0], self.dataset)
-                            middle1 = self.get_airport_from_iata(path[1], self.dataset)
-                            middle2 = self.get_airport_from_iata(path[2], self.dataset)
-                            middle3 = self.get_airport_from_iata(path[3], self.dataset)
-                            destination = self.get_airport_from_iata(path[4], self.dataset)
-                            path[0] = source
-                            path[1] = middle1
-                            path[2] = middle2
-                            path[3] = middle3
-                            path[4] = destination
-
-                        elif (len(path) == 6):
-                            source = self.get_airport_from_iata(path[0], self.dataset)
-                            middle1 = self.get_airport_from_iata(path[1], self.dataset)
-                            middle2 = self.get_airport_from_iata(path[2], self.dataset)
-                            middle3 = self.get_airport_from_iata(path[3], self.dataset)
-                            middle4 = self.get_airport_from_iata(path[4], self.dataset)
-                            destination = self.get_airport_from_iata(path[5], self.dataset)
-                            path[0] = source
-                            path[1] = middle1
-                            path[2] = middle2
-                            path[3] = middle3
-                            path[4] = middle4
-                            path[5] = destination
-
-                        self.path_info.append([path, distance])
-
-                self.open_map_window_with_airports(source_airport, destination_airport)
+            if formatted_path is None:
+                flight_info_text.insert(tk.END, "No cheapest path found between the source and destination.\n")
             else:
+                flight_info_text.insert(tk.END, f"Cheapest path: ")
+                flight_info_text.insert(tk.END, ", ".join(formatted_path))
+                flight_info_text.insert(tk.END, f"\nCost: ${round(cost,2)}\n")
+
+        elif kind == 'path':
+            formatted_path, distance = payload
+            if not self.path_info:
+                flight_info_text.insert(tk.END, f"\n{self.num_paths} shortest paths (in ascending order of distance):\n")
+            self.path_info.append([formatted_path, distance])
+            flight_info_text.insert(tk.END, f"Path {len(self.path_info)}:\n")
+            flight_info_text.insert(tk.END, " -> ".join(formatted_path))
+            flight_info_text.insert(tk.END, f"\nDistance: {distance:.2f}km\n\n")
+
+        elif kind == 'tradeoffs':
+            if payload:
+                flight_info_text.insert(tk.END, f"Trade-offs (cost / distance / flights):\n")
+            for formatted_path, cost, distance, legs in payload:
+                flight_info_text.insert(tk.END, " -> ".join(formatted_path))
+                flight_info_text.insert(tk.END, f"\n${round(cost,2)} / {distance:.2f}km / {legs}\n")
+
+        elif kind == 'reachable':
+            summary, lines = payload
+            flight_info_text.delete(1.0, tk.END)
+            flight_info_text.insert(tk.END, summary)
+            for line in lines:
+                flight_info_text.insert(tk.END, line)
+            if self.query_progress is not None:
+                self.query_progress.config(value=self.query_progress['maximum'])
+
+        elif kind == 'map':
+            self.path1_info_button.grid(row=0, column=0, padx=5, pady=5)
+            self.path2_info_button.grid(row=0, column=1, padx=5, pady=5)
+            self.path3_info_button.grid(row=0, column=2, padx=5, pady=5)
+
+        elif kind == 'done':
+            if payload == 0:
                 flight_info_text.insert(tk.END, f"No paths found between the source and destination.\n")
+            if self.query_progress is not None:
+                self.query_progress.config(value=self.query_progress['maximum'])
+
+        elif kind == 'invalid':
+            flight_info_text.delete(1.0, tk.END)
+            messagebox.showerror("Error", payload)
+
+        elif kind == 'error':
+            messagebox.showerror("Error", f"Flight search failed: {payload}")
         flight_info_text.config(state=tk.DISABLED)
 
+        if kind in ('cheapest', 'path', 'tradeoffs') and self.query_progress is not None:
+            self.query_progress.step(1)
+
+    # Function to show every airport reachable from the source selection within a budget, as a map layer
+    # One bounded sweep answers "where can I fly for under $400 with at most one stop?"
+    # The sweep runs on a worker thread like a flight query, and supersedes the one running
+    def show_reachable(self, source_entry, flight_info_text):
+        source = self.selected_airports(source_entry, is_source=True)
+        if source is None:
+            messagebox.showerror("Error", "Please select a source airport first")
+            return
+        budget = simpledialog.askfloat("Where can I fly?", "Maximum cost in $ (press Cancel for no limit):", minvalue=0)
+        max_stops = simpledialog.askinteger("Where can I fly?", "Maximum number of stops (press Cancel for no limit):", minvalue=0)
+
+        query_id, cancel = self.new_query()
+        flight_info_text.config(state=tk.NORMAL)
+        flight_info_text.delete(1.0, tk.END)
+        flight_info_text.insert(tk.END, "Searching for reachable airports...\n")
+        flight_info_text.config(state=tk.DISABLED)
+        if self.query_progress is not None:
+            self.query_progress.config(value=0)
+        worker = threading.Thread(target=self.run_reachable_query, args=(query_id, cancel, source, budget, max_stops), daemon=True)
+        worker.start()
+
+    # Runs on the worker thread: the bounded sweep, the listing and the reachability map, never touching Tk
+    def run_reachable_query(self, query_id, cancel, source, budget, max_stops):
+        with self.query_lock:
+            if cancel.is_set():
+                return
+            with metrics.query('reachable', source=self.trace_airports(source), budget=budget, max_stops=max_stops) as trace:
+                try:
+                    self.traced_reachable_query(trace, query_id, cancel, source, budget, max_stops)
+                except Exception as error:
+                    trace.fields['error'] = str(error)
+                    self.query_results.put((query_id, 'error', str(error)))
+
+    def traced_reachable_query(self, trace, query_id, cancel, source, budget, max_stops):
+        with trace.stage('reachable_search'):
+            reachable = self.planner.reachable(source, budget, 24, max_stops)
+        trace.annotate('reachable_search', **self.planner.last_query)
+        if self.cancelled(trace, cancel):
+            return
+        with trace.stage('name_conversion'):
+            limits = [f"under ${budget:.2f}" if budget is not None else None, f"with at most {max_stops} stops" if max_stops is not None else None]
+            summary = f"{len(reachable)} airports reachable {' '.join(limit for limit in limits if limit)}, cheapest first:\n"
+            lines = [f"${cost:.2f}  {self.airport_label(code)}: {' -> '.join(path)}\n"
+                     for code, (path, cost) in sorted(reachable.items(), key=lambda item: item[1][1])]
+        self.query_results.put((query_id, 'reachable', (summary, lines)))
+        if not reachable or self.cancelled(trace, cancel):
+            return
+
+        with trace.stage('map'):
+            store = get_route_store(self.dataset)
+            first = source if isinstance(source, str) else sorted(source)[0]
+            self.reachable_renderer.render_reachable(self.airport_label(first), reachable, store.coordinates[first], unit='cost ($)')
+        webbrowser.open_new_tab(self.reachable_renderer.output)
+
     # Function to display time in UI
     def update_current_time(self, root, current_time_label):
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         current_time_label.config(text="Current Time: " + current_time)
         root.after(1000, self.update_current_time, root , current_time_label)  # Update every 1 second (1000 milliseconds)
 
-    def open_map_window_with_airports(self, source_iata, destination_iata):
-        # Read the CSV file to extract latitude and longitude coordinates
+    def open_map_window_with_airports(self, source_iata, destination_iata, path_info=None):
+        # Latitude and longitude of every airport, keyed by airport name
         # print(source_iata, destination_iata)
-        airport_coordinates = {}
-        airport_graph = self.graph.construct_adjacency(2,13,-1)
-
-        with open(self.dataset, 'r', encoding='utf-8') as file:
-            csv_reader = csv.reader(file)
-            next(csv_reader)  # Skip the header row if present
-            for row in csv_reader:
-                country = row[2]  # Country name
-                latitude = float(row[5])  # Latitude
-                longitude = float(row[6])  # Longitude
-                airport_coordinates[country] = (latitude, longitude)
+        airport_coordinates = self.map_renderer.airport_coordinates()
+        airport_graph = get_route_store(self.dataset).iata_by_name  # airports with departing flights, by name
 
         # Get the corresponding countries for the source and destination airport IATA codes
         source_country = self.get_airport_from_iata(source_iata, self.dataset)
@@ -281,10 +395,12 @@ class Interface:
             return
 
         # Create a Folium map with connections between countries
-        self.create_country_map(airport_graph, airport_coordinates, [source_country, destination_country])
+        if not self.create_country_map(airport_graph, airport_coordinates, [source_country, destination_country], path_info):
+            return False
 
         #webrowser to open html file
         webbrowser.open_new_tab("country_connection_map.html")
+        return True
 
     def update_cities(self, *args, is_source=True):
         cities_data, city_menu = args[3], args[4]
@@ -301,31 +417,24 @@ class Interface:
         city_var = self.source_city_var if is_source else self.destination_city_var
         city_var.set(cities[0])
 
-        # Clear previous options and set new options
-        city_menu['values'] = cities
+        # Clear previous options and set new options, "All cities" searches the whole country
+        city_menu['values'] = [self.ALL_CITIES] + list(cities)
 
     def update_airports(self, *args, is_source=True):
         airports_data, airport_menu = args[3], args[4]
         selected_city = self.source_city_var.get() if is_source else self.destination_city_var.get()
 
-        # Get airports based on the selected city
-        airports = airports_data[selected_city]
+        # Get airports based on the selected city, every city of the country can only be searched as a whole
+        airports = [] if selected_city == self.ALL_CITIES else airports_data[selected_city]
 
         airports_var = self.source_airport_var if is_source else self.destination_airport_var
-        airports_var.set(airports[0])  # Set default airport
+        airports_var.set(airports[0] if airports else self.ALL_AIRPORTS)  # Set default airport
 
-        # Clear previous options and set new options
-        airport_menu['values'] = airports
+        # Clear previous options and set new options, "All airports" searches every airport of the city
+        airport_menu['values'] = [self.ALL_AIRPORTS] + list(airports)
 
     def get_airlines(self,airport_iata_1,airpot_iata_2):
-        with open(self.dataset, 'r', encoding='utf-8') as file:
-            csv_reader = csv.reader(file)
-            next(csv_reader)  # Skip the header row if present
-            airlines = []
-            for row in csv_reader:
-                if row[0] == airport_iata_1 and row[11] == airpot_iata_2:
-                    airlines.append(row[10])
-        return airlines
+        return get_route_store(self.dataset).get_airlines(airport_iata_1, airpot_iata_2)
                 
 
     def display_path_info(self, button_pressed):
@@ -341,13 +450,13 @@ class Interface:
         path_info_message = f"Path {path_index + 1} Info:\n\n"
         if path_index < len(self.path_info):
             path, distance= self.path_info[path_index]
-            cost_graph = self.graph.construct_adjacency(0,11,24)
+            cost_graph = self.graph.compact_graph().weighted(24)
             cost = 0
             airlines_list = []
             for i in range(len(path)-1):
                 airport1 = self.get_iata_from_airport(path[i],self.dataset)
                 airport2 = self.get_iata_from_airport(path[i+1],self.dataset)
-                cost += cost_graph[airport1][airport2]
+                cost += cost_graph.weight(airport1, airport2)
                 path_info_message += f"Path: \n{path[i]} -> {path[i+1]}\n"
                 airlines = self.get_airlines(airport1,airport2)
                 airlines_list.append(airlines)
@@ -373,20 +482,14 @@ class Interface:
         self.open_login_window()
 
     def login(self,master,username_entry,password_entry):
-        account = {}
-        with open('account.csv', 'r', encoding='utf-8') as file:
-            csv_reader = csv.reader(file)
-            next(csv_reader)  # Skip the header row if present
-            for row in csv_reader:
-                account[row[1]] = row[2]
-
         username = username_entry.get()
         password = password_entry.get()
 
         # Check if username and password are valid
         if username != "" and password != "":
-            if username in account:
-                if password == account[username]:
+            stored = get_account_store().password(username)
+            if stored is not None:
+                if password == stored:
                     # Close the login window
                     master.destroy()
                     # Open the main application window
@@ -495,31 +598,10 @@ class Interface:
                 messagebox.showerror("Sign Up Failed", "Username and password cannot be empty!")
                 return
 
-            # Update the CSV file with the new account information
-            with open('account.csv', 'a', newline='', encoding='utf-8') as file:
-                csv_writer = csv.writer(file)  # Specify newline character
-                # Get the current number of accounts
-                with open('account.csv', 'r', encoding='utf-8') as read_file:
-                    reader = csv.reader(read_file)
-                    next(reader)
-                    rows = list(reader)
-                    # Check if this username has been created before
-                    for row in rows:
-                        if username == row[1]:
-                            messagebox.showerror("Sign Up Failed", "Username has already been used")
-                            return
-
-                    if len(rows) > 0:
-                        if not rows[len(rows) - 1]:
-                            last_row = rows[len(rows) - 2]
-                        else:
-                            last_row = rows[len(rows) - 1]
-
-                        last_account_no = int(last_row[0])  # Get the account number of the last row
-                    else:
-                        last_account_no = 1000000
-                    account_no = last_account_no + 1  # Get the number of rows
-                csv_writer.writerow([account_no, username, password])
+            # Add the account, the store rejects a username that has been used before
+            if get_account_store().create(username, password) is None:
+                messagebox.showerror("Sign Up Failed", "Username has already been used")
+                return
 
             messagebox.showinfo("Sign Up Successful", "Account created successfully!")
             self.signup_button.config(state="normal")
@@ -652,6 +734,11 @@ class Interface:
         flight_info_text = scrolledtext.ScrolledText(root, width=130, height=18)
         flight_info_text.grid(row=9, column=0, columnspan=6, padx=10, pady=5)
         flight_info_text.config(state=tk.DISABLED)
+        self.poll_query_results(root, flight_info_text)
+
+        # Progress of the running route query
+        self.query_progress = ttk.Progressbar(root, mode='determinate', length=300)
+        self.query_progress.grid(row=7, column=0, columnspan=6, padx=10, pady=5)
 
         # Create a frame for path information buttons
         path_button_frame = tk.Frame(root)
@@ -677,6 +764,10 @@ class Interface:
         retrieve_button = tk.Button(root, text="Retrieve Flight Information", command=lambda: self.retrieve_flight_information(self.source_airport_var, self.destination_airport_var, flight_info_text), bg="lightblue")
         retrieve_button.grid(row=6, column=0,  columnspan=6, padx=10, pady=5)
 
+        # Add button to map every airport reachable from the source within a budget
+        reachable_button = tk.Button(root, text="Where can I fly?", command=lambda: self.show_reachable(self.source_airport_var, flight_info_text), bg="lightgreen")
+        reachable_button.grid(row=6, column=4, columnspan=2, padx=10, pady=5)
+
         # Set up trace callbacks to update the cities and airports
         self.source_country_var.trace_add('write', lambda *args, cities_data=self.graph.construct_adjacency(4,3,-1), city_menu=source_city_menu: self.update_cities(*args, cities_data, city_menu))
         self.source_city_var.trace_add('write', lambda *args, airports_data=self.graph.construct_adjacency(3,2,-1), airport_menu=source_airport_menu: self.update_airports(*args, airports_data, airport_menu))
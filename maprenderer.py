@@ -0,0 +1,171 @@
+import json
+import os
+
+import folium
+from branca.colormap import LinearColormap
+from branca.element import JavascriptLink, MacroElement
+from folium.plugins import AntPath, TagFilterButton
+from jinja2 import Template
+
+from routestore import get_route_store
+
+
+class AirportLayer(MacroElement):
+    #adds the airports of the cached GeoJSON script as one layer of grey circle markers
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }}_renderer = L.canvas();  // one canvas instead of an SVG node per airport
+            L.geoJSON({{ this.variable }}, {
+                pointToLayer: function (feature, latlng) {
+                    return L.circleMarker(latlng, {renderer: {{ this.get_name() }}_renderer, radius: 5, color: 'gray', fill: true, fillColor: 'gray', fillOpacity: 0.7});
+                },
+                onEachFeature: function (feature, layer) {
+                    layer.bindPopup(feature.properties.name, {maxWidth: 1000});
+                }
+            }).addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, variable):
+        super().__init__()
+        self._name = 'AirportLayer'
+        self.variable = variable
+
+
+class ReachabilityLayer(MacroElement):
+    #reachable airports as one GeoJSON layer of circle markers, coloured by their best value
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }}_renderer = L.canvas();
+            L.geoJSON({{ this.data }}, {
+                pointToLayer: function (feature, latlng) {
+                    return L.circleMarker(latlng, {renderer: {{ this.get_name() }}_renderer, radius: 6, color: feature.properties.color, fill: true, fillColor: feature.properties.color, fillOpacity: 0.9});
+                },
+                onEachFeature: function (feature, layer) {
+                    layer.bindPopup(feature.properties.popup, {maxWidth: 1000});
+                }
+            }).addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, features):
+        super().__init__()
+        self._name = 'ReachabilityLayer'
+        self.data = json.dumps({'type': 'FeatureCollection', 'features': features}, separators=(',', ':'))
+
+
+class MapRenderer:
+    """
+    Builds the route map HTML with the static airport layer cached.
+
+    Every airport of the dataset goes into one GeoJSON script file, written once
+    per dataset version and referenced by each map, so a query only renders its
+    own path overlays instead of a CircleMarker and popup per airport.
+    """
+
+    def __init__(self, dataset='dataset.csv', output='country_connection_map.html', layer_file='airports_layer.js'):
+        self.dataset = dataset
+        self.output = output
+        self.layer_file = layer_file
+        self.variable = 'airportsLayer'
+        self._fingerprint = None
+        self._coordinates = {}
+
+    # Function to get airport name -> (latitude, longitude), rebuilt only when the dataset changes
+    def airport_coordinates(self):
+        self.refresh()
+        return self._coordinates
+
+    # Function to (re)write the airport layer script when the dataset version changes
+    def refresh(self):
+        store = get_route_store(self.dataset)
+        layer_path = os.path.join(os.path.dirname(self.output), self.layer_file)
+        if store.fingerprint == self._fingerprint and os.path.exists(layer_path):
+            return
+
+        self._coordinates = {store.airport_name(code): coords for code, coords in store.coordinates.items()}
+        features = [{
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [longitude, latitude]},
+            'properties': {'name': name},
+        } for name, (latitude, longitude) in self._coordinates.items()]
+        with open(layer_path, 'w', encoding='utf-8') as file:
+            file.write(f"var {self.variable} = ")
+            json.dump({'type': 'FeatureCollection', 'features': features}, file, separators=(',', ':'))
+            file.write(';\n')
+        self._fingerprint = store.fingerprint
+
+    # Function to render a map centred on center_coords with the airport layer and one AntPath per path
+    # path_info is a list of [airport names, distance] like Interface.path_info
+    def render(self, path_info, center_coords):
+        coordinates = self.airport_coordinates()
+        my_map = folium.Map(location=center_coords, zoom_start=4)
+        my_map.get_root().header.add_child(JavascriptLink(self.layer_file))
+        my_map.add_child(AirportLayer(self.variable))
+
+        # Airports on any of the paths are drawn again on top, in red
+        path_airports = []
+        for path, _ in path_info:
+            path_airports.extend(airport for airport in path if airport not in path_airports)
+        for airport in path_airports:
+            my_map.add_child(folium.CircleMarker(
+                location=coordinates[airport],
+                radius=5,
+                color='red',
+                fill=True,
+                fill_color='red',
+                fill_opacity=0.7,
+                popup=folium.Popup(airport, max_width=1000)
+            ))
+
+        path_tags = [f"Path {i}" for i in range(1, len(path_info) + 1)]
+        colors = ['blue', 'green', 'orange', 'purple', 'pink']  # Define colors for different paths
+        for i, (path, distance) in enumerate(path_info, start=1):
+            path_name = f"Path {i}"
+            AntPath(
+                locations=[coordinates[airport] for airport in path],
+                color=colors[i % len(colors)],
+                tooltip=f"<b>{path_name}:</b><br>The flight from {path[0]} to {path[-1]} is {distance:.2f} km",
+                delay=1000,  # Delay between animation steps in milliseconds
+                tags=[path_name]
+            ).add_to(my_map)
+
+        if path_tags:
+            my_map.add_child(TagFilterButton(path_tags, position='topright'))
+
+        my_map.save(self.output)
+        return self.output
+
+    # Function to render the airports reachable from a source, as returned by RoutePlanner.reachable
+    # Each airport is coloured from green (lowest value) to red (highest), its popup shows the value and path
+    def render_reachable(self, source_name, reachable, center_coords, unit='cost'):
+        coordinates = self.airport_coordinates()
+        store = get_route_store(self.dataset)
+        my_map = folium.Map(location=center_coords, zoom_start=4)
+        my_map.get_root().header.add_child(JavascriptLink(self.layer_file))
+        my_map.add_child(AirportLayer(self.variable))
+
+        values = [value for _, value in reachable.values()]
+        low, high = min(values, default=0), max(values, default=0)
+        colormap = LinearColormap(['green', 'yellow', 'red'], vmin=low, vmax=high if high > low else low + 1,
+                                  caption=f"Best {unit} from {source_name}")
+        features = []
+        for code, (path, value) in sorted(reachable.items(), key=lambda item: -item[1][1]):  # Cheapest drawn last, on top
+            name = store.airport_name(code)
+            if name not in coordinates:
+                continue
+            latitude, longitude = coordinates[name]
+            route = ' &rarr; '.join(path)
+            features.append({
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [longitude, latitude]},
+                'properties': {'color': colormap(value), 'popup': f"<b>{name}</b><br>{unit}: {value:.2f}<br>{route}"},
+            })
+        my_map.add_child(ReachabilityLayer(features))
+        colormap.add_to(my_map)
+
+        if source_name in coordinates:
+            folium.Marker(location=coordinates[source_name], popup=folium.Popup(source_name, max_width=1000),
+                          icon=folium.Icon(color='blue', icon='plane')).add_to(my_map)
+        my_map.save(self.output)
+        return self.output
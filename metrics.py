@@ -0,0 +1,113 @@
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from itertools import count
+from contextlib import contextmanager
+
+logger = logging.getLogger('routes.metrics')
+
+
+class QueryTrace:
+    #timings of the stages of one query, a stage entered several times adds up
+    def __init__(self, name, **fields):
+        self.name = name
+        self.fields = fields
+        self.stages = {}  # stage -> {'ms': total, 'calls': count, plus counters added with annotate}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        entry = self.stages.setdefault(name, {'ms': 0.0, 'calls': 0})
+        started = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry['ms'] += 1000 * (time.perf_counter() - started)
+            entry['calls'] += 1
+
+    # Function to attach counters to a stage, e.g. nodes expanded and heap sizes of its search
+    def annotate(self, name, **counters):
+        self.stages.setdefault(name, {'ms': 0.0, 'calls': 0}).update(counters)
+
+    def record(self):
+        stages = {name: dict(entry, ms=round(entry['ms'], 3)) for name, entry in self.stages.items()}
+        return dict(self.fields, query=self.name, total_ms=round(1000 * (time.perf_counter() - self.started), 3), stages=stages)
+
+
+class Metrics:
+    """
+    Per-stage timings of route queries.
+
+    Every finished query is written to the 'routes.metrics' logger as one JSON
+    line and added to running totals per stage; snapshot() returns those totals
+    and the most recent query records. Setting profile_dir (or the
+    ROUTES_PROFILE_DIR environment variable) also runs each query under
+    cProfile and dumps a .prof file per query for pstats or snakeviz.
+    """
+
+    def __init__(self, recent=50, profile_dir=None, log_path=None):
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.stages = {}  # stage -> {'count', 'total_ms', 'max_ms'}
+        self.recent = deque(maxlen=recent)
+        self.sequence = count(1)  # numbers the profile dumps
+        self.profile_dir = profile_dir or os.environ.get('ROUTES_PROFILE_DIR')
+        log_path = log_path or os.environ.get('ROUTES_METRICS_LOG')
+        if log_path:
+            self.log_to(log_path)
+
+    # Function to append the JSON query records to a file
+    def log_to(self, path):
+        handler = logging.FileHandler(path, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+    # Context manager giving the QueryTrace of one query, recorded when the block exits
+    @contextmanager
+    def query(self, name, **fields):
+        trace = QueryTrace(name, **fields)
+        profiler = cProfile.Profile() if self.profile_dir else None
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield trace
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                os.makedirs(self.profile_dir, exist_ok=True)
+                path = os.path.join(self.profile_dir, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{next(self.sequence)}.prof")
+                profiler.dump_stats(path)
+                trace.fields['profile'] = path
+            self.finish(trace)
+
+    def finish(self, trace):
+        record = trace.record()
+        with self.lock:
+            self.queries += 1
+            for name, entry in record['stages'].items():
+                totals = self.stages.setdefault(name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+                totals['count'] += 1
+                totals['total_ms'] += entry['ms']
+                totals['max_ms'] = max(totals['max_ms'], entry['ms'])
+            self.recent.append(record)
+        logger.info(json.dumps(record, default=str))
+        return record
+
+    # Function to get the running totals per stage and the recent query records, JSON-friendly
+    def snapshot(self):
+        with self.lock:
+            stages = {name: {
+                'count': totals['count'],
+                'total_ms': round(totals['total_ms'], 3),
+                'mean_ms': round(totals['total_ms'] / totals['count'], 3),
+                'max_ms': round(totals['max_ms'], 3),
+            } for name, totals in self.stages.items()}
+            return {'queries': self.queries, 'stages': stages, 'recent': list(self.recent)}
+
+
+metrics = Metrics()  # shared by the interface and the headless tools
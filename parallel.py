@@ -0,0 +1,71 @@
+import multiprocessing
+import os
+import time
+
+from routestore import get_route_store
+
+_worker_planner = None  # BatchPlanner of this process, inherited through fork or built by the initializer
+
+
+def _init_worker(planner):
+    global _worker_planner
+    _worker_planner = planner
+    # With fork the loaded store is inherited as is; with spawn this loads it once per worker,
+    # straight from the memory-mapped snapshot when one exists, so the pages are shared
+    get_route_store(planner.dataset).compact_graph()
+
+
+def _plan_group(task):
+    source, destinations = task
+    started = time.perf_counter()
+    results = _worker_planner.plan_group(source, destinations)
+    return os.getpid(), time.perf_counter() - started, results
+
+
+class ParallelPlanner:
+    """
+    Runs a BatchPlanner over a process pool.
+
+    The graph is loaded in the parent before the pool starts, so forked workers
+    share it copy-on-write instead of receiving a pickled copy with every task.
+    Work is partitioned by source airport, largest groups first, and report
+    holds the throughput and the busy fraction of each worker.
+    """
+
+    def __init__(self, planner, workers=None):
+        self.planner = planner
+        self.workers = workers or os.cpu_count() or 1
+        self.report = {}
+
+    def plan(self, pairs):
+        groups = sorted(self.planner.group_by_source(pairs).items(), key=lambda group: len(group[1]), reverse=True)
+        yield from self.plan_groups(groups)
+
+    # Cheapest cost from every airport to every other airport, one task per source
+    def plan_all_pairs(self):
+        codes = get_route_store(self.planner.dataset).compact_graph().codes
+        yield from self.plan_groups([(code, [other for other in codes if other != code]) for code in codes])
+
+    def plan_groups(self, groups):
+        get_route_store(self.planner.dataset).compact_graph()  # Load before forking
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+
+        busy = {}
+        count = 0
+        started = time.perf_counter()
+        with context.Pool(self.workers, _init_worker, (self.planner,)) as pool:
+            for pid, seconds, results in pool.imap_unordered(_plan_group, groups):
+                busy[pid] = busy.get(pid, 0.0) + seconds
+                count += len(results)
+                yield from results
+        elapsed = time.perf_counter() - started
+
+        self.report = {
+            'workers': self.workers,
+            'sources': len(groups),
+            'pairs': count,
+            'seconds': round(elapsed, 3),
+            'pairs_per_second': round(count / elapsed, 1) if elapsed else 0.0,
+            'utilisation': {pid: round(seconds / elapsed, 3) for pid, seconds in busy.items()} if elapsed else {},
+        }
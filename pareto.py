@@ -0,0 +1,95 @@
+import heapq
+
+from astar import Astar
+
+
+class Pareto:
+    """
+    Multi-criteria route search over cost, distance and number of flights.
+
+    A label (cost, distance, legs) is one path reaching an airport. Labels are
+    settled in lexicographic order, so a settled label is never dominated by a
+    later one, and labels dominated by one already settled at their airport or
+    at the destination are dropped. One search gives the whole Pareto frontier:
+    every route for which no other route is at least as good on all three.
+    """
+
+    def __init__(self):
+        self.stats = {}
+
+    # Function to find the Pareto-optimal routes on a CSRGraph, start and goal may also be sets of codes
+    # Returns a list of (path, cost, distance, legs), cheapest first
+    # max_labels bounds the labels kept per airport (None keeps them all, giving the exact frontier)
+    def run_pareto(self, graph, start, goal, max_labels=64, cost_column=24, distance_column=20, max_legs=None):
+        sources = Astar.node_ids(graph, start)
+        goals = Astar.node_ids(graph, goal)
+        self.stats = {'labels': 0, 'settled': 0, 'pruned': 0, 'bounded': 0}
+        if not sources or not goals:
+            return []
+
+        offsets, targets = graph.offsets, graph.targets
+        costs, distances = graph.weights[cost_column], graph.weights[distance_column]
+        is_goal = bytearray(len(graph))
+        for node in goals:
+            is_goal[node] = 1
+
+        # Labels live in parallel lists, a label id indexes node and parent to rebuild its path
+        label_nodes = []
+        label_parents = []
+        settled = {}  # node id -> [(cost, distance, legs)] of its settled labels
+        frontier = []  # settled labels at the goal, (cost, distance, legs, label id)
+        open_set = []
+        for node in sources:
+            label_nodes.append(node)
+            label_parents.append(-1)
+            heapq.heappush(open_set, (0.0, 0.0, 0, len(label_nodes) - 1))
+
+        while open_set:
+            cost, distance, legs, label = heapq.heappop(open_set)
+            node = label_nodes[label]
+            bag = settled.setdefault(node, [])
+            if self.dominated(bag, cost, distance, legs) or self.dominated(frontier, cost, distance, legs):
+                self.stats['pruned'] += 1
+                continue
+            if max_labels is not None and len(bag) >= max_labels:
+                self.stats['bounded'] += 1
+                continue
+            bag.append((cost, distance, legs))
+            self.stats['settled'] += 1
+
+            # A path ends at the first goal it reaches
+            if is_goal[node]:
+                frontier.append((cost, distance, legs, label))
+                continue
+            if max_legs is not None and legs >= max_legs:
+                continue
+
+            for position in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[position]
+                label_cost = cost + costs[position]
+                label_distance = distance + distances[position]
+                if neighbor in settled and self.dominated(settled[neighbor], label_cost, label_distance, legs + 1):
+                    continue
+                if self.dominated(frontier, label_cost, label_distance, legs + 1):
+                    continue
+                label_nodes.append(neighbor)
+                label_parents.append(label)
+                heapq.heappush(open_set, (label_cost, label_distance, legs + 1, len(label_nodes) - 1))
+                self.stats['labels'] += 1
+
+        routes = []
+        for cost, distance, legs, label in frontier:
+            path = []
+            while label != -1:
+                path.append(graph.codes[label_nodes[label]])
+                label = label_parents[label]
+            path.reverse()
+            routes.append((path, cost, distance, legs))
+        return routes
+
+    # A label is dominated when some label is no worse on every criterion (equal labels count as dominated)
+    def dominated(self, labels, cost, distance, legs):
+        for label in labels:
+            if label[0] <= cost and label[1] <= distance and label[2] <= legs:
+                return True
+        return False
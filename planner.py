@@ -0,0 +1,218 @@
+import os
+from itertools import islice
+
+from astar import Astar
+from bfs import BFS
+from delta import DeltaCheck
+from hierarchy import ContractionHierarchy
+from pareto import Pareto
+from querycache import QueryCache
+from routestore import get_route_store
+from spatial import SpatialIndex
+from timetable import Timetable, to_iso, to_minutes
+
+
+class RoutePlanner:
+    """
+    Search layer shared by the interface and headless tools.
+
+    Answers cheapest-path and k-shortest-path queries on the compact graph of the
+    current dataset, with results cached by (query kind, source, destination,
+    metric, k, constraints) until the dataset fingerprint changes. The kind
+    ('cheapest', 'k_shortest' or 'pareto') keeps results of different shapes
+    apart, so a cheapest path never answers a k=1 shortest-path query.
+    """
+
+    def __init__(self, dataset='dataset.csv', cache_size=256, cache_ttl=None, hierarchy_dir=None, timetable=None, bidirectional=False):
+        self.dataset = dataset #20 = distance 24 = cost
+        self.bidirectional = bidirectional  # cheapest paths by bidirectional Dijkstra instead of informed A*, opt-in: the heuristic expands fewer nodes here
+        self.hierarchy_dir = hierarchy_dir  # directory of prebuilt Contraction Hierarchies, None to always use Astar
+        self.timetable_path = timetable  # optional CSV of scheduled flights for time-aware queries (see Timetable)
+        self._timetable = None
+        self._hierarchies = {}  # metric -> ContractionHierarchy of the current dataset version
+        self.a_star = Astar()
+        self.bfs = BFS()
+        self.pareto = Pareto()
+        self.cache = QueryCache(cache_size, cache_ttl)
+        self._spatial = (None, None)  # (compact graph, SpatialIndex over it)
+        self.last_query = {}  # whether the last query was cached, and the search counters when it was not
+
+    # The store is reloaded by get_route_store when the CSV changes on disk
+    @property
+    def store(self):
+        return get_route_store(self.dataset)
+
+    # Function to get the compact graph weighted by a metric, without the edges ruled out by constraints
+    def graph(self, metric, constraints=None):
+        store = self.store
+        graph = store.constrained_graph(constraints) if constraints is not None else store.compact_graph()
+        return graph.weighted(metric)
+
+    # Function to apply a delta file of added, removed and repriced routes (see RouteStore.apply_delta)
+    # Cached results are kept unless the delta may have changed them (see DeltaCheck)
+    # Returns the changes, {(source, destination): (old weights, new weights)}, equal when only another airline changed
+    def apply_delta(self, path):
+        store = self.store
+        old_fingerprint = store.fingerprint
+        changes = store.apply_delta(path)
+        check = DeltaCheck(store.compact_graph(), changes, store.coordinates)
+        self.cache.carry_over(old_fingerprint, store.fingerprint, lambda key, value: not check.affects(key, value))
+        return changes
+
+    # Function to get the Contraction Hierarchy of a metric, None when there is none for the current dataset
+    # or it was not faster than Astar
+    def hierarchy(self, metric):
+        if self.hierarchy_dir is None:
+            return None
+        fingerprint = self.store.fingerprint
+        hierarchy = self._hierarchies.get(metric)
+        if hierarchy is None or hierarchy.fingerprint != fingerprint:
+            path = ContractionHierarchy.file(self.hierarchy_dir, metric)
+            hierarchy = ContractionHierarchy.load(self.hierarchy_dir, metric) if os.path.exists(path) else None
+            if hierarchy is not None and hierarchy.fingerprint != fingerprint:
+                hierarchy = None  # Built from an older version of the dataset
+            if hierarchy is not None and not hierarchy.faster():
+                hierarchy = None  # Not timed faster than Astar when it was built
+            self._hierarchies[metric] = hierarchy
+        return hierarchy
+
+    # Function to get the Timetable of scheduled flights, loaded on first use, None when there is no timetable
+    def timetable(self):
+        if self._timetable is None and self.timetable_path is not None:
+            self._timetable = Timetable(self.timetable_path)
+        return self._timetable
+
+    # Function to find the earliest arrival leaving source at or after departure (ISO 8601, UTC without a zone)
+    # Returns (arrival, legs) with ISO times, (None, []) when it cannot be reached or there is no timetable
+    def earliest_arrival(self, source, destination, departure):
+        timetable = self.timetable()
+        if timetable is None:
+            return None, []
+        arrival, journey = timetable.earliest_arrival(source, destination, to_minutes(departure))
+        self.last_query = dict(timetable.stats, engine='connection_scan')
+        return (to_iso(arrival) if arrival is not None else None), timetable.describe(journey)
+
+    # Function to list every useful departure between two times with its arrival and legs, earliest first
+    def departure_profile(self, source, destination, start, end):
+        timetable = self.timetable()
+        if timetable is None:
+            return []
+        profile = timetable.profile(source, destination, to_minutes(start), to_minutes(end))
+        self.last_query = dict(timetable.stats, engine='connection_scan')
+        return [(to_iso(leaves), to_iso(arrival), timetable.describe(journey)) for leaves, arrival, journey in profile]
+
+    # Function to get the spatial index of the current dataset's airports, rebuilt when the dataset changes
+    def spatial_index(self):
+        graph = self.store.compact_graph()
+        if self._spatial[0] is not graph:
+            self._spatial = (graph, SpatialIndex(graph.geometry()))
+        return self._spatial[1]
+
+    # Function to get the airports within km of a point as (IATA code, km), nearest first
+    def airports_near(self, latitude, longitude, km):
+        return self.spatial_index().within(latitude, longitude, km)
+
+    # Function to find the cheapest path from any airport within km of a point, searched as one source set
+    def cheapest_path_from_point(self, latitude, longitude, km, destination, metric=24):
+        sources = {code for code, _ in self.airports_near(latitude, longitude, km)}
+        if not sources:
+            return None, float('inf')
+        return self.cheapest_path(sources, destination, metric)
+
+    # Function to find the cheapest path by a metric column, returns (path, total) like Astar.run_a_star
+    # source and destination may be sets of airport codes, the cheapest pair between them is used
+    # constraints is an optional RouteConstraints, the search runs on the graph it filters
+    def cheapest_path(self, source, destination, metric=24, constraints=None):
+        store = self.store
+        key = ('cheapest', self.query_key(source), self.query_key(destination), metric, self.constraint_key(constraints))
+        hit, result = self.cache.get(key, store.fingerprint)
+        self.last_query = {'cached': hit}
+        if not hit:
+            graph = self.graph(metric, constraints)
+            if constraints is not None and constraints.max_stops is not None:
+                # A stop limit needs the hop-aware search, its first path is the cheapest within the limit
+                path, total = next(iter(self.bfs.iter_shortest_paths(graph, source, destination, constraints.max_stops)), (None, float('inf')))
+                self.last_query['engine'] = 'k_shortest'
+            elif constraints is None and isinstance(source, str) and isinstance(destination, str) and self.hierarchy(metric):
+                path, total = self.hierarchy(metric).query(source, destination)
+                self.last_query.update(self.hierarchy(metric).stats, engine='hierarchy')
+            else:
+                path, total = self.a_star.run_a_star(graph, source, destination, bidirectional=self.bidirectional)
+                self.last_query.update(self.a_star.stats, engine='bidirectional' if self.bidirectional else 'a_star')
+            result = (tuple(path) if path is not None else None, total)
+            self.cache.put(key, result, store.fingerprint)
+        path, total = result
+        return (list(path) if path is not None else None), total
+
+    # Function to find the routes trading off cost, distance and number of flights in one search
+    # Returns a list of (path, cost, distance, legs), cheapest first, none beaten by another on all three
+    def pareto_paths(self, source, destination, max_labels=64, max_stops=None, constraints=None):
+        store = self.store
+        key = ('pareto', self.query_key(source), self.query_key(destination), (24, 20), max_labels, self.constraint_key(constraints, max_stops))
+        hit, result = self.cache.get(key, store.fingerprint)
+        self.last_query = {'cached': hit}
+        if not hit:
+            if constraints is not None:
+                max_stops = constraints.stop_limit(max_stops)
+            graph = store.constrained_graph(constraints) if constraints is not None else store.compact_graph()
+            routes = self.pareto.run_pareto(graph, source, destination, max_labels,
+                                            max_legs=None if max_stops is None else max_stops + 1)
+            self.last_query.update(self.pareto.stats)
+            result = tuple((tuple(path), cost, distance, legs) for path, cost, distance, legs in routes)
+            self.cache.put(key, result, store.fingerprint)
+        return [(list(path), cost, distance, legs) for path, cost, distance, legs in result]
+
+    # Function to find every airport reachable from source within a budget, in one bounded sweep
+    # metric is a weight column (24 = cost, 20 = distance) or 'hops' to count flights, budget is in its units
+    # Returns {airport: (path, best value)}, the best value within max_stops when a stop limit is given
+    def reachable(self, source, budget=None, metric=24, max_stops=None, constraints=None):
+        hops = metric == 'hops'
+        graph = self.graph(20 if hops else metric, constraints)
+        if constraints is not None:
+            max_stops = constraints.stop_limit(max_stops)
+        results = self.a_star.run_reachable(graph, source, budget, max_stops, hops)
+        self.last_query = dict(self.a_star.stats, engine='reachable', airports=len(results))
+        return results
+
+    # Function to get the airports of a city, or of every city in a country, as a set of IATA codes
+    # Uses the same country -> cities and city -> airports maps as the dropdowns
+    def airports_in(self, country=None, city=None):
+        store = self.store
+        cities = [city] if city is not None else store.cities_by_country.get(country, [])
+        return {store.iata_code(airport) for name in cities for airport in store.airports_by_city.get(name, [])}
+
+    # Sets of airports are cached under the same key whatever their order
+    def query_key(self, airports):
+        return airports if isinstance(airports, str) else frozenset(airports)
+
+    # The constraints part of a cache key, with no constraints it is just the stop limit
+    def constraint_key(self, constraints, max_stops=None):
+        if constraints is None:
+            return max_stops
+        return (constraints.stop_limit(max_stops),) + constraints.key()[1:]
+
+    # Function to find the k shortest loopless paths by a metric column, returns a list of (path, total)
+    def shortest_paths(self, source, destination, k=3, metric=20, max_stops=None, constraints=None):
+        return list(self.iter_shortest_paths(source, destination, k, metric, max_stops, constraints))
+
+    # Generator of the k shortest paths as (path, total), each yielded as soon as it is found
+    # The result is cached only once all k paths have been produced
+    # source and destination may be sets of airport codes, searched with a virtual source and sink
+    def iter_shortest_paths(self, source, destination, k=3, metric=20, max_stops=None, constraints=None):
+        store = self.store
+        key = ('k_shortest', self.query_key(source), self.query_key(destination), metric, k, self.constraint_key(constraints, max_stops))
+        hit, result = self.cache.get(key, store.fingerprint)
+        self.last_query = {'cached': hit}
+        if hit:
+            for path, total in result:
+                yield list(path), total
+            return
+
+        found = []
+        graph = self.graph(metric, constraints)
+        if constraints is not None:
+            max_stops = constraints.stop_limit(max_stops)
+        for path, total in islice(self.bfs.iter_shortest_paths(graph, source, destination, max_stops), k):
+            found.append((tuple(path), total))
+            yield path, total
+        self.cache.put(key, tuple(found), store.fingerprint)
@@ -0,0 +1,92 @@
+import time
+from collections import OrderedDict
+
+
+class QueryCache:
+    """
+    Bounded LRU cache of route search results with an optional time to live.
+
+    Every lookup passes the fingerprint of the dataset it was made against; when
+    the fingerprint changes, all cached results are dropped, unless carry_over
+    moved them to the new version after an incremental update.
+    """
+
+    def __init__(self, maxsize=256, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl  # seconds, None to keep entries until they are evicted
+        self.fingerprint = None
+        self._entries = OrderedDict()  # key -> (expiry time, value), least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.dropped = 0  # entries removed by carry_over
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Function to drop every entry if the results were computed against another dataset version
+    def validate(self, fingerprint):
+        if fingerprint != self.fingerprint:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.fingerprint = fingerprint
+
+    # Returns (True, value) on a hit and (False, None) on a miss
+    def get(self, key, fingerprint):
+        self.validate(fingerprint)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+
+        expires, value = entry
+        if expires is not None and expires < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def put(self, key, value, fingerprint):
+        self.validate(fingerprint)
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # Function to move the entries to a new dataset version, keeping those keep(key, value) accepts
+    # Used after an incremental update, when only some results can have changed
+    def carry_over(self, old_fingerprint, new_fingerprint, keep):
+        if self.fingerprint != old_fingerprint:
+            self.validate(new_fingerprint)
+            return
+        stale = [key for key, (_, value) in self._entries.items() if not keep(key, value)]
+        for key in stale:
+            del self._entries[key]
+        self.dropped += len(stale)
+        self.fingerprint = new_fingerprint
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'dropped': self.dropped,
+        }
@@ -0,0 +1,294 @@
+import csv
+import hashlib
+import io
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from csrgraph import CSRGraph
+
+WEIGHT_COLUMNS = (20, 24)  # distance and cost, the weights of the compact graph
+DELTA_ACTIONS = ('add', 'remove', 'update')
+
+
+class RouteStore:
+    #in-memory copy of the route dataset, parsed once and indexed for the lookups the app needs
+    def __init__(self, dataset='dataset.csv', tables=None, compact=None):
+        self.dataset = dataset #20 = distance 24 = cost
+        self.header = []
+        self.fingerprint = None  # hash of the CSV contents, changes whenever the data does
+        self.signature = None  # (size, mtime) of the CSV when it was loaded
+        self._rows = None
+        self._compact = compact
+        self._airline_edges = None  # (airline -> edge ids of the compact graph, airlines per edge, airline -> its weights there)
+        self._constrained = OrderedDict()  # constraint key -> filtered compact graph, most recent last
+        self._routes = None  # (source IATA, destination IATA) -> its rows, built by the first delta
+        self.airports = {}  # IATA -> first row where the airport is the source
+        self.iata_by_name = {}  # airport name -> IATA
+        self.airlines = {}  # (source IATA, destination IATA) -> airlines flying that leg
+        self.cities_by_country = {}  # country -> cities
+        self.airports_by_city = {}  # city -> airport names
+        self.coordinates = {}  # IATA -> (latitude, longitude)
+        if tables is None:
+            self.load()
+        else:
+            self.restore(tables)
+
+    def load(self):
+        self.signature = self.file_signature()
+        with open(self.dataset, 'rb') as file:
+            data = file.read()
+        self.fingerprint = hashlib.blake2b(data, digest_size=16).hexdigest()
+        self._rows = self.parse_rows(io.StringIO(data.decode('utf-8'), newline=''))
+        self._compact = None
+
+        self.airports = {}
+        self.iata_by_name = {}
+        self.airlines = {}
+        self.cities_by_country = {}
+        self.airports_by_city = {}
+        self.coordinates = {}
+        for row in self._rows:
+            self.index_row(row)
+
+    def read_rows(self):
+        with open(self.dataset, 'r', encoding='utf-8', newline='') as file:
+            return self.parse_rows(file)
+
+    def parse_rows(self, file):
+        csv_reader = csv.reader(file)
+        self.header = next(csv_reader, [])
+        return [row for row in csv_reader if row]
+
+    def file_signature(self):
+        stat = os.stat(self.dataset)
+        return stat.st_size, stat.st_mtime_ns
+
+    # Function to check whether the CSV has changed on disk since this store was loaded
+    def is_stale(self):
+        try:
+            return self.file_signature() != self.signature
+        except OSError:
+            return False  # Keep serving the loaded data if the file is briefly missing
+
+    # Raw dataset rows; a store restored from a snapshot only parses the CSV if something asks for them
+    @property
+    def rows(self):
+        if self._rows is None:
+            if self._routes is not None:
+                # After a delta the rows are regrouped by route, each route keeping its rows in order
+                self._rows = [row for rows in self._routes.values() for row in rows]
+            else:
+                self._rows = self.read_rows()
+        return self._rows
+
+    # Function to add a single dataset row to every index
+    def index_row(self, row):
+        source, airport, city, country = row[0], row[2], row[3], row[4]
+
+        if source not in self.airports:
+            self.airports[source] = row
+            self.coordinates[source] = (float(row[5]), float(row[6]))
+        if airport not in self.iata_by_name:
+            self.iata_by_name[airport] = source
+
+        self.airlines.setdefault((source, row[11]), []).append(row[10])
+
+        cities = self.cities_by_country.setdefault(country, [])
+        if city not in cities:
+            cities.append(city)
+        airports = self.airports_by_city.setdefault(city, [])
+        if airport not in airports:
+            airports.append(airport)
+
+    # Function to get the indexes as plain JSON-friendly tables, used by the snapshot builder
+    def tables(self):
+        return {
+            'fingerprint': self.fingerprint,
+            'signature': self.signature,
+            'header': self.header,
+            'airports': self.airports,
+            'iata_by_name': self.iata_by_name,
+            'airlines': [[source, destination, airlines] for (source, destination), airlines in self.airlines.items()],
+            'cities_by_country': self.cities_by_country,
+            'airports_by_city': self.airports_by_city,
+            'coordinates': self.coordinates,
+        }
+
+    def restore(self, tables):
+        self.fingerprint = tables['fingerprint']
+        self.signature = tuple(tables['signature'])
+        self.header = tables['header']
+        self.airports = tables['airports']
+        self.iata_by_name = tables['iata_by_name']
+        self.airlines = {(source, destination): airlines for source, destination, airlines in tables['airlines']}
+        self.cities_by_country = tables['cities_by_country']
+        self.airports_by_city = tables['airports_by_city']
+        self.coordinates = {code: tuple(coords) for code, coords in tables['coordinates'].items()}
+
+    # Function to get the integer-indexed CSR graph of airport routes, weighted by distance (20) and cost (24)
+    def compact_graph(self):
+        if self._compact is None:
+            self._compact = CSRGraph.from_rows(self.rows, 0, 11, WEIGHT_COLUMNS, self.coordinates)
+        return self._compact
+
+    # Function to get the edge ids of the compact graph flown by each airline, the number of airlines per edge
+    # and each airline's own weights on its edges ({airline: {column: array aligned with its edge ids}})
+    # Built once per dataset version, per-query masks and weights are then array operations
+    def airline_edges(self):
+        if self._airline_edges is None:
+            graph = self.compact_graph()
+            positions = {}
+            for node, source in enumerate(graph.codes):
+                for position in range(graph.offsets[node], graph.offsets[node + 1]):
+                    positions[(source, graph.codes[graph.targets[position]])] = position
+            fares = {}  # airline -> {edge id: its lowest weight per column}
+            for row in self.rows:
+                position = positions.get((row[0], row[11]))
+                if position is None:
+                    continue
+                weights = [float(row[column]) for column in WEIGHT_COLUMNS]
+                flown = fares.setdefault(row[10], {})
+                flown[position] = weights if position not in flown else [min(pair) for pair in zip(flown[position], weights)]
+
+            edges, airline_weights = {}, {}
+            served = np.zeros(graph.edge_count, dtype=np.int32)
+            for airline, flown in fares.items():
+                ids = np.array(sorted(flown), dtype=np.int64)
+                edges[airline] = ids
+                served[ids] += 1
+                airline_weights[airline] = {column: np.array([flown[position][i] for position in ids.tolist()], dtype=np.float64)
+                                            for i, column in enumerate(WEIGHT_COLUMNS)}
+            self._airline_edges = (edges, served, airline_weights)
+        return self._airline_edges
+
+    # Function to get the compact graph without the edges a RouteConstraints rules out
+    # The last few filtered graphs are kept, so repeated constrained queries do not rebuild them
+    def constrained_graph(self, constraints, keep=8):
+        if not constraints.filters_edges():
+            return self.compact_graph()
+        key = constraints.key()[1:]  # The stop limit does not change the graph
+        graph = self._constrained.get(key)
+        if graph is None:
+            airline_edges, served, airline_weights = self.airline_edges()
+            compact = self.compact_graph()
+            # With an airline filter an edge costs what the cheapest allowed airline charges, not the row the graph kept
+            weights = constraints.edge_weights(compact, airline_edges, airline_weights) if constraints.filters_airlines() else None
+            graph = compact.subgraph(constraints.edge_mask(compact, airline_edges, served), weights)
+            self._constrained[key] = graph
+            if len(self._constrained) > keep:
+                self._constrained.popitem(last=False)
+        self._constrained.move_to_end(key)
+        return graph
+
+    # Function to apply a file of added, removed and repriced routes to the loaded data in place
+    # The file has the dataset columns plus a last 'action' column: add, remove or update (a new price or
+    # distance for the route's airline); one row per route and airline, remove only needs columns 0, 10 and 11
+    # Returns {(source, destination): (old weights, new weights)} for every flight where any airline's weights
+    # changed, with None for a flight that did not exist or no longer does. The weights are those of the compact
+    # graph, so they are equal when only another airline's row changed. The CSV on disk is not rewritten.
+    def apply_delta(self, path):
+        with open(path, 'rb') as file:
+            data = file.read()
+        reader = csv.reader(io.StringIO(data.decode('utf-8'), newline=''))
+        next(reader, None)  # Header
+        routes = self.route_rows()
+
+        before = {}
+        for row in reader:
+            if not row:
+                continue
+            action, row = row[-1].strip().lower(), row[:-1]
+            if action not in DELTA_ACTIONS:
+                raise ValueError(f"Unknown delta action '{action}' for route {row[0]} -> {row[11]}")
+            key = (row[0], row[11])
+            if key not in before:
+                before[key] = (self.route_weights(routes.get(key)), self.route_fares(routes.get(key)))
+            rows = routes.setdefault(key, [])
+            matching = [position for position, existing in enumerate(rows) if existing[10] == row[10]]
+
+            if action == 'update' and matching:
+                rows[matching[-1]] = row  # Keeps its place, so the last row of a route still wins
+            elif action in ('add', 'update'):
+                rows.append(row)
+                self.index_row(row)
+            else:
+                for position in reversed(matching):
+                    del rows[position]
+                    self.airlines[key].remove(row[10])
+                if not self.airlines.get(key, True):
+                    del self.airlines[key]
+                if not rows:
+                    del routes[key]
+
+        changes = {}
+        for key, (old, fares) in before.items():
+            new = self.route_weights(routes.get(key))
+            if new != old or self.route_fares(routes.get(key)) != fares:
+                changes[key] = (old, new)
+
+        # A new version: the old fingerprint chained with the delta contents
+        self.fingerprint = hashlib.blake2b(self.fingerprint.encode() + data, digest_size=16).hexdigest()
+        self._rows = None
+        if self._compact is not None:
+            self._compact = self._compact.patched({key: new for key, (old, new) in changes.items() if new != old}, self.coordinates)
+        self._airline_edges = None
+        self._constrained.clear()
+        return changes
+
+    # Function to get the rows of every route, built once from the dataset rows
+    def route_rows(self):
+        if self._routes is None:
+            routes = {}
+            for row in self.rows:
+                routes.setdefault((row[0], row[11]), []).append(row)
+            self._routes = routes
+        return self._routes
+
+    # The compact graph weights of a route, from its last row like CSRGraph.from_rows, None without rows
+    def route_weights(self, rows):
+        if not rows:
+            return None
+        return {column: float(rows[-1][column]) for column in WEIGHT_COLUMNS}
+
+    # The weights of every row of a route with its airline, what airline-constrained graphs are built from
+    def route_fares(self, rows):
+        return sorted((row[10], tuple(float(row[column]) for column in WEIGHT_COLUMNS)) for row in rows or ())
+
+    def airport_name(self, iata_code):
+        row = self.airports.get(iata_code)
+        return row[2] if row is not None else None
+
+    def iata_code(self, airport):
+        return self.iata_by_name.get(airport)
+
+    def get_airlines(self, source, destination):
+        return list(self.airlines.get((source, destination), []))
+
+    # Unique values of a column in the order they first appear in the dataset
+    def unique_values(self, column):
+        if column == 4:
+            return list(self.cities_by_country)
+        if column == 3:
+            return list(self.airports_by_city)
+        if column == 2:
+            return list(self.iata_by_name)
+        if column == 0:
+            return list(self.airports)
+        return list(dict.fromkeys(row[column] for row in self.rows))
+
+
+_stores = {}
+
+
+# Function to get the shared store for a dataset, from its snapshot when one is up to date, else parsing the CSV
+# The store is reloaded when the CSV changes on disk, which gives it a new fingerprint
+def get_route_store(dataset='dataset.csv'):
+    store = _stores.get(dataset)
+    if store is None or store.is_stale():
+        from snapshot import load_snapshot
+
+        store = load_snapshot(dataset) or RouteStore(dataset)
+        _stores[dataset] = store
+    return store
@@ -0,0 +1,274 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from constraints import RouteConstraints
+from metrics import QueryTrace, metrics
+from planner import RoutePlanner
+from routestore import get_route_store
+
+METRICS = {'cost': 24, 'distance': 20}  # metric names accepted by the endpoints -> dataset column
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 408: 'Request Timeout',
+           500: 'Internal Server Error', 504: 'Gateway Timeout'}
+
+_worker_planner = None  # RoutePlanner of this worker process
+
+
+def _init_worker(dataset, hierarchy_dir):
+    global _worker_planner
+    _worker_planner = RoutePlanner(dataset, hierarchy_dir=hierarchy_dir)
+    _worker_planner.graph(24)  # Inherited through fork when the parent loaded it, else loaded once here
+
+
+def _ready():
+    return os.getpid()
+
+
+def _cheapest(source, destination, metric, constraints):
+    path, total = _worker_planner.cheapest_path(source, destination, metric, constraints)
+    return {'path': path, 'total': total if path is not None else None}, _worker_planner.last_query
+
+
+def _shortest(source, destination, k, metric, max_stops, constraints):
+    routes = _worker_planner.shortest_paths(source, destination, k, metric, max_stops, constraints)
+    return {'routes': [{'path': path, 'total': total} for path, total in routes]}, _worker_planner.last_query
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class RouteService:
+    """
+    HTTP/JSON front end to the route searches, for tools that cannot use the GUI.
+
+    The dataset is loaded once before the worker processes are forked, so they
+    share it copy-on-write. Searches run in that pool, which keeps the asyncio
+    event loop free to accept requests and answer the cheap lookups itself.
+    A search that takes longer than the timeout gets a 504; its worker still
+    finishes it, and the result is cached there for a retry.
+
+    GET /cheapest?from=SIN&to=LHR[&metric=cost|distance][&max_stops=N][&airline=SQ][&exclude_airline=..][&avoid=..]
+    GET /shortest?from=SIN&to=LHR[&k=3][&metric=distance][&max_stops=N]...
+    GET /airport?iata=SIN | ?name=... | ?country=...[&city=...]
+    GET /health, GET /metrics
+    from and to may list several comma separated IATA codes, e.g. every airport of a city.
+    """
+
+    def __init__(self, dataset='dataset.csv', workers=None, timeout=10.0, hierarchy_dir=None):
+        self.dataset = dataset #20 = distance 24 = cost
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout  # seconds a search may take before the request fails with 504
+        self.hierarchy_dir = hierarchy_dir
+        self.planner = RoutePlanner(dataset)  # for the lookups answered on the event loop
+        self.pool = None
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=8080):
+        get_route_store(self.dataset).compact_graph()  # Load before forking
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        self.pool = ProcessPoolExecutor(self.workers, context, _init_worker, (self.dataset, self.hierarchy_dir))
+        # The pool forks its workers on first use: start them all now, before the listening socket exists,
+        # or they inherit it and the client connections open at the time and keep them from closing
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _ready) for _ in range(self.workers)))
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    # Function to serve the requests of one connection, kept open between requests unless the client closes it
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.timeout)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                except asyncio.TimeoutError:
+                    await self.respond(writer, 408, {'error': "request not received in time"}, close=True)
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                parts = lines[0].split(' ')
+                headers = {name.strip().lower(): value.strip() for name, _, value in (line.partition(':') for line in lines[1:] if line)}
+                close = headers.get('connection', '').lower() == 'close' or (len(parts) == 3 and parts[2] == 'HTTP/1.0')
+                if len(parts) != 3:
+                    await self.respond(writer, 400, {'error': "malformed request line"}, close=True)
+                    break
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self.respond(writer, 400, {'error': "invalid Content-Length"}, close=True)
+                    break
+                if length:
+                    try:
+                        await reader.readexactly(length)  # Bodies are not used, skip them
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        break
+                status, body = await self.dispatch(parts[0], parts[1])
+                await self.respond(writer, status, body, close)
+                if close:
+                    break
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, body, close=False):
+        data = json.dumps(body, default=str).encode('utf-8')
+        writer.write((f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                      f"Content-Length: {len(data)}\r\nConnection: {'close' if close else 'keep-alive'}\r\n\r\n").encode('latin-1') + data)
+        await writer.drain()
+
+    # Function to run a request, returns (status, JSON body)
+    async def dispatch(self, method, target):
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if method != 'GET':
+            return 405, {'error': "only GET is supported"}
+        routes = {'/cheapest': self.cheapest, '/shortest': self.shortest, '/airport': self.airport,
+                  '/health': self.health, '/metrics': self.query_metrics}
+        if url.path not in routes:
+            return 404, {'error': f"no endpoint {url.path}"}
+        try:
+            return 200, await routes[url.path](query)
+        except HTTPError as error:
+            return error.status, {'error': str(error)}
+        except Exception as error:
+            return 500, {'error': f"{type(error).__name__}: {error}"}
+
+    async def cheapest(self, query):
+        source, destination, metric, constraints = self.search_arguments(query, 'cost')
+        return await self.search('cheapest', _cheapest, source, destination, metric, constraints)
+
+    async def shortest(self, query):
+        source, destination, metric, constraints = self.search_arguments(query, 'distance')
+        k = self.integer(query, 'k', 3)
+        if not 1 <= k <= 100:
+            raise HTTPError(400, "k must be between 1 and 100")
+        max_stops = constraints.max_stops if constraints is not None else None
+        return await self.search('shortest', _shortest, source, destination, k, metric, max_stops, constraints)
+
+    # Function to run a search in the worker pool under the request timeout, recorded in the query metrics
+    # Only timed, not profiled: the search runs in another process and other requests share the event loop thread
+    async def search(self, name, func, *arguments):
+        loop = asyncio.get_running_loop()
+        trace = QueryTrace(f'http_{name}', source=arguments[0], destination=arguments[1])
+        try:
+            with trace.stage('search'):
+                try:
+                    result, counters = await asyncio.wait_for(loop.run_in_executor(self.pool, func, *arguments), self.timeout)
+                except asyncio.TimeoutError:
+                    trace.fields['timeout'] = True
+                    raise HTTPError(504, f"search did not finish within {self.timeout}s")
+            trace.annotate('search', **counters)
+        finally:
+            metrics.finish(trace)
+        source, destination = (code if isinstance(code, str) else sorted(code) for code in arguments[:2])
+        return dict(result, source=source, destination=destination)
+
+    # Function to read and check the endpoints, metric and constraints shared by the search endpoints
+    def search_arguments(self, query, default_metric):
+        store = get_route_store(self.dataset)
+        graph = store.compact_graph()
+        endpoints = []
+        for name in ('from', 'to'):
+            codes = [code.strip().upper() for code in query.get(name, '').split(',') if code.strip()]
+            if not codes:
+                raise HTTPError(400, f"missing '{name}' airport")
+            unknown = [code for code in codes if code not in graph]
+            if unknown:
+                raise HTTPError(404, f"unknown airport {', '.join(unknown)}")
+            endpoints.append(codes[0] if len(codes) == 1 else frozenset(codes))
+
+        metric = query.get('metric', default_metric)
+        if metric not in METRICS:
+            raise HTTPError(400, f"metric must be one of {', '.join(METRICS)}")
+        max_stops = self.integer(query, 'max_stops', None)
+        airlines, excluded, avoid = (self.codes(query, name) for name in ('airline', 'exclude_airline', 'avoid'))
+        constraints = None
+        if max_stops is not None or airlines or excluded or avoid:
+            constraints = RouteConstraints(max_stops, airlines, excluded, avoid)
+        return endpoints[0], endpoints[1], METRICS[metric], constraints
+
+    def integer(self, query, name, default):
+        if name not in query:
+            return default
+        try:
+            value = int(query[name])
+        except ValueError:
+            raise HTTPError(400, f"{name} must be an integer")
+        if value < 0:
+            raise HTTPError(400, f"{name} cannot be negative")
+        return value
+
+    # Comma separated codes of a query parameter, upper case
+    def codes(self, query, name):
+        return [code.strip().upper() for code in query.get(name, '').split(',') if code.strip()]
+
+    # Lookups are dictionary reads on the shared store, answered on the event loop
+    async def airport(self, query):
+        store = get_route_store(self.dataset)
+        if 'iata' in query or 'name' in query:
+            code = query['iata'].strip().upper() if 'iata' in query else store.iata_code(query['name'])
+            row = store.airports.get(code)
+            if row is None:
+                raise HTTPError(404, "unknown airport")
+            return {'iata': code, 'name': row[2], 'city': row[3], 'country': row[4],
+                    'latitude': float(row[5]), 'longitude': float(row[6])}
+        if 'country' in query or 'city' in query:
+            if query.get('country') is not None and query['country'] not in store.cities_by_country:
+                raise HTTPError(404, "unknown country")
+            if query.get('city') is not None and query['city'] not in store.airports_by_city:
+                raise HTTPError(404, "unknown city")
+            airports = self.planner.airports_in(query.get('country'), query.get('city'))
+            return {'airports': sorted(airports)}
+        raise HTTPError(400, "give iata, name, country or city")
+
+    async def health(self, query):
+        store = get_route_store(self.dataset)
+        return {'status': 'ok', 'airports': len(store.compact_graph()), 'fingerprint': store.fingerprint, 'workers': self.workers}
+
+    async def query_metrics(self, query):
+        return metrics.snapshot()
+
+
+async def serve(args):
+    service = RouteService(args.dataset, args.workers, args.timeout, args.hierarchy_dir)
+    host, port = await service.start(args.host, args.port)
+    print(f"Serving routes of {args.dataset} on http://{host}:{port} with {service.workers} workers")
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve cheapest path, k shortest paths and airport lookups as JSON over HTTP.")
+    parser.add_argument('--dataset', default='dataset.csv')
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on, localhost only by default")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('-j', '--workers', type=int, default=None, help="search worker processes, defaults to the CPU count")
+    parser.add_argument('--timeout', type=float, default=10.0, help="seconds before a search request fails with 504")
+    parser.add_argument('--hierarchy-dir', default=None, help="directory of prebuilt Contraction Hierarchies (see hierarchy.py)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Binary snapshot of a compiled dataset.csv.
+
+Layout: a 16-byte preamble, a JSON header holding the string tables of the
+RouteStore and a directory of arrays, then the CSR arrays themselves, each
+8-byte aligned so they can be used straight from a read-only memory map.
+"""
+
+
+import json
+import mmap
+import os
+import struct
+import sys
+
+from csrgraph import CSRGraph
+from routestore import RouteStore
+
+MAGIC = b'DSAROUTE'
+VERSION = 2
+PREAMBLE = struct.Struct('<8sII')  # magic, version, header length
+
+
+# Function to get the default snapshot file of a dataset
+def snapshot_path(dataset):
+    return dataset + '.snapshot'
+
+
+# Function to compile a dataset into a snapshot file
+def build_snapshot(dataset='dataset.csv', path=None):
+    path = path or snapshot_path(dataset)
+    store = RouteStore(dataset)
+    graph = store.compact_graph()
+
+    arrays = [('offsets', graph.offsets), ('targets', graph.targets),
+              ('latitudes', graph.latitudes), ('longitudes', graph.longitudes)]
+    arrays += [(f'weights_{column}', values) for column, values in graph.weights.items()]
+
+    header = {
+        'version': VERSION,
+        'codes': graph.codes,
+        'weight_columns': list(graph.weights),
+        'tables': store.tables(),
+        'arrays': {},
+    }
+
+    # Array offsets depend on the header size, so lay the header out until it stops growing
+    header_bytes = b''
+    while True:
+        position = align(PREAMBLE.size + len(header_bytes))
+        for name, values in arrays:
+            header['arrays'][name] = [values.typecode if hasattr(values, 'typecode') else values.format, position, len(values)]
+            position = align(position + len(values) * values.itemsize)
+        encoded = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        if len(encoded) == len(header_bytes):
+            header_bytes = encoded
+            break
+        header_bytes = encoded
+
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)))
+        file.write(header_bytes)
+        for name, values in arrays:
+            file.write(b'\0' * (header['arrays'][name][1] - file.tell()))
+            file.write(values.tobytes())
+    os.replace(temporary, path)  # Readers never see a half-written snapshot
+    return path
+
+
+def align(position):
+    return (position + 7) // 8 * 8
+
+
+# Function to load a dataset's store from its snapshot, None if there is no usable snapshot
+def load_snapshot(dataset='dataset.csv', path=None):
+    path = path or snapshot_path(dataset)
+    try:
+        snapshot_stat = os.stat(path)
+        dataset_stat = os.stat(dataset)
+    except OSError:
+        return None
+    if snapshot_stat.st_mtime_ns < dataset_stat.st_mtime_ns:
+        return None  # The CSV was edited after the snapshot was built
+
+    with open(path, 'rb') as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, header_length = PREAMBLE.unpack_from(buffer, 0)
+    if magic != MAGIC or version != VERSION:
+        buffer.close()
+        return None
+    header = json.loads(buffer[PREAMBLE.size:PREAMBLE.size + header_length])
+    if tuple(header['tables']['signature']) != (dataset_stat.st_size, dataset_stat.st_mtime_ns):
+        buffer.close()  # Built from a different version of the CSV
+        return None
+
+    view = memoryview(buffer)
+    arrays = {}
+    for name, (typecode, position, length) in header['arrays'].items():
+        itemsize = struct.calcsize(typecode)
+        arrays[name] = view[position:position + length * itemsize].cast(typecode)
+
+    weights = {column: arrays[f'weights_{column}'] for column in header['weight_columns']}
+    graph = CSRGraph(header['codes'], arrays['offsets'], arrays['targets'], weights,
+                     arrays['latitudes'], arrays['longitudes'])
+    graph.buffer = buffer  # Keep the memory map open for as long as the graph is alive
+    return RouteStore(dataset, header['tables'], graph)
+
+
+if __name__ == "__main__":
+    dataset = sys.argv[1] if len(sys.argv) > 1 else 'dataset.csv'
+    print(f"Snapshot written to {build_snapshot(dataset)}")
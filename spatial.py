@@ -0,0 +1,86 @@
+import math
+
+import numpy as np
+
+from geodesy import EARTH_RADIUS_KM, haversine_array
+
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+HALF_CIRCUMFERENCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+class SpatialIndex:
+    """
+    Grid index over airport coordinates for radius and k-nearest queries.
+
+    Airports are bucketed into cells of cell_degrees x cell_degrees; a query
+    only measures the airports in the cells its search circle overlaps, using
+    one vectorised haversine call.
+    """
+
+    def __init__(self, geometry, cell_degrees=2.0):
+        self.geometry = geometry
+        self.codes = geometry.codes
+        self.cell_degrees = cell_degrees
+        self.rows = int(math.ceil(180 / cell_degrees)) + 1
+        self.columns = int(math.ceil(360 / cell_degrees))
+
+        known = np.flatnonzero(~np.isnan(geometry.latitudes))
+        cells = {}
+        for node, row, column in zip(known.tolist(), *self.cell_of(geometry.latitudes[known], geometry.longitudes[known])):
+            cells.setdefault((row, column), []).append(node)
+        self.cells = {cell: np.array(nodes, dtype=np.int64) for cell, nodes in cells.items()}
+
+    def cell_of(self, latitudes, longitudes):
+        rows = np.floor((np.asarray(latitudes) + 90) / self.cell_degrees).astype(np.int64).tolist()
+        columns = (np.floor((np.asarray(longitudes) + 180) / self.cell_degrees).astype(np.int64) % self.columns).tolist()
+        return rows, columns
+
+    # Function to get the ids of every airport in the cells overlapping a circle
+    def candidates(self, latitude, longitude, km):
+        if km >= HALF_CIRCUMFERENCE_KM:
+            return np.concatenate(list(self.cells.values())) if self.cells else np.empty(0, np.int64)
+
+        span = km / KM_PER_DEGREE
+        lowest = math.floor((max(latitude - span, -90) + 90) / self.cell_degrees)
+        highest = math.floor((min(latitude + span, 90) + 90) / self.cell_degrees)
+        # Longitude degrees shrink towards the poles; near them every column is searched
+        widest = max(abs(latitude) + span, 0)
+        if widest >= 89.9:
+            columns = range(self.columns)
+        else:
+            lon_span = span / math.cos(math.radians(widest))
+            first = math.floor((longitude - lon_span + 180) / self.cell_degrees)
+            last = math.floor((longitude + lon_span + 180) / self.cell_degrees)
+            columns = {column % self.columns for column in range(first, last + 1)}
+
+        found = [self.cells[(row, column)] for row in range(lowest, highest + 1) for column in columns if (row, column) in self.cells]
+        return np.concatenate(found) if found else np.empty(0, np.int64)
+
+    # Function to get every airport within km of a point as (IATA code, km), nearest first
+    def within(self, latitude, longitude, km):
+        nodes = self.candidates(latitude, longitude, km)
+        distances = haversine_array(self.geometry.latitudes[nodes], self.geometry.longitudes[nodes], latitude, longitude)
+        inside = distances <= km
+        nodes, distances = nodes[inside], distances[inside]
+        order = np.argsort(distances, kind='stable')
+        return [(self.codes[node], float(distance)) for node, distance in zip(nodes[order].tolist(), distances[order].tolist())]
+
+    # Function to get the k airports closest to a point as (IATA code, km), nearest first
+    def nearest(self, latitude, longitude, k=1):
+        km = self.cell_degrees * KM_PER_DEGREE
+        while True:
+            found = self.within(latitude, longitude, km)
+            # Everything inside the circle has been measured, so the first k are the true k nearest
+            if len(found) >= k or km >= HALF_CIRCUMFERENCE_KM:
+                return found[:k]
+            km *= 2
+
+    # Function to get the IATA codes within km of a city, measured from the centre of its airports
+    def near_city(self, store, city, km):
+        airports = [store.iata_code(name) for name in store.airports_by_city.get(city, [])]
+        coordinates = [store.coordinates[code] for code in airports if code in store.coordinates]
+        if not coordinates:
+            return set()
+        latitude = sum(latitude for latitude, _ in coordinates) / len(coordinates)
+        longitude = sum(longitude for _, longitude in coordinates) / len(coordinates)
+        return {code for code, _ in self.within(latitude, longitude, km)} | set(airports)
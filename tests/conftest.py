@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import generate_dataset  # noqa: E402
+
+
+# A small synthetic route network with the dataset.csv column layout, airports AAA, AAB, ...
+@pytest.fixture
+def dataset(tmp_path):
+    path = str(tmp_path / 'dataset.csv')
+    generate_dataset(path, 60, seed=1, hub_every=10)
+    return path
@@ -0,0 +1,71 @@
+import threading
+
+from accountstore import FIRST_ACCOUNT_NO, AccountStore
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        file.write('AccountNo,Username,Password\n')
+        for row in rows:
+            file.write(','.join(map(str, row)) + '\n')
+
+
+def test_create_and_authenticate(tmp_path):
+    store = AccountStore(str(tmp_path / 'account.db'), legacy_csv=None)
+    assert store.create('alice', 'secret') == FIRST_ACCOUNT_NO
+    assert store.create('bob', 'hunter2') == FIRST_ACCOUNT_NO + 1
+    assert store.password('alice') == 'secret'
+    assert store.password('bob') == 'hunter2'
+    assert store.password('carol') is None
+    assert 'alice' in store and 'carol' not in store
+    store.close()
+
+    # Accounts are kept in the database file
+    store = AccountStore(str(tmp_path / 'account.db'), legacy_csv=None)
+    assert store.password('alice') == 'secret'
+    store.close()
+
+
+def test_duplicate_username_is_rejected(tmp_path):
+    store = AccountStore(str(tmp_path / 'account.db'), legacy_csv=None)
+    assert store.create('alice', 'secret') is not None
+    assert store.create('alice', 'other') is None
+    assert store.password('alice') == 'secret'
+    store.close()
+
+
+def test_concurrent_signups_get_distinct_account_numbers(tmp_path):
+    store = AccountStore(str(tmp_path / 'account.db'), legacy_csv=None)
+    results = []
+
+    def sign_up(name):
+        results.append(store.create(name, 'password'))
+
+    threads = [threading.Thread(target=sign_up, args=(f'user{number}',)) for number in range(20)]
+    threads += [threading.Thread(target=sign_up, args=('same',)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    numbers = [number for number in results if number is not None]
+    assert len(numbers) == len(set(numbers)) == 21
+    store.close()
+
+
+def test_legacy_csv_is_migrated_once(tmp_path):
+    legacy = tmp_path / 'account.csv'
+    write_csv(legacy, [(1000001, 'alice', 'secret'), (1000007, 'bob', 'hunter2')])
+    store = AccountStore(str(tmp_path / 'account.db'), str(legacy))
+    assert store.password('alice') == 'secret'
+    assert store.password('bob') == 'hunter2'
+    assert store.create('carol', 'pw') == 1000008  # Numbers continue after the highest migrated one
+    assert store.create('alice', 'again') is None
+    store.close()
+
+    # Opened again, accounts added to the CSV since are not copied over the database
+    write_csv(legacy, [(1000001, 'alice', 'changed'), (1000002, 'dave', 'pw')])
+    store = AccountStore(str(tmp_path / 'account.db'), str(legacy))
+    assert store.password('alice') == 'secret'
+    assert store.password('dave') is None
+    assert store.password('carol') == 'pw'
+    store.close()
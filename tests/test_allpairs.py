@@ -0,0 +1,37 @@
+import pytest
+
+from allpairs import AllPairsMatrix
+from astar import Astar
+from routestore import get_route_store
+
+
+# Every cost and path of the matrices against a single-source Dijkstra from each airport
+def check_against_dijkstra(matrix, graph):
+    a_star = Astar()
+    for source in graph.graph.codes:
+        expected = a_star.run_single_source(graph, source, graph.graph.codes)
+        for destination, (expected_path, expected_cost) in expected.items():
+            path, cost = matrix.path(source, destination)
+            assert matrix.cost(source, destination) == pytest.approx(expected_cost)
+            if expected_path is None:
+                assert path is None
+                continue
+            assert cost == pytest.approx(expected_cost)
+            assert (path[0], path[-1]) == (source, destination)
+            assert sum(graph.weight(path[i], path[i + 1]) for i in range(len(path) - 1)) == pytest.approx(cost)
+
+
+@pytest.mark.parametrize('metric', [24, 20])
+def test_matrices_match_dijkstra(dataset, metric):
+    graph = get_route_store(dataset).compact_graph().weighted(metric)
+    check_against_dijkstra(AllPairsMatrix.build(graph, block_rows=7), graph)
+
+
+def test_saved_matrices_load_memory_mapped(dataset, tmp_path):
+    store = get_route_store(dataset)
+    graph = store.compact_graph().weighted(24)
+    AllPairsMatrix.build(graph, str(tmp_path), store.fingerprint, block_rows=16)
+    matrix = AllPairsMatrix.load(str(tmp_path), 24)
+    assert matrix.fingerprint == store.fingerprint
+    check_against_dijkstra(matrix, graph)
+    assert matrix.path('AAA', 'ZZZ') == (None, float('inf'))
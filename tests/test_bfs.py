@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from bfs import BFS
+from routestore import get_route_store
+
+
+# Function to list every loopless path from source to destination with its weight, lightest first
+def all_paths(edges, source, destination, max_stops=None):
+    found = []
+    stack = [([source], 0.0)]
+    while stack:
+        path, weight = stack.pop()
+        if path[-1] == destination:
+            found.append((path, weight))
+            continue
+        if max_stops is not None and len(path) > max_stops + 1:
+            continue
+        for neighbor, edge_weight in edges(path[-1]):
+            if neighbor not in path:
+                stack.append((path + [neighbor], weight + edge_weight))
+    return sorted(found, key=lambda item: item[1])
+
+
+def random_graph(seed, nodes=8, density=0.4):
+    generator = random.Random(seed)
+    codes = [f'A{node}' for node in range(nodes)]
+    return {source: {target: round(generator.uniform(1, 100), 2) for target in codes
+                     if target != source and generator.random() < density} for source in codes}
+
+
+# The paths must come lightest first, loopless, within the stop limit and with their own weights
+def check(paths, expected, edges, max_stops):
+    assert [weight for _, weight in paths] == pytest.approx([weight for _, weight in expected])
+    assert len({tuple(path) for path, _ in paths}) == len(paths)
+    for path, weight in paths:
+        assert len(set(path)) == len(path)
+        assert max_stops is None or len(path) - 2 <= max_stops
+        assert sum(dict(edges(path[i]))[path[i + 1]] for i in range(len(path) - 1)) == pytest.approx(weight)
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('max_stops', [None, 0, 1, 2])
+def test_k_shortest_paths_match_brute_force(seed, max_stops):
+    graph = random_graph(seed)
+    edges = lambda node: graph.get(node, {}).items()
+    expected = all_paths(edges, 'A0', 'A7', max_stops)
+    paths = list(BFS().iter_shortest_paths(graph, 'A0', 'A7', max_stops))
+    check(paths, expected, edges, max_stops)
+
+    # Seeded with the shortest path, the rest is found the same way
+    if expected:
+        seeded = list(BFS().iter_shortest_paths(graph, 'A0', 'A7', max_stops, first=expected[0]))
+        check(seeded, expected, edges, max_stops)
+    assert BFS().run_bfs(graph, 'A0', 'A7', 3, max_stops) == [path for path, _ in paths[:3]]
+
+
+@pytest.mark.parametrize('max_stops', [1, 2])
+def test_k_shortest_paths_on_the_compact_graph(dataset, max_stops):
+    compact = get_route_store(dataset).compact_graph()
+    graph = compact.weighted(20)
+    for destination in compact.codes[1:20]:
+        expected = all_paths(graph.edges, graph.index['AAA'], graph.index[destination], max_stops)[:5]
+        paths = list(BFS().iter_shortest_paths(graph, 'AAA', destination, max_stops))[:5]
+        assert [weight for _, weight in paths] == pytest.approx([weight for _, weight in expected])
+        assert all(len(path) - 2 <= max_stops for path, _ in paths)
@@ -0,0 +1,34 @@
+from hierarchy import ContractionHierarchy
+from planner import RoutePlanner
+from routestore import get_route_store
+
+
+def test_hierarchy_matches_astar(dataset):
+    store = get_route_store(dataset)
+    for metric in (24, 20):
+        graph = store.compact_graph().weighted(metric)
+        hierarchy = ContractionHierarchy.build(graph, store.fingerprint)
+        report = hierarchy.verify(graph, samples=300)
+        assert report['mismatches'] == []
+        assert report['pairs'] == 300
+
+
+# A core left uncontracted must still give the same paths
+def test_hierarchy_with_a_core_matches_astar(dataset):
+    store = get_route_store(dataset)
+    graph = store.compact_graph().weighted(24)
+    hierarchy = ContractionHierarchy.build(graph, store.fingerprint, core_degree=4)
+    assert len(set(hierarchy.ranks)) < len(hierarchy.ranks)
+    assert hierarchy.verify(graph, samples=300)['mismatches'] == []
+
+
+# The planner only uses a saved hierarchy that was timed faster than Astar
+def test_planner_uses_hierarchy_only_when_faster(dataset, tmp_path):
+    store = get_route_store(dataset)
+    hierarchy = ContractionHierarchy.build(store.compact_graph().weighted(24), store.fingerprint)
+    for timings, engine in ((None, 'a_star'), ((2.0, 1.0), 'a_star'), ((0.5, 1.0), 'hierarchy')):
+        hierarchy.timings = timings
+        hierarchy.save(str(tmp_path))
+        planner = RoutePlanner(dataset, hierarchy_dir=str(tmp_path))
+        planner.cheapest_path('AAA', 'AAY')
+        assert planner.last_query['engine'] == engine
@@ -0,0 +1,67 @@
+import random
+from array import array
+
+import pytest
+
+from csrgraph import CSRGraph
+from pareto import Pareto
+from routestore import get_route_store
+
+
+def random_graph(seed, nodes=8, density=0.45):
+    generator = random.Random(seed)
+    codes = [f'A{node}' for node in range(nodes)]
+    offsets, targets, costs, distances = [0], [], [], []
+    for source in range(nodes):
+        for target in range(nodes):
+            if target != source and generator.random() < density:
+                targets.append(target)
+                costs.append(float(generator.randint(1, 20)))  # Small integers, so equal totals happen
+                distances.append(float(generator.randint(1, 20)))
+        offsets.append(len(targets))
+    return CSRGraph(codes, array('i', offsets), array('i', targets), {24: array('d', costs), 20: array('d', distances)})
+
+
+# Function to get the (cost, distance, legs) of every loopless path no other path is at least as good as on all three
+def brute_force_frontier(graph, source, destination, max_legs=None):
+    start, goal = graph.index[source], graph.index[destination]
+    totals = set()
+    stack = [([start], 0.0, 0.0)]
+    while stack:
+        path, cost, distance = stack.pop()
+        node = path[-1]
+        if node == goal:
+            totals.add((cost, distance, len(path) - 1))
+            continue
+        if max_legs is not None and len(path) - 1 >= max_legs:
+            continue
+        for position in range(graph.offsets[node], graph.offsets[node + 1]):
+            target = graph.targets[position]
+            if target not in path:
+                stack.append((path + [target], cost + graph.weights[24][position], distance + graph.weights[20][position]))
+    return {label for label in totals
+            if not any(other != label and all(a <= b for a, b in zip(other, label)) for other in totals)}
+
+
+def check(graph, source, destination, max_legs):
+    routes = Pareto().run_pareto(graph, source, destination, max_labels=None, max_legs=max_legs)
+    assert {(cost, distance, legs) for _, cost, distance, legs in routes} == brute_force_frontier(graph, source, destination, max_legs)
+    assert len(routes) == len({(cost, distance, legs) for _, cost, distance, legs in routes})
+    assert [cost for _, cost, _, _ in routes] == sorted(cost for _, cost, _, _ in routes)
+    for path, cost, distance, legs in routes:
+        assert (path[0], path[-1], len(path) - 1) == (source, destination, legs)
+        weights = [graph.weighted(column) for column in (24, 20)]
+        assert sum(weights[0].weight(path[i], path[i + 1]) for i in range(legs)) == pytest.approx(cost)
+        assert sum(weights[1].weight(path[i], path[i + 1]) for i in range(legs)) == pytest.approx(distance)
+
+
+@pytest.mark.parametrize('seed', range(25))
+@pytest.mark.parametrize('max_legs', [None, 1, 2, 3])
+def test_frontier_matches_brute_force(seed, max_legs):
+    check(random_graph(seed), 'A0', 'A7', max_legs)
+
+
+def test_frontier_on_the_compact_graph(dataset):
+    graph = get_route_store(dataset).compact_graph()
+    for destination in graph.codes[1:20]:
+        check(graph, 'AAA', destination, 3)
@@ -0,0 +1,61 @@
+import csv
+
+from batch import BatchPlanner
+from constraints import RouteConstraints
+from planner import RoutePlanner
+
+
+# The cheapest path and the k=1 shortest path share source, destination and metric but not their
+# result shape, each must be answered from its own cache entry in either order
+def test_cheapest_and_single_shortest_path_do_not_share_cache_entries(dataset):
+    planner = RoutePlanner(dataset)
+    path, total = planner.cheapest_path('AAA', 'AAY', 20)
+    assert planner.shortest_paths('AAA', 'AAY', k=1, metric=20) == [(path, total)]
+    assert planner.cheapest_path('AAA', 'AAY', 20) == (path, total)
+
+    planner = RoutePlanner(dataset)
+    routes = planner.shortest_paths('AAA', 'AAY', k=1, metric=20)
+    assert planner.cheapest_path('AAA', 'AAY', 20) == routes[0]
+    assert planner.shortest_paths('AAA', 'AAY', k=1, metric=20) == routes
+
+
+# AAA -> AAF is flown by BA and JL at different fares, a search restricted to one airline pays that airline's fare
+def test_airline_constraint_uses_the_allowed_airlines_fare(dataset):
+    planner = RoutePlanner(dataset)
+    assert planner.cheapest_path('AAA', 'AAF', 24, RouteConstraints(0, ['JL'])) == (['AAA', 'AAF'], 166.44)
+    assert planner.cheapest_path('AAA', 'AAF', 24, RouteConstraints(0, excluded_airlines=['BA'])) == (['AAA', 'AAF'], 166.44)
+    assert planner.cheapest_path('AAA', 'AAF', 24, RouteConstraints(0, ['BA', 'JL'])) == (['AAA', 'AAF'], 130.86)
+
+
+# The batch cheapest path keeps to the stop limit like RoutePlanner.cheapest_path
+def test_batch_cheapest_path_respects_max_stops(dataset):
+    planner = RoutePlanner(dataset)
+    pairs = [('AAA', code) for code in planner.store.compact_graph().codes if code != 'AAA']
+    for result in BatchPlanner(dataset, k=1, max_stops=0).plan(pairs):
+        path, cost = planner.cheapest_path(result['source'], result['destination'], 24, RouteConstraints(0))
+        assert result['cheapest_path'] == path
+        assert result['cheapest_cost'] == (round(cost, 2) if path is not None else None)
+
+
+# Repricing an airline other than the one the compact graph keeps must still drop results searched with that airline
+def test_delta_repricing_another_airline_drops_airline_constrained_results(dataset, tmp_path):
+    planner = RoutePlanner(dataset)
+    constraints = RouteConstraints(0, ['BA'])
+    assert planner.cheapest_path('AAA', 'AAF', 24, constraints) == (['AAA', 'AAF'], 130.86)
+    assert planner.cheapest_path('AAA', 'AAF', 24, RouteConstraints(0)) == (['AAA', 'AAF'], 166.44)  # JL's row is the one kept
+
+    row = next(row for row in planner.store.rows if (row[0], row[10], row[11]) == ('AAA', 'BA', 'AAF'))
+    delta = tmp_path / 'delta.csv'
+    with open(dataset, newline='', encoding='utf-8') as file:
+        header = next(csv.reader(file))
+    with open(delta, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(header + ['action'])
+        writer.writerow(row[:24] + ['1.00'] + row[25:] + ['update'])
+
+    changes = planner.apply_delta(str(delta))
+    assert ('AAA', 'AAF') in changes
+    assert planner.cheapest_path('AAA', 'AAF', 24, constraints) == (['AAA', 'AAF'], 1.0)
+    assert not planner.last_query['cached']
+    assert planner.cheapest_path('AAA', 'AAF', 24, RouteConstraints(0)) == (['AAA', 'AAF'], 166.44)
+    assert planner.last_query['cached']  # Unconstrained results only depend on the row kept
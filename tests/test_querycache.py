@@ -0,0 +1,63 @@
+import querycache
+from querycache import QueryCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(maxsize=2)
+    cache.put('a', 1, 'v1')
+    cache.put('b', 2, 'v1')
+    assert cache.get('a', 'v1') == (True, 1)  # b is now the least recently used
+    cache.put('c', 3, 'v1')
+    assert cache.get('b', 'v1') == (False, None)
+    assert cache.get('a', 'v1') == (True, 1)
+    assert cache.get('c', 'v1') == (True, 3)
+    stats = cache.stats()
+    assert (stats['size'], stats['evictions'], stats['hits'], stats['misses']) == (2, 1, 3, 1)
+    assert stats['hit_rate'] == 0.75
+
+
+def test_entries_expire_after_the_time_to_live(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(querycache, 'time', clock)
+    cache = QueryCache(ttl=10)
+    cache.put('a', 1, 'v1')
+    clock.now += 10
+    assert cache.get('a', 'v1') == (True, 1)
+    clock.now += 0.5
+    assert cache.get('a', 'v1') == (False, None)
+    assert len(cache) == 0
+    assert (cache.stats()['expirations'], cache.stats()['misses']) == (1, 1)
+
+
+def test_a_new_fingerprint_drops_every_entry():
+    cache = QueryCache()
+    cache.put('a', 1, 'v1')
+    cache.put('b', 2, 'v1')
+    assert cache.get('a', 'v2') == (False, None)
+    assert len(cache) == 0
+    assert cache.stats()['invalidations'] == 1
+    cache.get('a', 'v3')  # Nothing left to drop, not counted
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_carry_over_keeps_the_accepted_entries():
+    cache = QueryCache()
+    cache.put('a', 1, 'v1')
+    cache.put('b', 2, 'v1')
+    cache.carry_over('v1', 'v2', lambda key, value: key == 'a')
+    assert cache.get('a', 'v2') == (True, 1)
+    assert cache.get('b', 'v2') == (False, None)
+    assert (cache.stats()['dropped'], cache.stats()['invalidations']) == (1, 0)
+
+    # Entries of another version than the old one cannot be carried over
+    cache.carry_over('v1', 'v3', lambda key, value: True)
+    assert cache.get('a', 'v3') == (False, None)
+    assert cache.stats()['invalidations'] == 1
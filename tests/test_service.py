@@ -0,0 +1,38 @@
+import asyncio
+import json
+
+import pytest
+
+from service import RouteService
+
+
+# Function to send raw requests to the handler of a service on a free local port, returns the responses
+async def exchange(service, *requests):
+    server = await asyncio.start_server(service.handle, '127.0.0.1', 0)
+    host, port = server.sockets[0].getsockname()[:2]
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(b''.join(requests))
+        await writer.drain()
+        data = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+    finally:
+        server.close()
+        await server.wait_closed()
+    return data.decode('latin-1')
+
+
+@pytest.mark.parametrize('length', [b'abc', b'-5'])
+def test_invalid_content_length_gets_400_and_closes(dataset, length):
+    response = asyncio.run(exchange(RouteService(dataset, workers=1), b'GET /health HTTP/1.1\r\nContent-Length: ' + length + b'\r\n\r\n'))
+    head, _, body = response.partition('\r\n\r\n')
+    assert head.startswith('HTTP/1.1 400 ')
+    assert 'Connection: close' in head
+    assert json.loads(body) == {'error': "invalid Content-Length"}
+
+
+def test_body_is_skipped_before_the_next_request(dataset):
+    response = asyncio.run(exchange(RouteService(dataset, workers=1),
+                                    b'GET /health HTTP/1.1\r\nContent-Length: 4\r\n\r\nbody',
+                                    b'GET /health HTTP/1.1\r\nConnection: close\r\n\r\n'))
+    assert response.count('HTTP/1.1 200 OK') == 2
@@ -0,0 +1,52 @@
+import json
+import os
+
+from routestore import RouteStore
+from snapshot import PREAMBLE, VERSION, build_snapshot, load_snapshot
+
+
+def plain(tables):
+    return json.loads(json.dumps(tables))
+
+
+def test_snapshot_round_trip(dataset):
+    path = build_snapshot(dataset)
+    store = load_snapshot(dataset, path)
+    parsed = RouteStore(dataset)
+    assert store is not None
+    assert store.fingerprint == parsed.fingerprint
+    assert plain(store.tables()) == plain(parsed.tables())
+
+    graph, expected = store.compact_graph(), parsed.compact_graph()
+    assert graph.codes == expected.codes
+    for name in ('offsets', 'targets', 'latitudes', 'longitudes'):
+        assert list(getattr(graph, name)) == list(getattr(expected, name))
+    assert list(graph.weights) == list(expected.weights)
+    for column in expected.weights:
+        assert list(graph.weights[column]) == list(expected.weights[column])
+    assert store.get_airlines('AAA', 'AAF') == parsed.get_airlines('AAA', 'AAF')
+
+
+def test_snapshot_of_another_version_is_not_used(dataset):
+    path = build_snapshot(dataset)
+    with open(path, 'r+b') as file:
+        magic, _, header_length = PREAMBLE.unpack(file.read(PREAMBLE.size))
+        file.seek(0)
+        file.write(PREAMBLE.pack(magic, VERSION + 1, header_length))
+    assert load_snapshot(dataset, path) is None
+
+
+def test_snapshot_of_another_csv_is_not_used(dataset):
+    path = build_snapshot(dataset)
+    with open(dataset, 'a', encoding='utf-8') as file:
+        file.write('\n')
+    assert load_snapshot(dataset, path) is None  # The CSV is newer
+
+    # Same or older modification time, but not the CSV the snapshot was built from
+    modified = os.stat(path).st_mtime_ns
+    os.utime(dataset, ns=(modified, modified))
+    assert load_snapshot(dataset, path) is None
+
+
+def test_missing_snapshot_is_not_used(dataset):
+    assert load_snapshot(dataset) is None
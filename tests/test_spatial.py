@@ -0,0 +1,60 @@
+import math
+import random
+from array import array
+
+import pytest
+
+from csrgraph import CSRGraph
+from geodesy import haversine
+from spatial import SpatialIndex
+
+# Airports straddling the antimeridian and close to both poles, plus random ones and one without coordinates
+PLACES = [(10.0, 179.9), (10.0, -179.9), (10.5, 179.0), (-5.0, -179.5), (89.5, 0.0), (89.6, 120.0), (89.2, -150.0),
+          (88.0, 60.0), (-88.5, 10.0), (-89.9, -170.0), (-87.0, 179.0), (51.5, -0.1), (1.35, 103.99)]
+
+
+@pytest.fixture(scope='module')
+def places():
+    generator = random.Random(0)
+    coordinates = PLACES + [(math.degrees(math.asin(generator.uniform(-1, 1))), generator.uniform(-180, 180)) for _ in range(300)]
+    return coordinates + [(math.nan, math.nan)]
+
+
+@pytest.fixture(scope='module')
+def index(places):
+    codes = [f'P{node:03d}' for node in range(len(places))]
+    graph = CSRGraph(codes, array('i', [0] * (len(codes) + 1)), array('i'), {},
+                     array('d', [latitude for latitude, _ in places]), array('d', [longitude for _, longitude in places]))
+    return SpatialIndex(graph.geometry())
+
+
+def brute_force(places, latitude, longitude):
+    found = [(f'P{node:03d}', haversine(latitude, longitude, *place)) for node, place in enumerate(places) if not math.isnan(place[0])]
+    return sorted(found, key=lambda item: item[1])
+
+
+QUERIES = [(10.0, 180.0), (10.0, -179.99), (-5.0, 179.8), (89.9, 45.0), (90.0, 0.0), (-89.5, 100.0), (-86.0, -179.0),
+           (51.0, 0.0), (0.0, 0.0)]
+
+
+@pytest.mark.parametrize('latitude, longitude', QUERIES)
+@pytest.mark.parametrize('km', [50, 300, 1500, 25000])
+def test_within_matches_brute_force(index, places, latitude, longitude, km):
+    expected = [(code, distance) for code, distance in brute_force(places, latitude, longitude) if distance <= km]
+    found = index.within(latitude, longitude, km)
+    assert [code for code, _ in found] == [code for code, _ in expected]
+    assert [distance for _, distance in found] == pytest.approx([distance for _, distance in expected])
+
+
+@pytest.mark.parametrize('latitude, longitude', QUERIES)
+@pytest.mark.parametrize('k', [1, 3, 10])
+def test_nearest_matches_brute_force(index, places, latitude, longitude, k):
+    expected = brute_force(places, latitude, longitude)[:k]
+    found = index.nearest(latitude, longitude, k)
+    assert [distance for _, distance in found] == pytest.approx([distance for _, distance in expected])
+    assert [code for code, _ in found] == [code for code, _ in expected]
+
+
+def test_airports_across_the_antimeridian_are_neighbours(index):
+    codes = [code for code, _ in index.within(10.0, 180.0, 100)]
+    assert codes[:2] == ['P000', 'P001'] or codes[:2] == ['P001', 'P000']
@@ -0,0 +1,68 @@
+import csv
+
+import pytest
+
+from timetable import Timetable, generate_timetable, to_iso, to_minutes
+
+
+# A departure after the window can arrive earlier than ones inside it, which the profile must then leave out
+def test_profile_matches_earliest_arrivals(dataset, tmp_path):
+    path = str(tmp_path / 'timetable.csv')
+    generate_timetable(dataset, path, days=4)
+    report = Timetable(path).verify_profile(60, hours=12)
+    assert report['mismatches'] == []
+
+
+# Function to write a timetable of (source, destination, airline, flight, departure, arrival) rows on 2025-01-06
+def write_timetable(path, flights):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['source_iata', 'destination_iata', 'airline', 'flight', 'departure', 'arrival'])
+        for source, destination, airline, flight, departure, arrival in flights:
+            writer.writerow([source, destination, airline, flight, f'2025-01-06T{departure}', f'2025-01-06T{arrival}'])
+    return Timetable(str(path))
+
+
+def profile(timetable, start, end, source='AAA', destination='BBB'):
+    found = timetable.profile(source, destination, to_minutes(f'2025-01-06T{start}'), to_minutes(f'2025-01-06T{end}'))
+    return [(to_iso(leaves)[11:], to_iso(arrival)[11:]) for leaves, arrival, _ in found]
+
+
+@pytest.mark.parametrize('later', ['10:00', '09:01'])
+def test_departure_after_the_window_removes_the_ones_it_beats(tmp_path, later):
+    timetable = write_timetable(tmp_path / 'timetable.csv', [
+        ('AAA', 'BBB', 'XX', '1', '08:00', '12:00'),
+        ('AAA', 'BBB', 'XX', '2', '08:30', '10:30'),  # Arrives before the later flight, kept
+        ('AAA', 'BBB', 'XX', '3', later, '11:00'),  # Leaves after the window, arrives before flight 1
+    ])
+    assert profile(timetable, '07:00', '09:00') == [('08:30', '10:30')]
+
+
+def test_connection_after_the_window_removes_the_ones_it_beats(tmp_path):
+    timetable = write_timetable(tmp_path / 'timetable.csv', [
+        ('AAA', 'BBB', 'XX', '1', '08:00', '14:00'),
+        ('AAA', 'CCC', 'XX', '2', '09:30', '10:00'),
+        ('CCC', 'BBB', 'YY', '3', '11:00', '12:00'),  # After the 45 minute connection time
+    ])
+    assert profile(timetable, '07:00', '09:00') == []
+    assert profile(timetable, '07:00', '09:30') == [('09:30', '12:00')]
+
+
+def test_departure_at_the_window_end_is_kept(tmp_path):
+    timetable = write_timetable(tmp_path / 'timetable.csv', [
+        ('AAA', 'BBB', 'XX', '1', '08:00', '12:00'),
+        ('AAA', 'BBB', 'XX', '2', '09:00', '11:00'),
+        ('AAA', 'BBB', 'XX', '3', '09:30', '11:30'),
+    ])
+    assert profile(timetable, '07:00', '09:00') == [('09:00', '11:00')]
+    assert profile(timetable, '07:00', '08:59') == []  # Flight 2 just outside still beats flight 1
+    assert profile(timetable, '08:00', '10:00') == [('09:00', '11:00'), ('09:30', '11:30')]
+
+
+# A later departure arriving at the same time leaves the earlier one out too
+def test_equal_arrival_after_the_window_removes_the_earlier_departure(tmp_path):
+    timetable = write_timetable(tmp_path / 'timetable.csv', [
+        ('AAA', 'BBB', 'XX', '1', '08:00', '11:00'),
+        ('AAA', 'BBB', 'XX', '2', '10:00', '11:00'),
+    ])
+    assert profile(timetable, '07:00', '09:00') == []
@@ -0,0 +1,430 @@
+import argparse
+import bisect
+import csv
+import heapq
+import random
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+HEADER = ['source_iata', 'destination_iata', 'airline', 'flight', 'departure', 'arrival']
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+THROUGH_FLIGHT_GROUND = 6 * 60  # longest stop, in minutes, for two legs with one flight number to be one trip
+
+
+# Function to convert an ISO 8601 time to minutes since 1970, times without a zone are taken as UTC
+def to_minutes(text):
+    moment = datetime.fromisoformat(text.strip())
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int((moment - EPOCH).total_seconds() // 60)
+
+
+def to_iso(minutes):
+    return datetime.fromtimestamp(int(minutes) * 60, timezone.utc).strftime('%Y-%m-%dT%H:%M')
+
+
+class Timetable:
+    """
+    Scheduled flights as connections sorted by departure, for the Connection Scan Algorithm.
+
+    The CSV has one row per flight leg: source and destination IATA codes (the
+    same codes as dataset.csv), the airline (as in column 10), a flight number
+    and ISO 8601 departure and arrival times, taken as UTC without a zone.
+    Consecutive legs of one airline and flight number make a trip, so a
+    through flight can be stayed on; changing flights at an airport takes at
+    least its minimum connection time.
+
+    An earliest-arrival query is one forward sweep over the connections from the
+    departure time, stopping as soon as no later connection can arrive earlier.
+    A profile query is one backward sweep giving every useful (departure,
+    arrival) pair in a window: no other option leaves later and arrives sooner.
+    In pure Python neither sweep is faster than the alternative: a scan takes
+    about as long as Dijkstra on the time-expanded graph, and a profile about as
+    long as chaining earliest-arrival queries from just after each departure
+    found. verify and verify_profile time both.
+    """
+
+    def __init__(self, path, min_connection=45, connection_times=None):
+        self.path = path
+        self.min_connection = min_connection  # minutes needed to change flights when an airport has no own time
+        self.connection_times = connection_times or {}  # IATA -> minimum connection minutes
+        self.codes = []
+        self.index = {}  # IATA -> stop id
+        self.airlines = []
+        self.stats = {}
+        self.load()
+
+    def load(self):
+        rows = []
+        with open(self.path, 'r', newline='', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            next(reader, None)  # Skip the header row
+            for row in reader:
+                if len(row) < 6:
+                    continue
+                departure, arrival = to_minutes(row[4]), to_minutes(row[5])
+                if arrival < departure:
+                    raise ValueError(f"{self.path}: flight {row[2]}{row[3]} {row[0]}-{row[1]} arrives before it departs")
+                rows.append((departure, arrival, self.stop(row[0]), self.stop(row[1]), row[2].strip(), row[3].strip()))
+        rows.sort(key=lambda row: (row[0], row[1]))
+
+        airline_ids = {}
+        self.departures = np.array([row[0] for row in rows], dtype=np.int64)
+        self.arrivals = np.array([row[1] for row in rows], dtype=np.int64)
+        self.sources = np.array([row[2] for row in rows], dtype=np.int32)
+        self.destinations = np.array([row[3] for row in rows], dtype=np.int32)
+        self.airline_ids = np.array([airline_ids.setdefault(row[4], len(airline_ids)) for row in rows], dtype=np.int32)
+        self.airlines = list(airline_ids)
+        self.numbers = [row[5] for row in rows]
+
+        # Chain the legs of each flight number into trips: the next leg leaves from where the last one landed, soon after
+        self.trips = np.empty(len(rows), dtype=np.int32)
+        self.previous_leg = np.full(len(rows), -1, dtype=np.int64)  # connection before this one on its trip, -1 if boarded here
+        self.next_leg = np.full(len(rows), -1, dtype=np.int64)
+        last_leg = {}  # (airline, flight number) -> last connection of its current trip
+        trip_count = 0
+        for connection, (departure, arrival, source, destination, airline, number) in enumerate(rows):
+            before = last_leg.get((airline, number))
+            if before is not None and rows[before][3] == source and rows[before][1] <= departure <= rows[before][1] + THROUGH_FLIGHT_GROUND:
+                self.trips[connection] = self.trips[before]
+                self.previous_leg[connection] = before
+                self.next_leg[before] = connection
+            else:
+                self.trips[connection] = trip_count
+                trip_count += 1
+            last_leg[(airline, number)] = connection
+        self.trip_count = trip_count
+        self.transfer = np.array([self.connection_times.get(code, self.min_connection) for code in self.codes], dtype=np.int64)
+        # Plain lists for the scans, reading them one item at a time is much faster than reading NumPy arrays
+        self._scan = (self.departures.tolist(), self.arrivals.tolist(), self.sources.tolist(),
+                      self.destinations.tolist(), self.trips.tolist(), self.transfer.tolist())
+
+    def stop(self, code):
+        code = code.strip()
+        if code not in self.index:
+            self.index[code] = len(self.codes)
+            self.codes.append(code)
+        return self.index[code]
+
+    def __len__(self):
+        return len(self.departures)
+
+    # Function to find the earliest arrival at destination leaving source at or after departure (minutes)
+    # Returns (arrival minutes, journey as a list of connection ids), (None, []) when it cannot be reached
+    def earliest_arrival(self, source, destination, departure, max_hours=72):
+        departures, arrivals, sources, destinations, trips, transfer = self._scan
+        self.stats = {'scanned': 0}
+        if source not in self.index or destination not in self.index:
+            return None, []
+        start, target = self.index[source], self.index[destination]
+        if start == target:
+            return departure, []
+
+        infinity = float('inf')
+        ready = [infinity] * len(self.codes)  # earliest time a flight can be boarded at each stop
+        ready[start] = departure  # No connection time before the first flight
+        boarded = {}  # trip -> connection it was boarded at
+        via = {}  # stop -> (boarding connection, connection landing there) of the best arrival
+        best = infinity
+        horizon = departure + 60 * max_hours
+
+        for connection in range(bisect.bisect_left(departures, departure), len(departures)):
+            leaves = departures[connection]
+            if leaves >= best or leaves > horizon:
+                break  # Sorted by departure: nothing later can arrive earlier
+            self.stats['scanned'] += 1
+            trip = trips[connection]
+            if trip not in boarded:
+                if ready[sources[connection]] > leaves:
+                    continue
+                boarded[trip] = connection
+            reached = destinations[connection]
+            if reached == target:
+                if arrivals[connection] < best:
+                    best = arrivals[connection]
+                    via[target] = (boarded[trip], connection)
+            elif arrivals[connection] + transfer[reached] < ready[reached]:
+                ready[reached] = arrivals[connection] + transfer[reached]
+                via[reached] = (boarded[trip], connection)
+        if best == infinity:
+            return None, []
+
+        journey = []
+        stop = target
+        while stop != start:
+            entered, connection = via[stop]
+            while connection != entered:
+                journey.append(connection)
+                connection = int(self.previous_leg[connection])
+            journey.append(entered)
+            stop = sources[entered]
+        journey.reverse()
+        return best, journey
+
+    # Function to find every useful (departure, arrival) pair from source to destination leaving in [start, end]
+    # Returns a list of (departure minutes, arrival minutes, journey), earliest departure first
+    def profile(self, source, destination, start, end, max_hours=72):
+        departures, arrivals, sources, destinations, trips, transfer = self._scan
+        self.stats = {'scanned': 0}
+        if source not in self.index or destination not in self.index or source == destination:
+            return []
+        origin, target = self.index[source], self.index[destination]
+
+        infinity = float('inf')
+        # Per stop, the pairs found so far, added by falling departure: departures negated (so ascending), arrivals, connections
+        negated = [[] for _ in self.codes]
+        arrival_at = [[] for _ in self.codes]
+        taken = [[] for _ in self.codes]
+        on_trip = [(infinity, -1)] * self.trip_count  # trip -> (arrival staying on it from its next leg, that leg)
+        after = {}  # connection -> the connection taken next, -1 at the destination
+
+        low = bisect.bisect_left(departures, start)
+        high = bisect.bisect_right(departures, end + 60 * max_hours)
+        for connection in range(high - 1, low - 1, -1):
+            self.stats['scanned'] += 1
+            reached = destinations[connection]
+            if reached == target:
+                arrival, following = arrivals[connection], -1
+            else:
+                # The earliest journey boarding at the next stop after the connection time
+                position = bisect.bisect_right(negated[reached], -(arrivals[connection] + transfer[reached])) - 1
+                arrival, following = (arrival_at[reached][position], taken[reached][position]) if position >= 0 else (infinity, -1)
+            stay = on_trip[trips[connection]]
+            if stay[0] < arrival:
+                arrival, following = stay
+            if arrival == infinity:
+                continue
+            on_trip[trips[connection]] = (arrival, connection)
+            after[connection] = following
+
+            stop = sources[connection]
+            leaves = departures[connection]
+            if arrival_at[stop] and arrival >= arrival_at[stop][-1]:
+                continue  # Leaving later arrives no later
+            if negated[stop] and negated[stop][-1] == -leaves:
+                negated[stop].pop()
+                arrival_at[stop].pop()
+                taken[stop].pop()
+            negated[stop].append(-leaves)
+            arrival_at[stop].append(arrival)
+            taken[stop].append(connection)
+
+        # Departures after end are kept above, they can still beat earlier ones, and only dropped here
+        profile = []
+        for position in range(len(negated[origin]) - 1, -1, -1):
+            if -negated[origin][position] > end:
+                break
+            journey = [taken[origin][position]]
+            while after[journey[-1]] != -1:
+                journey.append(after[journey[-1]])
+            profile.append((-negated[origin][position], arrival_at[origin][position], journey))
+        return profile
+
+    # Function to find the earliest arrival with Dijkstra on the time-expanded graph of the connections, for checking
+    # Nodes are connections, keyed by arrival: from one the trip's next leg, or any flight leaving after the connection time
+    def earliest_arrival_dijkstra(self, source, destination, departure, max_hours=72):
+        departures, arrivals, sources, destinations, trips, transfer = self._scan
+        if source not in self.index or destination not in self.index:
+            return None
+        if not hasattr(self, '_outgoing'):
+            self._outgoing = [[] for _ in self.codes]  # stop -> its connections, by departure
+            for connection in range(len(departures)):
+                self._outgoing[sources[connection]].append(connection)
+            self._outgoing_departures = [[departures[connection] for connection in connections] for connections in self._outgoing]
+        next_leg = self.next_leg
+        start, target = self.index[source], self.index[destination]
+        if start == target:
+            return departure
+        horizon = departure + 60 * max_hours
+        expanded_from = {}  # stop -> earliest boarding time already pushed
+        settled = set()
+        open_set = []
+
+        def board(stop, ready):
+            first = bisect.bisect_left(self._outgoing_departures[stop], ready)
+            last = bisect.bisect_left(self._outgoing_departures[stop], expanded_from.get(stop, horizon + 1))
+            for connection in self._outgoing[stop][first:last]:
+                heapq.heappush(open_set, (arrivals[connection], connection))
+            expanded_from[stop] = min(ready, expanded_from.get(stop, horizon + 1))
+
+        board(start, departure)
+        while open_set:
+            arrival, connection = heapq.heappop(open_set)
+            if connection in settled:
+                continue
+            settled.add(connection)
+            reached = destinations[connection]
+            if reached == target:
+                return arrival
+            if next_leg[connection] != -1 and departures[next_leg[connection]] <= horizon:
+                heapq.heappush(open_set, (arrivals[next_leg[connection]], int(next_leg[connection])))
+            board(reached, arrival + transfer[reached])
+        return None
+
+    # Function to describe the connections of a journey as dicts with ISO times
+    def describe(self, journey):
+        return [{
+            'source': self.codes[self.sources[connection]],
+            'destination': self.codes[self.destinations[connection]],
+            'airline': self.airlines[self.airline_ids[connection]],
+            'flight': self.numbers[connection],
+            'departure': to_iso(self.departures[connection]),
+            'arrival': to_iso(self.arrivals[connection]),
+        } for connection in journey]
+
+    # Function to compare earliest arrivals against the time-expanded Dijkstra on random queries
+    def verify(self, samples=200, seed=0):
+        generator = random.Random(seed)
+        mismatches = []
+        scan_seconds = dijkstra_seconds = 0.0
+        for _ in range(samples):
+            source, destination = generator.sample(self.codes, 2)
+            departure = int(self.departures[generator.randrange(len(self))])
+            started = time.perf_counter()
+            arrival, journey = self.earliest_arrival(source, destination, departure)
+            scan_seconds += time.perf_counter() - started
+            started = time.perf_counter()
+            expected = self.earliest_arrival_dijkstra(source, destination, departure)
+            dijkstra_seconds += time.perf_counter() - started
+            if arrival != expected or (journey and not self.feasible(journey, source, destination, departure, arrival)):
+                mismatches.append((source, destination, departure, arrival, expected))
+        return {
+            'pairs': samples,
+            'mismatches': mismatches,
+            'scan_ms': round(1000 * scan_seconds / samples, 3),
+            'dijkstra_ms': round(1000 * dijkstra_seconds / samples, 3),
+        }
+
+    # Function to check profiles over random windows of hours against earliest arrivals from the same places
+    # From any time in the window, the departures listed at or after it must arrive as early as the earliest
+    # arrival leaving then, or list none when leaving after the window arrives as early
+    # The probes are also the profile answered with repeated earliest-arrival queries, timed against the sweep
+    def verify_profile(self, samples=50, seed=0, hours=24, max_hours=72):
+        generator = random.Random(seed)
+        mismatches = []
+        profile_seconds = repeated_seconds = 0.0
+        for _ in range(samples):
+            source, destination = generator.sample(self.codes, 2)
+            start = int(self.departures[generator.randrange(len(self))])
+            end = start + 60 * hours
+            started = time.perf_counter()
+            profile = self.profile(source, destination, start, end, max_hours)
+            profile_seconds += time.perf_counter() - started
+            # The same last connection as the profile scan, end plus max_hours
+            after_window, _ = self.earliest_arrival(source, destination, end + 1, max_hours - 1 / 60)
+            # Probe just after each listed departure too, where a missing or dominated departure would show
+            for departure in [start] + [leaves + 1 for leaves, _, _ in profile if leaves < end]:
+                started = time.perf_counter()
+                expected, _ = self.earliest_arrival(source, destination, departure, (end - departure) / 60 + max_hours)
+                repeated_seconds += time.perf_counter() - started
+                found = min((arrival for leaves, arrival, _ in profile if leaves >= departure), default=None)
+                if found != expected and not (found is None and expected == after_window):
+                    mismatches.append((source, destination, departure, found, expected))
+            for leaves, arrival, journey in profile:
+                if not self.feasible(journey, source, destination, leaves, arrival):
+                    mismatches.append((source, destination, leaves, arrival, None))
+        return {
+            'pairs': samples,
+            'mismatches': mismatches,
+            'profile_ms': round(1000 * profile_seconds / samples, 3),
+            'repeated_ms': round(1000 * repeated_seconds / samples, 3),
+        }
+
+    # Function to check that a journey connects source to destination in time, with the connection times respected
+    def feasible(self, journey, source, destination, departure, arrival):
+        if self.codes[self.sources[journey[0]]] != source or self.codes[self.destinations[journey[-1]]] != destination:
+            return False
+        if self.departures[journey[0]] < departure or self.arrivals[journey[-1]] != arrival:
+            return False
+        for before, connection in zip(journey, journey[1:]):
+            if self.destinations[before] != self.sources[connection]:
+                return False
+            through = self.previous_leg[connection] == before
+            if not through and self.departures[connection] < self.arrivals[before] + self.transfer[self.sources[connection]]:
+                return False
+        return True
+
+
+# Function to write a synthetic timetable for the routes of a dataset: one to daily_max departures a day per route and airline
+# Block times are distance at 800 km/h plus 30 minutes; some flight numbers continue on to a second leg
+def generate_timetable(dataset, path, days=2, start='2025-01-06T00:00', daily_max=3, seed=0):
+    from routestore import get_route_store
+
+    generator = random.Random(seed)
+    store = get_route_store(dataset)
+    first_day = to_minutes(start)
+    legs = []
+    for row in store.rows:
+        for day in range(days):
+            for _ in range(generator.randint(1, daily_max)):
+                departure = first_day + 1440 * day + 5 * generator.randrange(288)
+                legs.append([row[0], row[11], row[10], departure, departure + int(float(row[20]) / 800 * 60) + 30])
+    legs.sort(key=lambda leg: leg[3])
+
+    # Number the flights, letting one in ten continue from its arrival airport on a later leg of the same airline
+    numbers = {}
+    waiting = {}  # (airport, airline) -> numbers of flights landed there that may continue
+    for leg in legs:
+        candidates = waiting.get((leg[0], leg[2]), [])
+        while candidates and not (candidates[0][0] <= leg[3] <= candidates[0][0] + 120):
+            candidates.pop(0)
+        if candidates and generator.random() < 0.1:
+            leg.append(candidates.pop(0)[1])
+        else:
+            numbers[leg[2]] = numbers.get(leg[2], 0) + 1
+            leg.append(str(numbers[leg[2]]))
+        if generator.random() < 0.5:
+            waiting.setdefault((leg[1], leg[2]), []).append((leg[4], leg[5]))
+
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(HEADER)
+        for source, destination, airline, departure, arrival, number in legs:
+            writer.writerow([source, destination, airline, number, to_iso(departure), to_iso(arrival)])
+    return len(legs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Earliest-arrival and profile queries on a flight timetable with the Connection Scan Algorithm.")
+    parser.add_argument('timetable', help="CSV of source_iata, destination_iata, airline, flight, departure, arrival")
+    parser.add_argument('source', nargs='?')
+    parser.add_argument('destination', nargs='?')
+    parser.add_argument('--depart', help="earliest departure, ISO 8601 (UTC without a zone)")
+    parser.add_argument('--until', help="latest departure: list every useful departure from --depart up to this time")
+    parser.add_argument('--min-connection', type=int, default=45, help="minutes needed to change flights")
+    parser.add_argument('--verify', type=int, default=0, metavar='PAIRS', help="random queries to check against time-expanded Dijkstra, and a quarter as many profiles")
+    parser.add_argument('--generate', metavar='DATASET', help="first write a synthetic timetable for the routes of DATASET")
+    parser.add_argument('--days', type=int, default=2, help="days of flights to generate")
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        print(f"Generated {args.timetable}: {generate_timetable(args.generate, args.timetable, args.days)} flights")
+    timetable = Timetable(args.timetable, args.min_connection)
+    if args.verify:
+        report = timetable.verify(args.verify)
+        print(f"{report['pairs']} queries checked against time-expanded Dijkstra, {len(report['mismatches'])} mismatches, "
+              f"{report['scan_ms']} ms per query vs {report['dijkstra_ms']} ms")
+        report = timetable.verify_profile(max(1, args.verify // 4))
+        print(f"{report['pairs']} day-long profiles checked against earliest arrivals, {len(report['mismatches'])} mismatches, "
+              f"{report['profile_ms']} ms per profile vs {report['repeated_ms']} ms with an earliest-arrival query per departure")
+    if not (args.source and args.destination and args.depart):
+        return
+
+    departure = to_minutes(args.depart)
+    if args.until:
+        options = timetable.profile(args.source, args.destination, departure, to_minutes(args.until))
+    else:
+        arrival, journey = timetable.earliest_arrival(args.source, args.destination, departure)
+        options = [(departure, arrival, journey)] if arrival is not None else []
+    if not options:
+        print(f"No connection from {args.source} to {args.destination}")
+    for _, arrival, journey in options:
+        print(f"Arrive {to_iso(arrival)}")
+        for leg in timetable.describe(journey):
+            print(f"  {leg['airline']}{leg['flight']} {leg['source']} {leg['departure']} -> {leg['destination']} {leg['arrival']}")
+
+
+if __name__ == "__main__":
+    main()